@@ -1,34 +1,73 @@
 import cv2
 import numpy as np
 import FisheyeToPlanar 
+import map_cache
 from background_subtraction import BackgroundSubtraction 
 from motion_detection_utils import add_motion_alert_border
 from logger import log 
 
+# 'float': float32 map_x/map_y. 'fixed': CV_16SC2 + CV_16UC1 interpolation table (cv2.convertMaps)
+REMAP_PRECISIONS = ("float", "fixed")
+
 class FisheyeMultiView:
     """
     Handles the dewarping of a fisheye video frame into multiple planar views
     based on a given configuration.
     """
 
-    def __init__(self, fisheye_frame_shape, view_configs, show_original=True, motion_detection_enabled=False, perimeter_zones={}, use_cuda=False, downscale_size=(640, 360)):
+    def __init__(self, fisheye_frame_shape, view_configs, show_original=True, motion_detection_enabled=False, perimeter_zones={}, use_cuda=False, downscale_size=(640, 360), remap_precision="float", output_size=(1280, 960), overlay_on_downscaled=False, crop_to_roi=True,
+                 motion_method="mog2", motion_min_area=400, motion_alert_border=True):
         """
         Initializes the processor and pre-calculates all necessary transformation maps.
 
         Args:
             fisheye_frame_shape (tuple): The (height, width) of the input fisheye frame.
             view_configs (list): A list of dictionaries, where each dict defines a view
-                                 with 'angle_z', 'angle_up', and 'zoom'.
+                                 with 'angle_z', 'angle_up', 'zoom' and optionally
+                                 'output_size' (width, height) to override `output_size`.
             show_original (bool): Flag to determine if the original fisheye view should be returned.
+            remap_precision (str): 'float' keeps float32 map_x/map_y; 'fixed' converts them once to
+                                   OpenCV's CV_16SC2 + interpolation-table form (faster CPU remap,
+                                   less memory, ~1/32 px quantization). CUDA remap always uses float.
+            output_size (tuple): Default (width, height) each view is remapped to. Views are rendered
+                                 at this size in a single remap (180 degree rotation is folded into
+                                 the map), so pass the delivery size to avoid a later downscale.
+            overlay_on_downscaled (bool): Draw view boundaries on the 640x360 letterboxed original
+                                          instead of the full-res frame (cheaper, and leaves the
+                                          source frame untouched).
+            crop_to_roi (bool): Store each view's maps relative to the bounding box of the fisheye
+                                pixels it samples and remap/upload only that box.
+            motion_detection_enabled (bool): Run a background subtractor per view; render_view then
+                                             reports a motion flag and mask for every view.
+            perimeter_zones (dict): {'partition_X': {name: [(x, y), ...]}} normalized polygons where
+                                    motion counts (a view config's own 'zones' takes precedence).
+            motion_method (str): 'mog2' or 'diff' (see background_subtraction.py).
+            motion_min_area (int): Smallest motion blob, in view pixels, that counts as motion.
+            motion_alert_border (bool): Draw a red border on views with motion.
         """
         print("Initializing FisheyeMultiView...")
         if not view_configs:
             raise ValueError("View configurations cannot be empty for FisheyeMultiView.")
 
+        if remap_precision not in REMAP_PRECISIONS:
+            raise ValueError(f"remap_precision must be one of {REMAP_PRECISIONS}, got {remap_precision!r}")
+
         self.view_configs = view_configs
+        self.remap_precision = remap_precision
+        self.output_size = tuple(output_size)
+        self.view_output_sizes = []  # (width, height) per view, None for disabled views
+        self.overlay_on_downscaled = overlay_on_downscaled
+        self.crop_to_roi = crop_to_roi
+        # View boundaries on the full frame, int32 (4, 1, 2) per view (None if disabled); built with the maps
+        self.boundary_polygons = []
+        # Reused letterbox canvas for the original view (see letterbox)
+        self._letterbox_canvas = None
+        self._letterbox_geometry = None
         self.show_original = show_original
+        # Per view: (map_x, map_y, roi). Maps are relative to roi = (x0, y0, x1, y1), the part of the
+        # cropped frame the view samples, so remap/upload only touch that sector of the fisheye circle.
         self.dewarp_maps = []
-        self.gpu_dewarp_maps = []  # Holds uploaded maps when CUDA is enabled
+        self.gpu_dewarp_maps = []  # Holds uploaded (map_x, map_y, roi) when CUDA is enabled
         self.use_cuda = bool(use_cuda and hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0)
         # When using CUDA, downscale on-GPU before downloading to reduce copy cost
         self.downscale_size = downscale_size if self.use_cuda else None
@@ -44,58 +83,64 @@ class FisheyeMultiView:
 
 
         self.motion_detection_enabled = motion_detection_enabled
-        self.perimeter_zones = perimeter_zones
+        self.perimeter_zones = perimeter_zones or {}
+        self.motion_method = motion_method
+        self.motion_min_area = motion_min_area
+        self.motion_alert_border = motion_alert_border
 
         if self.motion_detection_enabled:
             print(f"Motion detection enabled. Initializing {len(view_configs)} background subtractors.")
-            self.bg_subtractors = [BackgroundSubtraction() for _ in view_configs]
+            self.bg_subtractors = [BackgroundSubtraction(method=motion_method) for _ in view_configs]
         else:
             self.bg_subtractors = []
 
     def _create_all_maps(self):
         """Generates a transformation map for each view configuration and uploads to GPU if available."""
         print(f"Creating {len(self.view_configs)} dewarp maps...")
-        # High-res remap target; keep as requested (height, width)
-        output_shape = (960,1280)
+        # All views in one batched, cached lookup (memory-mapped .npy), so repeated lenses start
+        # instantly and misses share one generator pass. Output shapes are (height, width).
+        enabled = [config for config in self.view_configs if config is not None]
+        try:
+            batch = map_cache.get_remap_maps(
+                self.cropped_frame_shape,
+                180,  # i_fov_deg
+                [self._map_request(config) for config in enabled],
+                rotate_180=True,  # Ceiling mount correction, applied by the map itself
+            )
+        except Exception as e:
+            print(f"Failed to create dewarp maps: {e}")
+            batch = [None] * len(enabled)
+        batch_maps = iter(batch)
 
         for config in self.view_configs:
             if config is None:
                 self.dewarp_maps.append(None)
                 self.gpu_dewarp_maps.append(None)
+                self.view_output_sizes.append(None)
+                self.boundary_polygons.append(None)
                 continue
-            
-            pan_angle = config.get('angle_z', 0)
-            tilt_angle = config.get('angle_up', 0)
-            zoom_fov = config.get('zoom', 90)
 
             try:
-                # This function is assumed to exist in your FisheyeToPlanar library
-                map_x, map_y = FisheyeToPlanar.create_remap_map(
-                    fisheye_shape=self.cropped_frame_shape,
-                    output_shape=output_shape,
-                    i_fov_deg = 180,
-                    o_fov_deg=zoom_fov,
-                    yaw_deg=0,
-                    pitch_deg=tilt_angle,
-                    roll_deg=pan_angle,
-                )
-                self.dewarp_maps.append((map_x, map_y))
-                if self.use_cuda:
-                    # Upload maps to GPU once to avoid per-frame transfers
-                    map_x_gpu = cv2.cuda_GpuMat()
-                    map_y_gpu = cv2.cuda_GpuMat()
-                    map_x_gpu.upload(map_x)
-                    map_y_gpu.upload(map_y)
-                    self.gpu_dewarp_maps.append((map_x_gpu, map_y_gpu))
-                else:
-                    self.gpu_dewarp_maps.append(None)
+                maps = next(batch_maps)
+                if maps is None:
+                    raise RuntimeError("map generation failed")
+                maps, gpu_maps, output_size, polygon = self._prepare_view(config, maps)
+                self.dewarp_maps.append(maps)
+                self.gpu_dewarp_maps.append(gpu_maps)
+                self.view_output_sizes.append(output_size)
+                self.boundary_polygons.append(polygon)
             except Exception as e:
                 print(f"Failed to create map for config {config}: {e}")
                 # Add a None placeholder to maintain index alignment
                 self.dewarp_maps.append(None)
                 self.gpu_dewarp_maps.append(None)
+                self.view_output_sizes.append(None)
+                self.boundary_polygons.append(None)
         
-        print("FisheyeMultiView initialization complete.")
+        # Scaled copies for overlays drawn on the letterbox are derived lazily
+        self._letterbox_polygons = None
+
+        print(f"FisheyeMultiView initialization complete ({'cuda' if self.use_cuda else self.remap_precision} remap).")
 
     @staticmethod
     def pad_to_size(img, target_width, target_height, color=(0, 0, 0)):
@@ -123,118 +168,272 @@ class FisheyeMultiView:
         
         return padded_img
 
-    def process_frame(self, frame, overlay, view_id=None):
+    def process_frame(self, frame, overlay, view_id=None, view_ids=None):
         """
         Processes a single raw fisheye frame and returns configured views.
         Args:
             frame (np.ndarray): The raw fisheye video frame.
             view_id (str, optional): If set (e.g., 'partition_0'), only process this view.
+            view_ids (iterable, optional): If set, only produce these keys (e.g. {'original', 'partition_3'}).
+                                           Takes precedence over view_id; unwatched views are never remapped.
         """
         processed_frames = {}
         processed_masks = {}
         processed_motion_flag = {}
+
+        if view_ids is not None:
+            view_ids = set(view_ids)
+        include_original = self.show_original and (view_ids is None or 'original' in view_ids)
         
-        # Always return original if specifically requested or no view_id (backward compat)
-        if view_id is None or view_id == 'original':
+        # Always return original if specifically requested or no view_id (backward compat).
+        # With show_original the padded copy below replaces it, so skip the full-res copy.
+        if not self.show_original and view_ids is None and (view_id is None or view_id == 'original'):
              processed_frames['original'] = frame.copy()
 
-        # --- Crop the frame to the center square ---
+        cropped_frame = self.crop(frame)
+
+        # print(f"Processing fisheye frame of shape {frame.shape} into {len(self.dewarp_maps)} views...")
+
+        # --- Generate each dewarped partition ---
+        for i in range(len(self.dewarp_maps)):
+            current_key = f"partition_{i}"
+            if view_ids is not None:
+                if current_key not in view_ids:
+                    continue
+            elif view_id is not None and view_id != 'original' and view_id != current_key:
+                continue
+
+            rendered = self.render_view(i, cropped_frame)
+            if rendered is None:
+                continue
+            planar_view, motion_mask, motion_flag = rendered
+
+            processed_frames[current_key] = planar_view
+            if motion_flag is not None:
+                processed_motion_flag[current_key] = motion_flag
+            if motion_mask is not None:
+                # if detections is not None:
+                #     draw_bboxes(motion_mask, detections)
+
+                processed_masks[current_key] = motion_mask
+
+        # --- Include the original fisheye view if requested ---
+        if include_original:
+            processed_frames["original"] = self.render_original(frame, overlay)
+
+        return processed_frames, processed_masks, processed_motion_flag
+
+    def crop(self, frame):
+        """Returns the centered square crop of the fisheye frame (a view, not a copy)."""
         side_length = self.cropped_frame_shape[0]
         # Safety check for crop
         if frame.shape[1] < self.crop_offset + side_length:
              # If frame is smaller than expected, just use center crop
              self.crop_offset = (frame.shape[1] - side_length) // 2
         
-        cropped_frame = frame[:, self.crop_offset:self.crop_offset + side_length]
+        return frame[:, self.crop_offset:self.crop_offset + side_length]
 
-        # print(f"Processing fisheye frame of shape {frame.shape} into {len(self.dewarp_maps)} views...")
+    def render_view(self, i, cropped_frame):
+        """
+        Dewarps a single partition from the cropped fisheye frame at its configured output size.
+        Touches no state shared with other views, so different views can be rendered
+        concurrently (cv2.remap releases the GIL).
 
-        # --- Generate each dewarped partition ---
-        for i, dewarp_map in enumerate(self.dewarp_maps):
-            current_key = f"partition_{i}"
-            if view_id is not None and view_id != 'original' and view_id != current_key:
-                continue
+        Returns:
+            (planar_view, motion_mask, motion_flag) or None if the view is disabled.
+            motion_flag is None when motion detection is off.
+        """
+        dewarp_map = self.dewarp_maps[i]
+        if dewarp_map is None:
+            return None
+        # Read once: set_view may swap the entry (maps and ROI together) from another thread
+        map_x, map_y, (x0, y0, x1, y1) = dewarp_map
+        gpu_map = self.gpu_dewarp_maps[i] if self.use_cuda else None
 
-            if dewarp_map is not None:
-                map_x, map_y = dewarp_map
-
-                if self.use_cuda and self.gpu_dewarp_maps[i] is not None:
-                    # GPU remap then (optionally) GPU resize before a single download
-                    map_x_gpu, map_y_gpu = self.gpu_dewarp_maps[i]
-                    gpu_src = cv2.cuda_GpuMat()
-                    gpu_src.upload(cropped_frame)
-                    gpu_planar = cv2.cuda.remap(
-                        gpu_src, map_x_gpu, map_y_gpu,
-                        interpolation=cv2.INTER_LINEAR,
-                        borderMode=cv2.BORDER_CONSTANT
-                    )
-                    if self.downscale_size:
-                        # Note: cv2 uses (width, height)
-                        target_w, target_h = self.downscale_size
-                        gpu_planar = cv2.cuda.resize(gpu_planar, (target_w, target_h), interpolation=cv2.INTER_AREA)
-                    planar_view = gpu_planar.download()
-                else:
-                    planar_view = cv2.remap(
-                        cropped_frame, map_x, map_y,
-                        interpolation=cv2.INTER_LINEAR,
-                        borderMode=cv2.BORDER_CONSTANT
-                    )
-                
-                # ROTATE 180 degrees (Correct for ceiling mount)
-                planar_view = cv2.rotate(planar_view, cv2.ROTATE_180)
-
-                motion_mask = None
-                # --- Handle motion detection if enabled ---
-                if self.motion_detection_enabled and i < len(self.bg_subtractors):
-                    subtractor = self.bg_subtractors[i]
-
-                    current_view_zones = self.view_configs[i].get('zones', {})
-
-                    detections, motion_mask = subtractor.get_detections(planar_view.copy(), zones=current_view_zones , bbox_thresh=50)
-                    
-                    # Draw bounding boxes on the view
-                    if detections is not None:
-                        planar_view = add_motion_alert_border(planar_view) # New way
-                        processed_motion_flag[f"partition_{i}"] = True
-                    else:
-                        processed_motion_flag[f"partition_{i}"] = False
-                    
-
-                processed_frames[f"partition_{i}"] = planar_view
-
-                if motion_mask is not None:
-                    # if detections is not None:
-                    #     draw_bboxes(motion_mask, detections)
-
-                    processed_masks[f"partition_{i}"] = motion_mask
+        if gpu_map is not None:
+            # GPU remap then (optionally) GPU resize before a single download.
+            # Only the view's ROI of the frame is uploaded.
+            map_x_gpu, map_y_gpu, (x0, y0, x1, y1) = gpu_map
+            gpu_src = cv2.cuda_GpuMat()
+            gpu_src.upload(np.ascontiguousarray(cropped_frame[y0:y1, x0:x1]))
+            gpu_planar = cv2.cuda.remap(
+                gpu_src, map_x_gpu, map_y_gpu,
+                interpolation=cv2.INTER_LINEAR,
+                borderMode=cv2.BORDER_CONSTANT
+            )
+            if self.downscale_size and tuple(self.downscale_size) != self.view_output_sizes[i]:
+                # Note: cv2 uses (width, height)
+                target_w, target_h = self.downscale_size
+                gpu_planar = cv2.cuda.resize(gpu_planar, (target_w, target_h), interpolation=cv2.INTER_AREA)
+            planar_view = gpu_planar.download()
+        else:
+            planar_view = cv2.remap(
+                cropped_frame[y0:y1, x0:x1], map_x, map_y,
+                interpolation=cv2.INTER_LINEAR,
+                borderMode=cv2.BORDER_CONSTANT
+            )
+        # Already rotated 180 degrees for the ceiling mount (folded into the map)
 
-        # --- Include the original fisheye view if requested ---
-        if overlay and self.show_original:
-            # Overlay the original fisheye frame on the processed views
-            output_shape_for_lib = (270*2, 480*2)
-            for config in self.view_configs:
-                if config is None:
-                    continue
-                pan_angle = config.get('angle_z', 0)
-                tilt_angle = config.get('angle_up', 0)
-                zoom_fov = config.get('zoom', 90)
-
-                boundary_pts = FisheyeToPlanar.get_view_boundary_on_fisheye(
-                    fisheye_shape=self.cropped_frame_shape,
-                    output_shape=output_shape_for_lib,
-                    i_fov_deg = 180,
-                    o_fov_deg=zoom_fov,
-                    yaw_deg=0,
-                    pitch_deg=tilt_angle,
-                    roll_deg=pan_angle,
-                )
-                
-                pts = boundary_pts.reshape((-1, 1, 2)).astype(np.int32)
-                pts[:, :, 0] += self.crop_offset
-                cv2.polylines(frame, [pts], isClosed=True, color=(0, 255, 255), thickness=2)
-
-        if self.show_original:
-            processed_frames["original"] = self.pad_to_size(frame, 640, 360) 
-            # processed_frames["original"] = cv2.resize(frame, (640, 360)) 
-
-        return processed_frames, processed_masks, processed_motion_flag
\ No newline at end of file
+        motion_mask = None
+        motion_flag = None
+        # --- Handle motion detection if enabled ---
+        if self.motion_detection_enabled and i < len(self.bg_subtractors):
+            subtractor = self.bg_subtractors[i]
+
+            config = self.view_configs[i] or {}
+            current_view_zones = config.get('zones') or self.perimeter_zones.get(f"partition_{i}")
+
+            # Only reads the view (downscaled internally), so no copy is needed
+            detections, motion_mask = subtractor.get_detections(planar_view, zones=current_view_zones, bbox_thresh=self.motion_min_area)
+            
+            # Draw bounding boxes on the view
+            if detections is not None:
+                if self.motion_alert_border:
+                    planar_view = add_motion_alert_border(planar_view) # New way
+                motion_flag = True
+            else:
+                # Until the background model has settled, report motion so nothing gets gated off
+                motion_flag = subtractor.warming_up
+
+        return planar_view, motion_mask, motion_flag
+
+    def _prepare_view(self, config, maps):
+        """
+        Turns float maps for one view into what render_view uses:
+        (cpu maps, gpu maps or None, output size, boundary polygon), maps cropped to the view's ROI.
+        """
+        h, w = self.cropped_frame_shape
+        roi = self._source_roi(*maps) if self.crop_to_roi else (0, 0, w, h)
+        x0, y0 = roi[0], roi[1]
+        # Shift into ROI coordinates (new private arrays; cached maps stay untouched)
+        map_x = np.subtract(maps[0], np.float32(x0), dtype=np.float32)
+        map_y = np.subtract(maps[1], np.float32(y0), dtype=np.float32)
+        gpu_maps = None
+        if self.use_cuda:
+            # Upload maps to GPU once to avoid per-frame transfers
+            map_x_gpu = cv2.cuda_GpuMat()
+            map_y_gpu = cv2.cuda_GpuMat()
+            map_x_gpu.upload(map_x)
+            map_y_gpu.upload(map_y)
+            gpu_maps = (map_x_gpu, map_y_gpu, roi)
+        elif self.remap_precision == "fixed":
+            # Convert once; cv2.remap takes (map1, map2) in place of (map_x, map_y)
+            map_x, map_y = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        output_size = tuple(config.get('output_size', self.output_size))
+        return (map_x, map_y, roi), gpu_maps, output_size, self._boundary_polygon(config)
+
+    def _source_roi(self, map_x, map_y):
+        """
+        Bounding box (x0, y0, x1, y1) of the cropped-frame pixels a view's maps can sample.
+        Samples within 1px outside the frame still blend with edge pixels (BORDER_CONSTANT), so
+        they count too; one extra pixel right/below covers the bilinear neighbour.
+        """
+        h, w = self.cropped_frame_shape
+        inside = (map_x > -1) & (map_x < w) & (map_y > -1) & (map_y < h)
+        if not inside.any():
+            return (0, 0, 1, 1)  # View looks entirely outside the lens circle
+        xs = map_x[inside]
+        ys = map_y[inside]
+        x0 = max(0, int(np.floor(xs.min())))
+        y0 = max(0, int(np.floor(ys.min())))
+        x1 = min(w, int(np.floor(xs.max())) + 2)
+        y1 = min(h, int(np.floor(ys.max())) + 2)
+        return (x0, y0, x1, y1)
+
+    def set_view(self, index, config):
+        """
+        Re-aims partition `index` (virtual PTZ) while frames keep flowing.
+        Builds everything for the new config first (slow part, call it off the render loop),
+        then swaps the per-view entries; render_view reads each entry once per frame, so a
+        frame is rendered entirely with either the old or the new map.
+        """
+        if not 0 <= index < len(self.view_configs):
+            raise IndexError(f"View index {index} out of range (0-{len(self.view_configs) - 1})")
+        # Ad-hoc positions stay in the in-memory LRU only; presets are served from there instantly
+        maps = map_cache.get_remap_maps(self.cropped_frame_shape, 180, [self._map_request(config)],
+                                        rotate_180=True, persist=False)[0]
+        maps, gpu_maps, output_size, polygon = self._prepare_view(config, maps)
+
+        self.view_configs[index] = config
+        self.view_output_sizes[index] = output_size
+        self.gpu_dewarp_maps[index] = gpu_maps
+        self.dewarp_maps[index] = maps
+        self.boundary_polygons[index] = polygon
+        self._letterbox_polygons = None
+        if self.motion_detection_enabled and index < len(self.bg_subtractors):
+            # The scene behind the view changed; start a fresh background model
+            self.bg_subtractors[index] = BackgroundSubtraction(method=self.motion_method)
+
+    def _map_request(self, config):
+        """(output_shape, yaw, pitch, roll, o_fov) of one view config, as map_cache expects."""
+        # Remap target per view; output_shape is (height, width)
+        out_w, out_h = config.get('output_size', self.output_size)
+        return ((out_h, out_w), 0, config.get('angle_up', 0), config.get('angle_z', 0), config.get('zoom', 90))
+
+    def _boundary_polygon(self, config):
+        """Static outline of one view on the full (uncropped) frame, as int32 polyline points."""
+        # Overlay geometry uses a fixed 16:9 plane, independent of the view's render size
+        output_shape_for_lib = (270*2, 480*2)
+        boundary_pts = FisheyeToPlanar.get_view_boundary_on_fisheye(
+            fisheye_shape=self.cropped_frame_shape,
+            output_shape=output_shape_for_lib,
+            i_fov_deg = 180,
+            o_fov_deg=config.get('zoom', 90),
+            yaw_deg=0,
+            pitch_deg=config.get('angle_up', 0),
+            roll_deg=config.get('angle_z', 0),
+        )
+        pts = boundary_pts.reshape((-1, 1, 2)).astype(np.int32)
+        pts[:, :, 0] += self.crop_offset
+        return pts
+
+    def letterbox(self, img, target_width, target_height):
+        """
+        Same result as pad_to_size, but resizes straight into a canvas that is allocated once
+        and reused (the black bars never change). The returned array is overwritten by the
+        next call, so encode/copy it before rendering the next frame.
+        """
+        h, w = img.shape[:2]
+        geometry_key = (h, w, target_width, target_height)
+        if self._letterbox_geometry is None or self._letterbox_geometry[0] != geometry_key:
+            scale = min(target_width / w, target_height / h)
+            new_w, new_h = int(w * scale), int(h * scale)
+            start_x = (target_width - new_w) // 2
+            start_y = (target_height - new_h) // 2
+            self._letterbox_geometry = (geometry_key, scale, start_x, start_y, new_w, new_h)
+            self._letterbox_canvas = np.zeros((target_height, target_width, 3), dtype=np.uint8)
+            self._letterbox_polygons = None
+
+        _, _, start_x, start_y, new_w, new_h = self._letterbox_geometry
+        region = self._letterbox_canvas[start_y:start_y + new_h, start_x:start_x + new_w]
+        cv2.resize(img, (new_w, new_h), dst=region, interpolation=cv2.INTER_AREA)
+        return self._letterbox_canvas
+
+    def render_original(self, frame, overlay):
+        """
+        Letterboxed 640x360 original view (a reused canvas, see letterbox).
+        With overlay and overlay_on_downscaled=False, view boundaries are drawn onto `frame` in place,
+        so call this only after all partitions of the frame have been rendered. With
+        overlay_on_downscaled=True the frame is only read, so it can run alongside the partitions.
+        """
+        if overlay and not self.overlay_on_downscaled:
+            # Overlay the view boundaries on the full-res fisheye frame
+            polygons = [pts for pts in self.boundary_polygons if pts is not None]
+            cv2.polylines(frame, polygons, isClosed=True, color=(0, 255, 255), thickness=2)
+
+        canvas = self.letterbox(frame, 640, 360)
+
+        if overlay and self.overlay_on_downscaled:
+            # Local reference: set_view may reset the cached list from another thread
+            polygons = self._letterbox_polygons
+            if polygons is None:
+                _, scale, start_x, start_y, _, _ = self._letterbox_geometry
+                offset = np.array([start_x, start_y], dtype=np.float64)
+                polygons = [
+                    np.round(pts * scale + offset).astype(np.int32)
+                    for pts in self.boundary_polygons if pts is not None
+                ]
+                self._letterbox_polygons = polygons
+            cv2.polylines(canvas, polygons, isClosed=True, color=(0, 255, 255), thickness=1, lineType=cv2.LINE_AA)
+
+        return canvas
@@ -1,31 +1,13 @@
 import cv2
 import numpy as np
 
-def create_remap_map(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw_deg, pitch_deg, roll_deg):
-    """
-    Creates a coordinate mapping from a fisheye view to a perspective view.
-    Handles non-square output aspect ratios correctly.
-    """
-    i_h, i_w = fisheye_shape
-    o_h, o_w = output_shape
+# Rows of output evaluated per step by the batched generator. Bounds the float32 temporaries
+# to a few MB regardless of view count or output size.
+DEFAULT_CHUNK_ROWS = 64
 
-    # Assume the provided o_fov_deg is the VERTICAL field of view.
-    v_fov_rad = np.deg2rad(o_fov_deg)
-    
-    # Calculate the boundaries of the 3D projection plane based on the vertical FOV and aspect ratio
-    y_range = np.tan(v_fov_rad / 2.0)
-    x_range = y_range * (o_w / o_h) # Adjust width based on aspect ratio
-
-    # Create a grid of coordinates on the projection plane
-    x_cam, y_cam = np.meshgrid(
-        np.linspace(-x_range, x_range, num=o_w, dtype=np.float32),
-        np.linspace(y_range, -y_range, num=o_h, dtype=np.float32) # y is inverted in image coordinates
-    )
-    z_cam = np.ones_like(x_cam)
-    
-    xyz_grid = np.stack([x_cam, y_cam, z_cam], axis=-1)
-
-    # Calculate combined rotation matrix
+
+def rotation_matrix(yaw_deg, pitch_deg, roll_deg):
+    """Combined view rotation R = Rz(roll) @ Rx(pitch) @ Ry(yaw)."""
     yaw_rad, pitch_rad, roll_rad = np.deg2rad(yaw_deg), np.deg2rad(pitch_deg), np.deg2rad(roll_deg)
     cos_p, sin_p = np.cos(pitch_rad), np.sin(pitch_rad)
     Rx = np.array([[1, 0, 0], [0, cos_p, -sin_p], [0, sin_p, cos_p]])
@@ -33,38 +15,102 @@ def create_remap_map(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw_deg,
     Ry = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]])
     cos_r, sin_r = np.cos(roll_rad), np.sin(roll_rad)
     Rz = np.array([[cos_r, -sin_r, 0], [sin_r, cos_r, 0], [0, 0, 1]])
-    R = Rz @ Rx @ Ry
-    
-    # Rotate the 3D grid
-    rotated_xyz = xyz_grid @ R.T
-    
-    # Project 3D vectors to fisheye sphere
-    x_rot, y_rot, z_rot = rotated_xyz[..., 0], rotated_xyz[..., 1], rotated_xyz[..., 2]
+    return Rz @ Rx @ Ry
+
+
+def _plane_ranges(output_shape, o_fov_deg):
+    """Half extents of the z=1 projection plane; o_fov_deg is the VERTICAL field of view."""
+    o_h, o_w = output_shape
+    y_range = np.tan(np.deg2rad(o_fov_deg) / 2.0)
+    x_range = y_range * (o_w / o_h)  # Adjust width based on aspect ratio
+    return x_range, y_range
+
+
+def _project_rotated(x_rot, y_rot, z_rot, fisheye_shape, i_fov_deg, out_x=None, out_y=None):
+    """Equidistant fisheye projection of already-rotated rays into fisheye pixel coordinates."""
+    i_h, i_w = fisheye_shape
     theta = np.arctan2(y_rot, x_rot)
-    phi = np.arctan2(np.sqrt(x_rot**2 + y_rot**2), z_rot)
-    
-    # Map spherical coordinates to 2D fisheye image
-    i_fov_rad = np.deg2rad(i_fov_deg)
-    r = phi * min(i_h, i_w) / i_fov_rad
-    map_x = 0.5 * i_w + r * np.cos(theta)
-    
-    # FIX: The sign was incorrect, causing a vertical flip.
-    # It should be a minus to map the top of the view (positive y_rot)
-    # to the top of the image (smaller map_y values).
-    map_y = 0.5 * i_h - r * np.sin(theta)
-    
-    return map_x.astype(np.float32), map_y.astype(np.float32)
+    phi = np.arctan2(np.hypot(x_rot, y_rot), z_rot)
+    r = phi * np.asarray(min(i_h, i_w) / np.deg2rad(i_fov_deg), dtype=phi.dtype)
+    # map_y uses a minus: the top of the view (positive y_rot) maps to the top of the image
+    # (smaller map_y values)
+    map_x = np.multiply(r, np.cos(theta), out=out_x)
+    map_x += np.asarray(0.5 * i_w, dtype=map_x.dtype)
+    map_y = np.multiply(r, np.sin(theta), out=out_y)
+    np.subtract(np.asarray(0.5 * i_h, dtype=map_y.dtype), map_y, out=map_y)
+    return map_x, map_y
+
+
+def project_points(points_xyz, fisheye_shape, i_fov_deg, yaw_deg, pitch_deg, roll_deg):
+    """
+    Projects arbitrary camera-space points (N, 3) of a view with the given orientation
+    onto the fisheye image. Returns (N, 2) pixel coordinates (x, y).
+    """
+    points_xyz = np.asarray(points_xyz, dtype=np.float64).reshape(-1, 3)
+    rotated = points_xyz @ rotation_matrix(yaw_deg, pitch_deg, roll_deg).T
+    map_x, map_y = _project_rotated(rotated[:, 0], rotated[:, 1], rotated[:, 2], fisheye_shape, i_fov_deg)
+    return np.stack([map_x, map_y], axis=-1)
+
+
+def create_remap_maps_batch(fisheye_shape, output_shape, i_fov_deg, views, chunk_rows=DEFAULT_CHUNK_ROWS, rotate_180=False):
+    """
+    Creates remap maps for many views of the same output size at once.
+
+    Args:
+        views: iterable of (yaw_deg, pitch_deg, roll_deg, o_fov_deg) tuples.
+        rotate_180: produce maps whose output is already rotated by 180 degrees
+                    (the base grid is simply traversed in reverse).
+    Returns:
+        list of (map_x, map_y) float32 arrays, one pair per view.
+
+    The projection plane is z=1, so a ray's rotation is separable:
+    R @ (x, y, 1) = x * R[:, 0] + y * R[:, 1] + R[:, 2]. Rays are generated from one shared
+    normalized grid per chunk of rows (never a full xyz grid), all math is float32, and only
+    the output maps plus one chunk of temporaries are alive at a time.
+    """
+    o_h, o_w = output_shape
+    # Shared normalized base rays in [-1, 1]; y is inverted in image coordinates
+    base_x = np.linspace(-1.0, 1.0, num=o_w, dtype=np.float32)
+    base_y = np.linspace(1.0, -1.0, num=o_h, dtype=np.float32)
+    if rotate_180:
+        base_x, base_y = -base_x, -base_y
+    chunk_rows = max(1, int(chunk_rows))
+
+    maps = []
+    for yaw_deg, pitch_deg, roll_deg, o_fov_deg in views:
+        x_range, y_range = _plane_ranges(output_shape, o_fov_deg)
+        R = rotation_matrix(yaw_deg, pitch_deg, roll_deg).astype(np.float32)
+        # Per-view scaling folded into the rotation columns: ray = (x_range*bx, y_range*by, 1)
+        col_x = R[:, 0] * np.float32(x_range)
+        col_y = R[:, 1] * np.float32(y_range)
+        col_z = R[:, 2]
+
+        map_x = np.empty((o_h, o_w), dtype=np.float32)
+        map_y = np.empty((o_h, o_w), dtype=np.float32)
+        for row in range(0, o_h, chunk_rows):
+            by = base_y[row:row + chunk_rows, None]
+            x_rot = col_x[0] * base_x + (col_y[0] * by + col_z[0])
+            y_rot = col_x[1] * base_x + (col_y[1] * by + col_z[1])
+            z_rot = col_x[2] * base_x + (col_y[2] * by + col_z[2])
+            _project_rotated(x_rot, y_rot, z_rot, fisheye_shape, i_fov_deg,
+                             out_x=map_x[row:row + chunk_rows], out_y=map_y[row:row + chunk_rows])
+        maps.append((map_x, map_y))
+    return maps
+
+
+def create_remap_map(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw_deg, pitch_deg, roll_deg):
+    """
+    Creates a coordinate mapping from a fisheye view to a perspective view.
+    Handles non-square output aspect ratios correctly.
+    """
+    return create_remap_maps_batch(fisheye_shape, output_shape, i_fov_deg,
+                                   [(yaw_deg, pitch_deg, roll_deg, o_fov_deg)])[0]
 
 def get_view_boundary_on_fisheye(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw_deg, pitch_deg, roll_deg):
     """
     Calculates the 4 corner points of the planar view projected onto the fisheye image.
     """
-    i_h, i_w = fisheye_shape
-    o_h, o_w = output_shape
-    
-    v_fov_rad = np.deg2rad(o_fov_deg)
-    y_range = np.tan(v_fov_rad / 2.0)
-    x_range = y_range * (o_w / o_h)
+    x_range, y_range = _plane_ranges(output_shape, o_fov_deg)
 
     # Define the 4 corners of the projection plane
     corners_3d = np.array([
@@ -73,42 +119,15 @@ def get_view_boundary_on_fisheye(fisheye_shape, output_shape, i_fov_deg, o_fov_d
         [ x_range, -y_range, 1.0],  # Bottom-right
         [-x_range, -y_range, 1.0]   # Bottom-left
     ])
-    
-    yaw_rad, pitch_rad, roll_rad = np.deg2rad(yaw_deg), np.deg2rad(pitch_deg), np.deg2rad(roll_deg)
-    cos_p, sin_p = np.cos(pitch_rad), np.sin(pitch_rad)
-    Rx = np.array([[1, 0, 0], [0, cos_p, -sin_p], [0, sin_p, cos_p]])
-    cos_y, sin_y = np.cos(yaw_rad), np.sin(yaw_rad)
-    Ry = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]])
-    cos_r, sin_r = np.cos(roll_rad), np.sin(roll_rad)
-    Rz = np.array([[cos_r, -sin_r, 0], [sin_r, cos_r, 0], [0, 0, 1]])
-    R = Rz @ Rx @ Ry
-    
-    rotated_xyz = corners_3d @ R.T
-    
-    x_rot, y_rot, z_rot = rotated_xyz[..., 0], rotated_xyz[..., 1], rotated_xyz[..., 2]
-    theta = np.arctan2(y_rot, x_rot)
-    phi = np.arctan2(np.sqrt(x_rot**2 + y_rot**2), z_rot)
-    
-    i_fov_rad = np.deg2rad(i_fov_deg)
-    r = phi * min(i_h, i_w) / i_fov_rad
-    
-    map_x = 0.5 * i_w + r * np.cos(theta)
-    # This negation is correct for mapping to standard image coordinates (y increases downwards)
-    # and accounting for the flip in the main script.
-    map_y = 0.5 * i_h - r * np.sin(theta)
-    
-    return np.stack([map_x, map_y], axis=-1)
+    return project_points(corners_3d, fisheye_shape, i_fov_deg, yaw_deg, pitch_deg, roll_deg)
 
 def create_maps_for_angles(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, o_z, o_v):
     """
     Pre-calculates all necessary remap maps for a list of angles.
     """
-    maps = []
-    for deg in o_z:
-        # Assuming o_fov=90 (vertical), i_fov=180, and yaw (o_u)=0 for all maps
-        remap_map = create_remap_map(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, 0, o_v, deg)
-        maps.append(remap_map)
-    return maps
+    # yaw (o_u)=0 for all maps; one batched pass shares the base ray grid
+    return create_remap_maps_batch(fisheye_shape, output_shape, i_fov_deg,
+                                   [(0, o_v, deg, o_fov_deg) for deg in o_z])
 
 def fisheye2Planar(fisheye_image, output_shape=(480, 480), i_fov=180, o_fov=90, o_u=0, o_v=0, o_z=0):
     """ 
@@ -0,0 +1,97 @@
+import importlib.util
+import os
+
+# Runtime settings, overridable through environment variables.
+
+# Producer engine:
+#   'thread'  - every video_producer runs as a thread inside the API process (default)
+#   'process' - every video_producer runs in its own worker process and hands encoded
+#               frames to the API process through a shared-memory ring buffer
+PRODUCER_MODE = os.environ.get("CV_PRODUCER_MODE", "thread").lower()
+
+# Shared-memory ring sizing (process mode), per source
+SHM_RING_SLOTS = int(os.environ.get("CV_SHM_RING_SLOTS", "4"))
+SHM_SLOT_CAPACITY_MB = float(os.environ.get("CV_SHM_SLOT_CAPACITY_MB", "4"))
+
+# Per-source worker pool for the per-view remap -> rotate -> resize -> encode stage.
+# 0 or 1 runs the views serially on the producer thread.
+VIEW_WORKERS = int(os.environ.get("CV_VIEW_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Decode-ahead: a decoder thread per source keeps up to DECODE_AHEAD frames queued while the
+# producer processes the previous one. Files never drop frames; live streams keep the newest.
+# 0 decodes inline on the producer thread.
+DECODE_AHEAD = int(os.environ.get("CV_DECODE_AHEAD", "4"))
+# Decode straight to a smaller size: regular sources are only ever shown at 640x360 and
+# detected at DETECTOR_IMGSZ, so they are capped at DECODE_MAX_WIDTH. Fisheye sources keep
+# their full resolution by default (dewarped views magnify the image centre); 0 = no cap.
+# DECODER: 'auto' (PyAV, which scales while converting out of YUV, when installed and
+# a cap applies), 'opencv' or 'pyav'. The cap is on by default only with PyAV installed:
+# with OpenCV it is a full-size decode plus a resize, i.e. extra work rather than a saving.
+DECODE_MAX_WIDTH = int(os.environ.get("CV_DECODE_MAX_WIDTH", "1280" if importlib.util.find_spec("av") else "0"))
+DECODE_FISHEYE_MAX_WIDTH = int(os.environ.get("CV_DECODE_FISHEYE_MAX_WIDTH", "0"))
+DECODER = os.environ.get("CV_DECODER", "auto").lower()
+
+# Live sources (rtsp://, http://, ...): decoded on their own thread keeping only the newest
+# frame, reopened with exponential backoff when they drop. A watched source that publishes
+# nothing for STALL_TIMEOUT_S is reported as stalled (/api/streams/health).
+STALL_TIMEOUT_S = float(os.environ.get("CV_STALL_TIMEOUT_S", "5"))
+
+# Producer pacing. 'realtime': files play at their frame rate on a drift-free schedule and
+# skip frames (grab only) once processing falls more than PACING_CATCHUP_FRAMES frame
+# intervals behind. 'max': no sleeping or skipping (benchmarks). Live streams are never paced.
+PACING = os.environ.get("CV_PACING", "realtime").lower()
+PACING_CATCHUP_FRAMES = float(os.environ.get("CV_PACING_CATCHUP_FRAMES", "2"))
+
+# CPU remap precision for fisheye views: 'fixed' (CV_16SC2 maps, faster) or 'float' (float32 maps)
+REMAP_PRECISION = os.environ.get("CV_REMAP_PRECISION", "fixed").lower()
+
+# Motion gating: a background subtractor per view decides whether YOLO runs. Views without
+# motion for MOTION_HOLD_FRAMES frames skip inference and re-serve their last JPEG (refreshed
+# at least every MOTION_STATIC_REFRESH_S seconds).
+MOTION_GATING = os.environ.get("CV_MOTION_GATING", "1") != "0"
+MOTION_METHOD = os.environ.get("CV_MOTION_METHOD", "mog2").lower()  # 'mog2' or 'diff'
+MOTION_HOLD_FRAMES = int(os.environ.get("CV_MOTION_HOLD_FRAMES", "30"))
+MOTION_STATIC_REFRESH_S = float(os.environ.get("CV_MOTION_STATIC_REFRESH_S", "10"))
+
+# Central inference scheduler: images from all producers are batched up to INFERENCE_MAX_BATCH,
+# waiting at most INFERENCE_MAX_LATENCY_MS for a batch to fill. Each source may have at most
+# INFERENCE_MAX_PENDING_PER_SOURCE images queued (older ones are dropped).
+INFERENCE_MAX_BATCH = int(os.environ.get("CV_INFERENCE_MAX_BATCH", "8"))
+INFERENCE_MAX_LATENCY_MS = float(os.environ.get("CV_INFERENCE_MAX_LATENCY_MS", "15"))
+INFERENCE_MAX_PENDING_PER_SOURCE = int(os.environ.get("CV_INFERENCE_MAX_PENDING", "4"))
+# How long a producer waits for its detections before sending the frame without them
+INFERENCE_TIMEOUT_S = float(os.environ.get("CV_INFERENCE_TIMEOUT_S", "2"))
+
+# Detector backend: 'auto' (PyTorch on GPU nodes; OpenVINO, else ONNX Runtime, on CPU nodes),
+# 'torch', 'onnx' or 'openvino'. Exports are created next to the weights on first use.
+DETECTOR_BACKEND = os.environ.get("CV_DETECTOR_BACKEND", "auto").lower()
+DETECTOR_WEIGHTS = os.environ.get("CV_DETECTOR_WEIGHTS", "yolo11m-pose.pt")
+DETECTOR_DEVICE = os.environ.get("CV_DETECTOR_DEVICE", "auto")  # 'auto', 'cpu', '0', ...
+DETECTOR_IMGSZ = int(os.environ.get("CV_DETECTOR_IMGSZ", "640"))
+# Use the INT8 export (scripts/export_detector.py --int8) of the ONNX/OpenVINO model
+DETECTOR_INT8 = os.environ.get("CV_DETECTOR_INT8", "0") != "0"
+# Confidence the detector itself filters at. Low on purpose: weak detections only extend
+# existing tracks (ByteTrack second stage); tracks start at DETECT_TRACK_CONF.
+DETECTOR_MIN_CONF = float(os.environ.get("CV_DETECTOR_MIN_CONF", "0.1"))
+DETECT_TRACK_CONF = float(os.environ.get("CV_DETECT_TRACK_CONF", "0.5"))
+
+# Views that get detection by default when a video is added ('original' = non-fisheye sources).
+# Each camera's detection settings can then be changed over the API.
+DETECT_DEFAULT_VIEWS = [v.strip() for v in os.environ.get("CV_DETECT_DEFAULT_VIEWS", "partition_3,original").split(",") if v.strip()]
+
+# Detection cadence of a view: run the detector every DETECT_INTERVAL frames (and on scene
+# changes), propagating tracks by optical flow in between. With DETECT_ADAPTIVE the interval
+# grows (up to DETECT_MAX_INTERVAL) while detection latency exceeds DETECT_BUDGET_SHARE of
+# the frame time. Defaults of the per-camera detection settings.
+DETECT_INTERVAL = int(os.environ.get("CV_DETECT_INTERVAL", "1"))
+DETECT_ADAPTIVE = os.environ.get("CV_DETECT_ADAPTIVE", "0") != "0"
+DETECT_MAX_INTERVAL = int(os.environ.get("CV_DETECT_MAX_INTERVAL", "15"))
+DETECT_BUDGET_SHARE = float(os.environ.get("CV_DETECT_BUDGET_SHARE", "0.5"))
+
+# Draw boxes/skeletons into the streamed JPEG. Detections are always sent as metadata to
+# clients that ask for them (?detections=true); with 0 those clients draw the overlay.
+DETECT_BURN_IN = os.environ.get("CV_DETECT_BURN_IN", "1") != "0"
+
+# Load the detector model and JPEG encoder in the background right after startup (the API
+# answers meanwhile; /api/ready reports progress). With 0 they load on first use.
+WARMUP = os.environ.get("CV_WARMUP", "1") != "0"
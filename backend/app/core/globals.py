@@ -4,12 +4,17 @@ from typing import List, Dict
 CAMERAS_DB = []  # List[CameraSource]
 
 # Config for active streams
-# Format: { camera_id: { 'source_path': str, 'view_index': int, 'is_fisheye': bool } }
+# Format: { camera_id: { 'source_path': str, 'view_index': int, 'is_fisheye': bool, 'detection': dict } }
 STREAM_CONFIGS: Dict[str, dict] = {}
 
-# Video Frame Buffers (The latest frames for broadcasting)
-# Format: { source_path: { 'original': b64_str, 'partition_X': b64_str, '__meta__': {...} } }
-FRAME_BUFFERS: Dict[str, Dict[str, str]] = {}
+# Video Frame Buffers (Mirror of the latest frame set published to FRAME_HUB)
+# Format: { source_path: { 'original': jpeg_bytes, 'partition_X': jpeg_bytes, '__meta__': {'fps', 'seq', 'ts'} } }
+FRAME_BUFFERS: Dict[str, Dict[str, bytes]] = {}
 
-# Active Producer Threads Tracker
-ACTIVE_PRODUCERS: Dict[str, bool] = {} 
+# Producer registry entries (see app/services/producer_registry.py)
+# Format: { source_path: ProducerHandle }
+ACTIVE_PRODUCERS: Dict[str, object] = {}
+
+# Connected WebSocket viewers (per-client delivery stats)
+# Format: { client_id: StreamClient }
+STREAM_CLIENTS: Dict[str, object] = {}
@@ -1,4 +1,21 @@
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from app.core.config import DETECT_ADAPTIVE, DETECT_BURN_IN, DETECT_INTERVAL, DETECT_TRACK_CONF
+
+class DetectionConfig(BaseModel):
+    # Person detection settings of one camera view; changes apply to the running producer
+    enabled: bool = False
+    model: Optional[str] = None  # Weights variant, e.g. "yolo11n-pose.pt" (None = server default)
+    imgsz: Optional[int] = Field(None, ge=32)  # Detector input size (None = server default)
+    conf: float = Field(DETECT_TRACK_CONF, ge=0.0, le=1.0)  # Confidence a new track needs
+    classes: List[int] = [0]  # Model class ids to keep (0 = person)
+    max_fps: Optional[float] = Field(None, gt=0)  # Cap on detector runs per second
+    # Detector every `interval` frames, tracking in between; adaptive grows it when inference is slow
+    interval: int = Field(DETECT_INTERVAL, ge=1)
+    adaptive: bool = DETECT_ADAPTIVE
+    # Draw detections into the video; False leaves drawing to clients (detections metadata)
+    burn_in: bool = DETECT_BURN_IN
 
 class CameraSource(BaseModel):
     id: str
@@ -12,3 +29,24 @@ class CameraSource(BaseModel):
     fps: int
     enabled: bool
     image: str
+    detection: Optional[DetectionConfig] = None
+
+class PTZUpdate(BaseModel):
+    # Degrees. Absolute by default; with relative=True the values are added to the current view.
+    # Omitted fields keep their current value.
+    pan: Optional[float] = None   # angle_z, wraps at 360
+    tilt: Optional[float] = None  # angle_up
+    zoom: Optional[float] = None  # vertical field of view (smaller = more zoom)
+    relative: bool = False
+
+class PriorityUpdate(BaseModel):
+    # Inference priority of a source; lower values are served first (default 10)
+    priority: int
+
+class LiveCameraRequest(BaseModel):
+    # Network camera (rtsp://, http(s):// MJPEG/HLS, ...); read live, reconnected when it drops
+    url: str
+    name: str = "Camera"
+    location: str = "Live Stream"
+    enable_fisheye: bool = False
+    selected_views: Optional[List[int]] = None  # Fisheye view indices to create (None = all 8)
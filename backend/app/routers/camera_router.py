@@ -1,13 +1,20 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from typing import List
+from urllib.parse import urlparse
 import uuid
 import shutil
 import os
-import asyncio
 
-from app.models.camera import CameraSource
-from app.core.globals import CAMERAS_DB, STREAM_CONFIGS, FRAME_BUFFERS
-from app.services.video_processor import start_producer_thread
+from app.models.camera import CameraSource, DetectionConfig, LiveCameraRequest, PTZUpdate, PriorityUpdate
+from app.core.config import DETECT_DEFAULT_VIEWS
+from app.core.globals import CAMERAS_DB, STREAM_CONFIGS, STREAM_CLIENTS
+from app.services.producer_registry import PRODUCERS
+from app.services.frame_hub import FRAME_HUB
+from app.services.inference_scheduler import INFERENCE
+from app.services.frame_protocol import normalize_protocol
+from app.services.source_watchdog import WATCHDOG
+from app.services.stream_client import StreamClient
 
 router = APIRouter()
 
@@ -20,10 +27,19 @@ UPLOAD_DIR = os.path.join(PROJECT_ROOT, "temp_video_uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # --- WebSocket Endpoint ---
+# Clients pick the wire format with ?protocol=binary (raw JPEG + small header)
+# or ?protocol=json (legacy base64-in-JSON, default for old clients).
+# ?adaptive=true lowers the frame rate for clients that keep falling behind.
+# ?detections=true adds the view's detections (boxes, ids, keypoints) to every frame
+# (binary: JSON block flagged in the header; json: a "detections" field).
+# Viewers of a fisheye partition can steer it by sending text messages such as
+# {"type": "ptz", "pan": 10, "tilt": 0, "zoom": -5, "relative": true}.
 @router.websocket("/ws/{camera_id}")
-async def websocket_endpoint(websocket: WebSocket, camera_id: str):
+async def websocket_endpoint(websocket: WebSocket, camera_id: str, protocol: str = "json", adaptive: bool = False,
+                             detections: bool = False):
     await websocket.accept()
-    print(f"[WS] Connection accepted for {camera_id}")
+    protocol = normalize_protocol(protocol)
+    print(f"[WS] Connection accepted for {camera_id} (protocol={protocol})")
     
     config = STREAM_CONFIGS.get(camera_id)
     if not config:
@@ -41,26 +57,39 @@ async def websocket_endpoint(websocket: WebSocket, camera_id: str):
     if view_index != -1:
         target_key = f"partition_{view_index}"
         
+    # Restart the producer if it was reclaimed while nobody was watching
+    await run_in_threadpool(PRODUCERS.ensure_running, source_path)
+
+    # Event-driven: wait for the producer to publish a newer frame set (no polling)
+    subscription = FRAME_HUB.subscribe(source_path, target_key)
+    async def handle_control(message: dict):
+        if message.get('type') != 'ptz' or view_index == -1:
+            return
+        await run_in_threadpool(
+            PRODUCERS.update_view, source_path, view_index,
+            message.get('pan'), message.get('tilt'), message.get('zoom'), bool(message.get('relative', False))
+        )
+
+    # Per-connection latest-wins slot + sender, so a slow client only drops its own frames
+    client = StreamClient(websocket, camera_id, subscription, protocol, adaptive=adaptive, detections=detections,
+                          control_handler=handle_control)
     try:
-        while True:
-            # Simply fetch latest frame from global buffer
-            if source_path in FRAME_BUFFERS:
-                frames = FRAME_BUFFERS[source_path]
-                if target_key in frames:
-                    b64_data = frames[target_key]
-                    
-                    # Extract FPS from meta
-                    fps = 0
-                    if '__meta__' in frames:
-                        fps = frames['__meta__'].get('fps', 0)
-                        
-                    await websocket.send_json({"image": b64_data, "fps": fps})
-            
-            # Consumer limit (~25FPS update to client)
-            await asyncio.sleep(0.04) 
-            
+        await client.run()
     except WebSocketDisconnect:
         pass
+    finally:
+        FRAME_HUB.unsubscribe(subscription)
+        stats = client.stats
+        print(f"[WS] Closed {camera_id}: sent={stats.frames_sent} dropped={stats.frames_dropped} rate_limited={stats.frames_rate_limited} avg_send={stats.send_ms_avg:.1f}ms")
+
+@router.get("/api/streams/clients")
+def get_stream_clients():
+    return [client.to_dict() for client in list(STREAM_CLIENTS.values())]
+
+@router.get("/api/streams/subscribers")
+def get_stream_subscribers():
+    # { source_path: { view_key: live subscriber count } }
+    return FRAME_HUB.subscriber_counts()
 
 # --- HTTP API Endpoints ---
 
@@ -73,6 +102,18 @@ def add_camera(camera: CameraSource):
     CAMERAS_DB.append(camera)
     return camera
 
+# Fields a client may edit; the stream wiring (type, ws_url, image, detection) stays server-owned
+EDITABLE_CAMERA_FIELDS = ('name', 'location', 'status', 'mode', 'resolution', 'fps', 'enabled')
+
+@router.put("/api/cameras/{camera_id}", response_model=CameraSource)
+def update_camera(camera_id: str, camera: CameraSource):
+    # In-place edit: the stream config and the producer reference are kept (delete would release them)
+    for idx, existing in enumerate(CAMERAS_DB):
+        if existing.id == camera_id:
+            CAMERAS_DB[idx] = existing.model_copy(update={f: getattr(camera, f) for f in EDITABLE_CAMERA_FIELDS})
+            return CAMERAS_DB[idx]
+    raise HTTPException(status_code=404, detail="Camera not found")
+
 @router.delete("/api/cameras/{camera_id}")
 def delete_camera(camera_id: str):
     # We maintain a global reference to the list, so we must modify it carefully
@@ -83,9 +124,164 @@ def delete_camera(camera_id: str):
     for idx in reversed(ids_to_remove):
         CAMERAS_DB.pop(idx)
         
-    # We do NOT stop the producer thread here because other cameras might share the same source
+    # Other cameras might share the same source: the registry only stops the producer
+    # (and frees its decoder/maps/buffers) once the last camera referencing it is gone
+    STREAM_CONFIGS.pop(camera_id, None)
+    PRODUCERS.release_camera(camera_id)
     return {"status": "deleted"}
 
+# --- Virtual PTZ ---
+
+def _ptz_target(camera_id: str):
+    config = STREAM_CONFIGS.get(camera_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Camera not found")
+    if config.get('view_index', -1) == -1:
+        raise HTTPException(status_code=400, detail="PTZ is only available for fisheye partition views")
+    return config['source_path'], config['view_index']
+
+@router.get("/api/cameras/{camera_id}/ptz")
+def get_ptz(camera_id: str):
+    source_path, view_index = _ptz_target(camera_id)
+    try:
+        view = PRODUCERS.get_view(source_path, view_index)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No producer for this camera")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'pan': view['angle_z'], 'tilt': view['angle_up'], 'zoom': view['zoom']}
+
+@router.put("/api/cameras/{camera_id}/ptz")
+def update_ptz(camera_id: str, update: PTZUpdate):
+    source_path, view_index = _ptz_target(camera_id)
+    try:
+        view = PRODUCERS.update_view(source_path, view_index, update.pan, update.tilt, update.zoom, update.relative)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No producer for this camera")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The running producer swaps the new map in once it is built (usually a few ms)
+    return {'pan': view['angle_z'], 'tilt': view['angle_up'], 'zoom': view['zoom']}
+
+# --- Detection settings ---
+
+def _view_key(camera_id: str):
+    config = STREAM_CONFIGS.get(camera_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Camera not found")
+    view_index = config.get('view_index', -1)
+    return config['source_path'], 'original' if view_index == -1 else f"partition_{view_index}"
+
+@router.get("/api/cameras/{camera_id}/detection", response_model=DetectionConfig)
+def get_detection(camera_id: str):
+    _view_key(camera_id)
+    return STREAM_CONFIGS[camera_id].get('detection') or DetectionConfig()
+
+@router.put("/api/cameras/{camera_id}/detection", response_model=DetectionConfig)
+def set_detection(camera_id: str, detection: DetectionConfig):
+    source_path, view = _view_key(camera_id)
+    if view == 'original' and STREAM_CONFIGS[camera_id].get('is_fisheye'):
+        raise HTTPException(status_code=400, detail="Detection runs on fisheye partition views, not the original")
+    STREAM_CONFIGS[camera_id]['detection'] = detection.model_dump()
+    for camera in CAMERAS_DB:
+        if camera.id == camera_id:
+            camera.detection = detection
+    try:
+        # The running producer switches over on its next frame (no restart); a stopped one
+        # keeps the setting for its next start
+        PRODUCERS.set_detection(source_path, view, detection.model_dump())
+    except KeyError:
+        pass  # Source not registered (any more): the camera config above is what counts
+    return detection
+
+# --- Producer Management ---
+
+@router.get("/api/producers")
+def get_producers():
+    return [handle.to_dict() for handle in PRODUCERS.list()]
+
+@router.post("/api/producers/{producer_id}/stop")
+def stop_producer(producer_id: str):
+    handle = PRODUCERS.get_by_id(producer_id)
+    if handle is None:
+        raise HTTPException(status_code=404, detail="Producer not found")
+    # Stopped producers restart on demand when a viewer connects again
+    PRODUCERS.stop(handle.source_path, wait=True)
+    return handle.to_dict()
+
+@router.put("/api/producers/{producer_id}/priority")
+def set_producer_priority(producer_id: str, update: PriorityUpdate):
+    handle = PRODUCERS.get_by_id(producer_id)
+    if handle is None:
+        raise HTTPException(status_code=404, detail="Producer not found")
+    PRODUCERS.set_priority(handle.source_path, update.priority)
+    return handle.to_dict()
+
+# --- Inference ---
+
+@router.get("/api/inference/stats")
+def get_inference_stats():
+    # Scheduler of the API process (thread mode); in process mode each worker batches for its own source
+    return INFERENCE.stats()
+
+# Schemes accepted for live camera sources (anything OpenCV's FFmpeg backend can pull)
+LIVE_SCHEMES = ("rtsp", "rtsps", "rtmp", "http", "https", "udp", "srt")
+
+def _create_cameras(source_path: str, enable_fisheye: bool, active_view_indices, camera_name_prefix: str,
+                    location: str, camera_type: str, fisheye_type: str) -> List[CameraSource]:
+    """Creates the cameras of one source (original + fisheye views) and starts its producer."""
+    new_cameras = []
+    # Detection settings per view key, handed to the producer with the cameras
+    detection = {}
+
+    # Helper to create camera objects
+    def create_cam(suffix, view_idx):
+        cam_id = str(uuid.uuid4())
+        view_key = 'original' if view_idx == -1 else f"partition_{view_idx}"
+        # The fisheye original is an overview; detection runs on its partitions
+        detect = DetectionConfig(enabled=view_key in DETECT_DEFAULT_VIEWS and not (enable_fisheye and view_idx == -1))
+        detection[view_key] = detect.model_dump()
+        STREAM_CONFIGS[cam_id] = {
+            'source_path': source_path,
+            'view_index': view_idx,
+            'is_fisheye': enable_fisheye,
+            'detection': detect.model_dump()
+        }
+        return CameraSource(
+            id=cam_id,
+            name=f"{camera_name_prefix} - {suffix}" if suffix else camera_name_prefix,
+            location=location,
+            type=fisheye_type if enable_fisheye else camera_type,
+            status="Online",
+            mode="People Counting",
+            ws_url=f"ws://localhost:8000/ws/{cam_id}",
+            resolution="640x360",
+            fps=30,
+            enabled=True,
+            image="",
+            detection=detect
+        )
+
+    if enable_fisheye:
+        new_cameras.append(create_cam("Original", -1))
+        # Define angles corresponding to the 8 views
+        angles = [0, 45, 90, 135, 180, 225, 270, 315]
+        for i, angle in enumerate(angles):
+            # Check if this view was selected
+            if active_view_indices is not None and i not in active_view_indices:
+                continue
+
+            new_cameras.append(create_cam(f"View {i+1} ({angle}°)", i))
+    else:
+         new_cameras.append(create_cam("", -1))
+
+    # Start the Producer Thread, referenced by every camera created from this source
+    PRODUCERS.start(source_path, enable_fisheye, active_view_indices, camera_ids=[c.id for c in new_cameras],
+                    detection=detection)
+
+    CAMERAS_DB.extend(new_cameras)
+    return new_cameras
+
 @router.post("/api/upload_and_process")
 async def upload_video(
     file: UploadFile = File(...),
@@ -101,53 +297,15 @@ async def upload_video(
         with open(input_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
             
-        new_cameras = []
-        
         active_view_indices = None
         if enable_fisheye and selected_views:
              try:
                 active_view_indices = [int(x.strip()) for x in selected_views.split(",") if x.strip().isdigit()]
              except:
                 pass
-        
-        # Start the Producer Thread IMMEDIATELY
-        start_producer_thread(input_path, enable_fisheye, active_view_indices)
-        
-        # Helper to create camera objects
-        def create_cam(suffix, view_idx):
-            cam_id = str(uuid.uuid4())
-            STREAM_CONFIGS[cam_id] = {
-                'source_path': input_path,
-                'view_index': view_idx
-            }
-            return CameraSource(
-                id=cam_id,
-                name=f"{camera_name_prefix} - {suffix}" if suffix else camera_name_prefix,
-                location="Uploaded Video",
-                type="Fisheye" if enable_fisheye else "File",
-                status="Online",
-                mode="People Counting",
-                ws_url=f"ws://localhost:8000/ws/{cam_id}",
-                resolution="640x360",
-                fps=30,
-                enabled=True,
-                image=""
-            )
-
-        if enable_fisheye:
-            new_cameras.append(create_cam("Original", -1))
-            # Define angles corresponding to the 8 views
-            angles = [0, 45, 90, 135, 180, 225, 270, 315]
-            for i, angle in enumerate(angles):
-                # Check if this view was selected
-                if active_view_indices is not None and i not in active_view_indices:
-                    continue
-                    
-                new_cameras.append(create_cam(f"View {i+1} ({angle}°)", i))
-        else:
-             new_cameras.append(create_cam("", -1))
-             
-        CAMERAS_DB.extend(new_cameras)
+
+        new_cameras = _create_cameras(input_path, enable_fisheye, active_view_indices, camera_name_prefix,
+                                      "Uploaded Video", "File", "Fisheye")
 
         return {
             "status": "success",
@@ -157,3 +315,29 @@ async def upload_video(
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# --- Live sources ---
+# RTSP/HTTP cameras are read by a low-latency reader (only the newest frame is kept) that
+# reconnects with backoff; /api/streams/health reports sources that stopped delivering.
+
+@router.post("/api/cameras/live")
+def add_live_camera(request: LiveCameraRequest):
+    url = request.url.strip()
+    if urlparse(url).scheme.lower() not in LIVE_SCHEMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream URL, expected one of {', '.join(LIVE_SCHEMES)}")
+    if PRODUCERS.get(url) is not None:
+        raise HTTPException(status_code=409, detail="This stream is already added")
+    active_view_indices = request.selected_views if request.enable_fisheye else None
+    # The producer connects in the background; an unreachable camera keeps retrying
+    new_cameras = _create_cameras(url, request.enable_fisheye, active_view_indices, request.name,
+                                  request.location, "Live", "Fisheye Live")
+    return {
+        "status": "success",
+        "created_cameras": new_cameras
+    }
+
+@router.get("/api/streams/health")
+def get_stream_health():
+    # Per source: 'ok', 'stalled' (no frame for CV_STALL_TIMEOUT_S while watched), 'idle' or 'stopped'
+    # 'map_cache': dewarp map memory of the API process (per source too in process mode)
+    return WATCHDOG.status()
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.config import PRODUCER_MODE
+from app.services.frame_hub import FRAME_HUB
+from app.services.producer_registry import PRODUCERS
+from app.services.resources import RESOURCES
+
+router = APIRouter()
+
+# --- Health / Readiness ---
+# /api/health answers as soon as the app is up (liveness). /api/ready returns 503 until the
+# startup warm-up has loaded (or given up on) the model and encoder; failed resources are
+# listed under 'degraded' (streams still run, without detections / with the OpenCV encoder).
+# Resources nothing asked for yet (CV_WARMUP=0) do not hold up readiness. In process mode the
+# model and encoder live in the workers: 'workers' lists what each running one reported with
+# its latest frames (not gating; the API itself is ready right away).
+
+@router.get("/api/health")
+def health():
+    return {"status": "ok"}
+
+@router.get("/api/ready")
+def ready():
+    status = RESOURCES.status()
+    status['mode'] = PRODUCER_MODE
+    if PRODUCER_MODE == "process":
+        workers = {}
+        for handle in PRODUCERS.list():
+            channel = FRAME_HUB.get_channel(handle.source_path)
+            if handle.is_alive() and channel is not None:
+                workers[handle.source_path] = channel.latest()[1].get('__meta__', {}).get('resources')
+        status['workers'] = workers
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
@@ -0,0 +1,193 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.globals import FRAME_BUFFERS
+
+
+class ChannelClosed(Exception):
+    """Raised to subscribers when the producer of their source has stopped."""
+
+
+def _set_events(events):
+    for event in events:
+        event.set()
+
+
+class FrameSubscription:
+    """
+    A single consumer (usually one WebSocket) of a source's frame sets.
+    Must be created and awaited on the asyncio loop that serves the consumer.
+    """
+
+    def __init__(self, channel: "FrameChannel", view_key: str, loop: asyncio.AbstractEventLoop):
+        self.channel = channel
+        self.view_key = view_key
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.last_seq = 0
+
+    async def next_frames(self) -> Tuple[int, dict]:
+        """Waits until a frame set newer than the last one seen is published."""
+        while True:
+            # Clear before checking so a publish between the check and the wait is not lost
+            self.event.clear()
+            if self.channel.closed:
+                raise ChannelClosed(self.channel.source_path)
+            seq, frames = self.channel.latest()
+            if seq > self.last_seq:
+                self.last_seq = seq
+                return seq, frames
+            await self.event.wait()
+
+
+class FrameChannel:
+    """Latest versioned frame set of one source plus the subscribers waiting on it."""
+
+    def __init__(self, source_path: str):
+        self.source_path = source_path
+        self.seq = 0
+        self.frames: dict = {}
+        self.closed = False
+        # time.monotonic() of the last publish / since when someone is watching (None = nobody);
+        # the source watchdog compares them to spot sources that stopped delivering
+        self.published_at: Optional[float] = None
+        self.watched_since: Optional[float] = None
+        self._lock = threading.Lock()
+        # Signalled whenever a subscriber joins, so an idle producer can resume
+        self._subscribed = threading.Condition(self._lock)
+        self._subscribers = set()
+
+    def latest(self) -> Tuple[int, dict]:
+        with self._lock:
+            return self.seq, self.frames
+
+    def publish(self, frames: dict) -> int:
+        """Called from the producer thread. Stores the frame set and wakes all subscribers."""
+        with self._lock:
+            self.seq += 1
+            frames.setdefault('__meta__', {})['seq'] = self.seq
+            self.frames = frames
+            self.published_at = time.monotonic()
+            subscribers = list(self._subscribers)
+
+        # Keep the legacy global buffer in sync for any direct readers
+        FRAME_BUFFERS[self.source_path] = frames
+
+        self._wake(subscribers)
+        return self.seq
+
+    def close(self):
+        """Marks the channel as finished and wakes subscribers so they can disconnect."""
+        with self._lock:
+            self.closed = True
+            self.frames = {}
+            subscribers = list(self._subscribers)
+        self._wake(subscribers)
+
+    @staticmethod
+    def _wake(subscribers):
+        # One thread-safe callback per event loop, not per subscriber
+        by_loop: Dict[asyncio.AbstractEventLoop, list] = {}
+        for sub in subscribers:
+            by_loop.setdefault(sub.loop, []).append(sub.event)
+        for loop, events in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_set_events, events)
+            except RuntimeError:
+                # Loop already closed (server shutting down)
+                pass
+
+    def add(self, subscription: FrameSubscription):
+        with self._lock:
+            if not self._subscribers:
+                self.watched_since = time.monotonic()
+            self._subscribers.add(subscription)
+            self._subscribed.notify_all()
+
+    def remove(self, subscription: FrameSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                self.watched_since = None
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def view_counts(self) -> Dict[str, int]:
+        """Live subscriber count per view key, e.g. {'original': 1, 'partition_3': 2}."""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for sub in self._subscribers:
+                counts[sub.view_key] = counts.get(sub.view_key, 0) + 1
+        return counts
+
+    def watched_views(self) -> set:
+        """View keys with at least one live subscriber."""
+        with self._lock:
+            return {sub.view_key for sub in self._subscribers}
+
+    def wait_for_subscribers(self, timeout: float) -> bool:
+        """Blocks the producer thread until someone subscribes (or timeout). Returns True if watched."""
+        with self._subscribed:
+            return self._subscribed.wait_for(lambda: bool(self._subscribers), timeout)
+
+
+class FrameHub:
+    """
+    Per-source publish/subscribe hub between producer threads and WebSocket consumers.
+    Producers publish whole frame sets; consumers are woken through their event loop
+    and only ever see frame sets newer than the last one they received.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, FrameChannel] = {}
+        self._lock = threading.Lock()
+
+    def channel(self, source_path: str) -> FrameChannel:
+        with self._lock:
+            channel = self._channels.get(source_path)
+            if channel is None or channel.closed:
+                channel = FrameChannel(source_path)
+                self._channels[source_path] = channel
+            return channel
+
+    def get_channel(self, source_path: str) -> Optional[FrameChannel]:
+        with self._lock:
+            return self._channels.get(source_path)
+
+    def publish(self, source_path: str, frames: dict) -> int:
+        return self.channel(source_path).publish(frames)
+
+    def close_channel(self, source_path: str, channel: FrameChannel = None):
+        """Closes and forgets a source's channel (only if it is still `channel`, when given)."""
+        with self._lock:
+            current = self._channels.get(source_path)
+            if current is None or (channel is not None and current is not channel):
+                current = channel
+            else:
+                del self._channels[source_path]
+        if current is not None:
+            current.close()
+
+    def subscribe(self, source_path: str, view_key: str) -> FrameSubscription:
+        """Must be called from within the consumer's running event loop."""
+        channel = self.channel(source_path)
+        subscription = FrameSubscription(channel, view_key, asyncio.get_running_loop())
+        channel.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription):
+        subscription.channel.remove(subscription)
+
+    def subscriber_counts(self) -> Dict[str, Dict[str, int]]:
+        """{ source_path: { view_key: count } } for every known source."""
+        with self._lock:
+            channels = list(self._channels.values())
+        return {channel.source_path: channel.view_counts() for channel in channels}
+
+
+# Process-wide hub instance
+FRAME_HUB = FrameHub()
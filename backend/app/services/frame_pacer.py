@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Optional
+
+# Pacing modes of a producer loop
+REALTIME = "realtime"  # Files: play at the source frame rate, skip frames to catch up when behind
+MAX_THROUGHPUT = "max"  # Benchmarks: no sleeping, no skipping, process frames as fast as possible
+LIVE = "live"          # Network streams / devices: the source sets the pace, never sleep
+MODES = (REALTIME, MAX_THROUGHPUT, LIVE)
+
+
+class FramePacer:
+    """
+    Schedules a producer loop on the monotonic clock against the frames' timestamps.
+
+    The first frame anchors source time to the clock; every later frame is due at
+    anchor + (pts - anchor pts), so sleeping never accumulates drift and a looping file
+    stays in real time. When processing falls more than `catchup_frames` frame intervals
+    behind, catch_up_to() returns the timestamp the reader should skip to. A stall longer
+    than `resync_s` (debugger, paused host) re-anchors instead of fast-forwarding.
+    `lag_s` is how far the frame being processed is behind its due time.
+    """
+
+    def __init__(self, mode: str = REALTIME, fps: float = 30.0, catchup_frames: float = 2.0, resync_s: float = 5.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown pacing mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        self.catchup_frames = catchup_frames
+        self.resync_s = resync_s
+        self.lag_s = 0.0
+        self.max_lag_s = 0.0
+        self.catchups = 0
+        self.resyncs = 0
+        self._anchor = None  # (monotonic time, pts) of the frame that started the schedule
+        self._last_pts = 0.0
+
+    def reset(self):
+        """Starts a new schedule with the next frame (e.g. after the loop was paused)."""
+        self._anchor = None
+        self.lag_s = 0.0
+
+    def _record(self, lag: float):
+        self.lag_s = lag
+        self.max_lag_s = max(self.max_lag_s, lag)
+
+    def wait(self, pts: float, decoded_at: Optional[float] = None, stop_event: Optional[threading.Event] = None):
+        """Blocks until the frame with timestamp `pts` is due (REALTIME) and records its lag."""
+        now = time.monotonic()
+        self._last_pts = pts
+        if self.mode == MAX_THROUGHPUT:
+            self._record(0.0)
+            return
+        if self.mode == LIVE:
+            # How long the frame sat decoded before we got to it
+            self._record(max(0.0, now - decoded_at) if decoded_at is not None else 0.0)
+            return
+
+        if self._anchor is None or pts < self._anchor[1]:
+            self._anchor = (now, pts)
+        due = self._anchor[0] + (pts - self._anchor[1])
+        lag = now - due
+        if lag > self.resync_s:
+            self._anchor = (now, pts)
+            self.resyncs += 1
+            lag = 0.0
+        if lag < 0:
+            if stop_event is not None:
+                stop_event.wait(-lag)
+            else:
+                time.sleep(-lag)
+            lag = 0.0
+        self._record(lag)
+
+    def catch_up_to(self) -> Optional[float]:
+        """Timestamp to skip to if the loop is too far behind after processing a frame, else None."""
+        if self.mode != REALTIME or self._anchor is None:
+            return None
+        source_now = self._anchor[1] + (time.monotonic() - self._anchor[0])
+        behind = source_now - (self._last_pts + self.interval)
+        if behind <= self.catchup_frames * self.interval:
+            return None
+        self.catchups += 1
+        return source_now
+
+    def to_dict(self) -> dict:
+        return {
+            'mode': self.mode,
+            'lag_ms': round(self.lag_s * 1000, 1),
+            'max_lag_ms': round(self.max_lag_s * 1000, 1),
+            'catchups': self.catchups,
+            'resyncs': self.resyncs,
+        }
@@ -0,0 +1,59 @@
+import base64
+import json
+import struct
+
+# --- WebSocket Frame Protocols ---
+# 'binary': one binary message per frame = fixed header + view key + raw JPEG bytes
+# 'json'  : legacy {"image": <base64 jpeg>, "fps": ...} text message (fallback)
+PROTOCOL_BINARY = "binary"
+PROTOCOL_JSON = "json"
+SUPPORTED_PROTOCOLS = (PROTOCOL_BINARY, PROTOCOL_JSON)
+
+PROTOCOL_VERSION = 1
+
+# Header layout (network byte order, 20 bytes):
+#   uint8   version
+#   uint8   view key length (bytes, utf-8)
+#   uint16  flags (0 = plain frame)
+#   uint32  frame sequence number (wraps)
+#   float64 producer timestamp (unix seconds)
+#   float32 producer fps
+# Followed by the view key, then the JPEG payload until the end of the message.
+# With FLAG_METADATA the key is followed by a uint32 length and that many bytes of
+# UTF-8 JSON (e.g. {"detections": {...}}) before the JPEG.
+# The decoder is frontend/src/lib/frameProtocol.js (parseBinaryFrame); keep the two in step.
+HEADER_FORMAT = "!BBHIdf"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FLAG_METADATA = 0x1
+_META_LENGTH = struct.Struct("!I")
+
+
+def normalize_protocol(protocol: str) -> str:
+    """Returns a supported protocol name, falling back to JSON for unknown values."""
+    protocol = (protocol or "").lower()
+    return protocol if protocol in SUPPORTED_PROTOCOLS else PROTOCOL_JSON
+
+
+def pack_binary_frame(jpeg_bytes: bytes, view_key: str, seq: int, fps: float, timestamp: float,
+                      metadata: dict = None) -> bytes:
+    """Packs a JPEG frame (and optional JSON metadata) into a single binary WebSocket message."""
+    key = view_key.encode("utf-8")
+    flags = FLAG_METADATA if metadata else 0
+    header = struct.pack(HEADER_FORMAT, PROTOCOL_VERSION, len(key), flags, seq & 0xFFFFFFFF, timestamp, fps)
+    if not metadata:
+        return b"".join((header, key, jpeg_bytes))
+    meta = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    return b"".join((header, key, _META_LENGTH.pack(len(meta)), meta, jpeg_bytes))
+
+
+def build_json_frame(jpeg_bytes: bytes, seq: int, fps: float, timestamp: float, metadata: dict = None) -> dict:
+    """Legacy JSON message. Base64 encoding happens here, per JSON client, not in the producer."""
+    frame = {
+        "image": base64.b64encode(jpeg_bytes).decode("ascii"),
+        "fps": fps,
+        "seq": seq,
+        "ts": timestamp,
+    }
+    if metadata:
+        frame.update(metadata)
+    return frame
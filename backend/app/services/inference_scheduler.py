@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from detector_backends import load_predict
+from app.core.config import (DETECTOR_BACKEND, DETECTOR_DEVICE, DETECTOR_IMGSZ, DETECTOR_INT8, DETECTOR_MIN_CONF,
+                             DETECTOR_WEIGHTS, INFERENCE_MAX_BATCH, INFERENCE_MAX_LATENCY_MS,
+                             INFERENCE_MAX_PENDING_PER_SOURCE)
+from app.services.resources import RESOURCES
+
+# Lower value = served first. Sources without an explicit priority get this.
+DEFAULT_PRIORITY = 10
+
+
+class _Request:
+    __slots__ = ("image", "source", "priority", "model_key", "order", "future", "enqueued_at", "dropped")
+
+    def __init__(self, image, source: str, priority: int, model_key: tuple, order: int):
+        self.image = image
+        self.source = source
+        self.priority = priority
+        self.model_key = model_key  # (weights, imgsz); (None, None) = default model
+        self.order = order
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.dropped = False
+
+
+class _SourceStats:
+    def __init__(self):
+        self.priority = DEFAULT_PRIORITY
+        self.pending: deque = deque()
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.wait_ms_avg = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'priority': self.priority,
+            'queue_depth': len(self.pending),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'wait_ms_avg': round(self.wait_ms_avg, 2),
+        }
+
+
+class InferenceScheduler:
+    """
+    Single owner of the detection model. Producers submit images and get a Future back;
+    one worker thread drains a priority queue in dynamically sized batches: a batch closes
+    when it reaches `max_batch` images or when its oldest image has waited `max_latency_ms`.
+    Only this thread ever calls the model, so producers no longer race on it.
+
+    Each source keeps at most `max_pending_per_source` queued images; older ones are dropped
+    (their future resolves to None) so a slow model sheds load instead of building latency.
+
+    Cameras may ask for another model variant / input size: `loader(weights, imgsz)` returns
+    (predict, info) for it, loaded on first use. A batch only holds images for one model.
+    The default model can be deferred too: `default_loader()` returns (predict, info) or None,
+    and is called by the worker when the first image arrives.
+    """
+
+    def __init__(self, predict: Optional[Callable[[list], list]] = None, max_batch: int = INFERENCE_MAX_BATCH,
+                 max_latency_ms: float = INFERENCE_MAX_LATENCY_MS,
+                 max_pending_per_source: int = INFERENCE_MAX_PENDING_PER_SOURCE, info: Optional[dict] = None,
+                 loader: Optional[Callable[[str, int], tuple]] = None,
+                 default_loader: Optional[Callable[[], Optional[tuple]]] = None):
+        self.predict = predict  # list of images -> list of results (same order)
+        self.info = info or {}  # Backend/device/model of `predict`, for stats
+        self.loader = loader
+        self.default_loader = default_loader
+        self._default_resolved = predict is not None or default_loader is None
+        # (weights, imgsz) -> predict for model variants (None if loading failed); worker thread only
+        self._variants: Dict[tuple, Optional[Callable[[list], list]]] = {}
+        self._variant_info: Dict[str, dict] = {}
+        self.max_batch = max(1, max_batch)
+        self.max_latency_s = max_latency_ms / 1000.0
+        self.max_pending_per_source = max(1, max_pending_per_source)
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+        self._sources: Dict[str, _SourceStats] = {}
+        self._worker: Optional[threading.Thread] = None
+
+        # Global metrics
+        self.batches = 0
+        self.images = 0
+        self.batch_size_avg = 0.0
+        self.infer_ms_avg = 0.0
+        self.max_queue_depth = 0
+
+    # --- Producer side ---
+    def submit(self, image, source: str, model: Optional[str] = None, imgsz: Optional[int] = None) -> Future:
+        """
+        Queues one image for inference, on the default model unless `model` (weights) or `imgsz`
+        is given. The future resolves to the model's result, or None if dropped/failed.
+        """
+        with self._cond:
+            stats = self._sources.setdefault(source, _SourceStats())
+            request = _Request(image, source, stats.priority, (model, imgsz), next(self._order))
+            unavailable = (self._default_resolved and self.predict is None
+                           if request.model_key == (None, None) or self.loader is None
+                           else request.model_key in self._variants and self._variants[request.model_key] is None)
+            if unavailable:
+                request.future.set_result(None)
+                return request.future
+
+            # Shed this source's oldest pending image rather than letting its queue grow
+            while len(stats.pending) >= self.max_pending_per_source:
+                old = stats.pending.popleft()
+                old.dropped = True
+                stats.dropped += 1
+                old.future.set_result(None)
+
+            stats.pending.append(request)
+            stats.submitted += 1
+            heapq.heappush(self._heap, (request.priority, request.order, request))
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+            self._ensure_worker()
+            self._cond.notify()
+        return request.future
+
+    def set_priority(self, source: str, priority: int):
+        """Applies to images submitted from now on."""
+        with self._cond:
+            self._sources.setdefault(source, _SourceStats()).priority = int(priority)
+
+    def model_ready(self, model: Optional[str] = None, imgsz: Optional[int] = None) -> bool:
+        """True once the model for these settings is loaded (or known to have failed); False while it loads."""
+        with self._cond:
+            if (model, imgsz) == (None, None) or self.loader is None:
+                return self._default_resolved
+            return (model, imgsz) in self._variants
+
+    def queue_depth(self) -> int:
+        return sum(len(s.pending) for s in self._sources.values())
+
+    # --- Worker side ---
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            self._worker.start()
+
+    def _pop(self) -> Optional[_Request]:
+        """Caller holds the lock. Next live request in priority order, or None."""
+        while self._heap:
+            _, _, request = heapq.heappop(self._heap)
+            if not request.dropped:
+                self._sources[request.source].pending.remove(request)
+                return request
+        return None
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            first = self._pop()
+            while first is None:
+                self._cond.wait()
+                first = self._pop()
+            batch = [first]
+            other_models = []
+            deadline = first.enqueued_at + self.max_latency_s
+            while len(batch) < self.max_batch:
+                request = self._pop()
+                if request is not None:
+                    (batch if request.model_key == first.model_key else other_models).append(request)
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            # Images for other models wait for the next batch, keeping their place in line
+            for request in other_models:
+                heapq.heappush(self._heap, (request.priority, request.order, request))
+                pending = self._sources[request.source].pending
+                pending.append(request)
+                self._sources[request.source].pending = deque(sorted(pending, key=lambda r: r.order))
+            return batch
+
+    def _predict_for(self, model_key: tuple) -> Optional[Callable[[list], list]]:
+        if model_key == (None, None) or self.loader is None:
+            if not self._default_resolved:
+                loaded = self.default_loader()
+                with self._cond:
+                    if loaded is not None:
+                        self.predict, self.info = loaded
+                    self._default_resolved = True
+            return self.predict
+        if model_key not in self._variants:
+            weights, imgsz = model_key
+            try:
+                predict, info = self.loader(weights, imgsz)
+            except Exception as e:
+                print(f"[Inference] Failed to load {weights} @ {imgsz}: {e}")
+                predict, info = None, {'error': str(e)}
+            self._variants[model_key] = predict
+            with self._cond:
+                self._variant_info[f"{weights or 'default'}@{imgsz or 'default'}"] = info
+        return self._variants[model_key]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            predict = self._predict_for(batch[0].model_key)
+            start = time.perf_counter()
+            try:
+                if predict is None:
+                    raise RuntimeError("model not available")
+                results = list(predict([request.image for request in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"model returned {len(results)} results")
+            except Exception as e:
+                print(f"[Inference] Batch of {len(batch)} failed: {e}")
+                results = [None] * len(batch)
+            infer_ms = (time.perf_counter() - start) * 1000
+
+            with self._cond:
+                self.batches += 1
+                self.images += len(batch)
+                self.batch_size_avg = len(batch) if self.batches == 1 else 0.95 * self.batch_size_avg + 0.05 * len(batch)
+                self.infer_ms_avg = infer_ms if self.batches == 1 else 0.95 * self.infer_ms_avg + 0.05 * infer_ms
+                for request in batch:
+                    stats = self._sources[request.source]
+                    stats.completed += 1
+                    wait_ms = (start - request.enqueued_at) * 1000
+                    stats.wait_ms_avg = wait_ms if stats.completed == 1 else 0.9 * stats.wait_ms_avg + 0.1 * wait_ms
+
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+            # Images are no longer needed once the batch ran
+            for request in batch:
+                request.image = None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'model_loaded': self.predict is not None,
+                'model_state': 'loaded' if self.predict is not None else ('failed' if self._default_resolved else 'pending'),
+                'detector': self.info,
+                'variants': dict(self._variant_info),
+                'max_batch': self.max_batch,
+                'max_latency_ms': round(self.max_latency_s * 1000, 1),
+                'queue_depth': self.queue_depth(),
+                'max_queue_depth': self.max_queue_depth,
+                'batches': self.batches,
+                'images': self.images,
+                'batch_size_avg': round(self.batch_size_avg, 2),
+                'infer_ms_avg': round(self.infer_ms_avg, 2),
+                'sources': {source: stats.to_dict() for source, stats in self._sources.items()},
+            }
+
+
+def _load_variant(weights: Optional[str], imgsz: Optional[int]) -> tuple:
+    """(predict, info) for a per-camera model variant, on the configured backend/device."""
+    return load_predict(DETECTOR_BACKEND, weights or DETECTOR_WEIGHTS, DETECTOR_DEVICE, imgsz or DETECTOR_IMGSZ,
+                        DETECTOR_INT8, conf=DETECTOR_MIN_CONF)
+
+
+def _load_detector() -> tuple:
+    """Loads the default pose model and runs one dummy image through it (first calls build kernels)."""
+    print("[System] Loading YOLOv11-Pose Model...")
+    predict, info = _load_variant(None, None)
+    predict([np.zeros((DETECTOR_IMGSZ, DETECTOR_IMGSZ, 3), dtype=np.uint8)])
+    return predict, info
+
+
+# The model is loaded on first use or by the startup warm-up, never at import time
+RESOURCES.register('detector', _load_detector)
+
+# Process-wide scheduler (worker processes in process mode each get their own)
+INFERENCE = InferenceScheduler(loader=_load_variant, default_loader=lambda: RESOURCES.get('detector'))
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class MotionGate:
+    """
+    Per-view activity state of one producer. A view is active while motion was seen within the
+    last `hold_frames` frames; inactive (static) views skip inference and encoding and re-serve
+    their last JPEG, which is still re-encoded every `refresh_s` seconds so it never goes stale.
+    """
+
+    def __init__(self, hold_frames: int, refresh_s: float):
+        self.hold_frames = hold_frames
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._last_motion: Dict[str, int] = {}
+        self._motion_now = set()
+        self._cache: Dict[str, tuple] = {}  # key -> (jpeg_bytes, encoded_at)
+        self.skipped = 0  # Frames served from cache (inference/encode avoided)
+
+    def update(self, key: str, frame_no: int, motion_flag: Optional[bool]) -> bool:
+        """Records this frame's motion flag (None = no detector, always active). Returns True if active."""
+        with self._lock:
+            if motion_flag is None or motion_flag:
+                self._last_motion[key] = frame_no
+                if motion_flag:
+                    self._motion_now.add(key)
+                return True
+            self._motion_now.discard(key)
+            last = self._last_motion.get(key)
+            return last is not None and frame_no - last < self.hold_frames
+
+    def cached(self, key: str) -> Optional[bytes]:
+        """Last JPEG of a static view, or None if there is none or it is due for a refresh."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or time.time() - entry[1] > self.refresh_s:
+                return None
+            self.skipped += 1
+            return entry[0]
+
+    def store(self, key: str, jpeg_bytes: bytes):
+        with self._lock:
+            self._cache[key] = (jpeg_bytes, time.time())
+
+    def invalidate(self, key: str):
+        """Drops the cached frame and motion history of a view (e.g. after PTZ)."""
+        with self._lock:
+            self._cache.pop(key, None)
+            self._last_motion.pop(key, None)
+            self._motion_now.discard(key)
+
+    def motion_views(self) -> list:
+        with self._lock:
+            return sorted(self._motion_now)
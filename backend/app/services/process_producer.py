@@ -0,0 +1,99 @@
+import multiprocessing as mp
+import threading
+from functools import partial
+
+from app.core.config import SHM_RING_SLOTS, SHM_SLOT_CAPACITY_MB
+from app.core.globals import FRAME_BUFFERS
+from app.services.frame_hub import FRAME_HUB
+from app.services.shm_ring import SharedFrameRing, RingPublisher
+
+# 'spawn' keeps workers independent of the API process state (threads, CUDA contexts)
+_MP = mp.get_context("spawn")
+
+# How often the bridge syncs subscriber counts / checks the worker when no frames arrive
+BRIDGE_POLL_S = 0.1
+
+# Grace period for a worker to exit after its stop event is set
+STOP_GRACE_S = 5.0
+
+
+def run_producer_process(source_path, is_fisheye, active_views, ring_name, stop_event, frame_ready,
+                         view_overrides=None, commands=None, detection=None):
+    """Worker process entry point: the normal producer loop, publishing into the shared ring."""
+    # Imported in the worker only; the model / encoder load in the background while the source opens
+    from app.services.resources import RESOURCES
+    from app.services.video_processor import video_producer
+
+    RESOURCES.warm_up()
+
+    ring = SharedFrameRing(ring_name)
+    video_producer(source_path, is_fisheye, active_views, stop_event, channel=RingPublisher(ring, frame_ready),
+                   view_overrides=view_overrides, commands=commands, detection=detection)
+
+
+class ProcessProducer:
+    """
+    API-process side of one producer worker. Owns the shared-memory ring and the worker
+    process, and runs a bridge thread that republishes ring frame sets into FRAME_HUB
+    (JPEG bytes stay in shared memory) and writes live subscriber counts back to the worker.
+    A crashing worker only ends its own stream.
+    """
+
+    def __init__(self, source_path: str, is_fisheye: bool, active_views: list = None, view_overrides: dict = None,
+                 detection: dict = None):
+        self.source_path = source_path
+        self.stop_event = _MP.Event()
+        self.frame_ready = _MP.Event()
+        # Control messages (PTZ, priority, detection settings) for the worker's producer loop
+        self.commands = _MP.Queue()
+        self.ring = SharedFrameRing(create=True, n_slots=SHM_RING_SLOTS,
+                                    slot_capacity=int(SHM_SLOT_CAPACITY_MB * 1024 * 1024))
+        self.process = _MP.Process(
+            target=run_producer_process,
+            args=(source_path, is_fisheye, active_views, self.ring.name, self.stop_event, self.frame_ready,
+                  view_overrides, self.commands, detection),
+            daemon=True,
+        )
+        self.bridge = threading.Thread(target=self._bridge_loop, daemon=True)
+
+    def start(self):
+        self.process.start()
+        self.bridge.start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def _bridge_loop(self):
+        channel = FRAME_HUB.channel(self.source_path)
+        last_seq = 0
+        try:
+            while True:
+                self.ring.set_watch_counts(channel.view_counts())
+
+                if self.frame_ready.wait(BRIDGE_POLL_S):
+                    self.frame_ready.clear()
+
+                seq = self.ring.latest_seq()
+                if seq > last_seq:
+                    frames = self.ring.read(seq)
+                    if frames is not None:
+                        # Lets senders detect a slot the worker overwrote while they used it
+                        frames['__meta__']['is_valid'] = partial(self.ring.is_valid, seq)
+                        channel.publish(frames)
+                    last_seq = seq
+
+                if self.stop_event.is_set():
+                    self.process.join(STOP_GRACE_S)
+                    break
+                if not self.process.is_alive():
+                    print(f"[Producer] Worker for {self.source_path} exited unexpectedly (code {self.process.exitcode})")
+                    break
+        finally:
+            if self.process.is_alive():
+                print(f"[Producer] Terminating unresponsive worker for {self.source_path}")
+                self.process.terminate()
+                self.process.join(STOP_GRACE_S)
+            FRAME_BUFFERS.pop(self.source_path, None)
+            FRAME_HUB.close_channel(self.source_path, channel)
+            self.ring.close()
@@ -0,0 +1,287 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import PRODUCER_MODE
+from app.core.globals import ACTIVE_PRODUCERS
+from app.services.frame_hub import FRAME_HUB
+from app.services.inference_scheduler import DEFAULT_PRIORITY
+from app.services.process_producer import ProcessProducer
+from app.services.video_processor import DEFAULT_VIEW_CONFIGS, apply_ptz, video_producer
+
+# Running producers with no subscribers for this long are stopped (decoder, maps and
+# buffers released). They are restarted on demand when a viewer connects again.
+IDLE_TIMEOUT_S = 300.0
+
+# How often the reaper checks subscriber counts
+REAPER_INTERVAL_S = 5.0
+
+# How long a restart waits for the previous thread of the same source to exit
+STOP_JOIN_TIMEOUT_S = 5.0
+
+
+class ProducerHandle:
+    """
+    Registry entry for one source. Outlives individual producer threads, so a source
+    that was stopped (idle, or via the API) can be restarted with the same settings.
+    """
+
+    def __init__(self, source_path: str, is_fisheye: bool, active_views: Optional[list]):
+        self.id = str(uuid.uuid4())[:8]
+        self.source_path = source_path
+        self.is_fisheye = is_fisheye
+        self.active_views = active_views
+        self.camera_ids = set()
+        # PTZ changes per view index; survive producer restarts
+        self.view_overrides: Dict[int, dict] = {}
+        # Inference priority of this source's images (lower = first); survives restarts
+        self.priority = DEFAULT_PRIORITY
+        # Detection settings per view key ('original' / 'partition_N' -> DetectionConfig dict);
+        # survive restarts
+        self.detection: Dict[str, dict] = {}
+        # Control queue of the running producer (queue.Queue or multiprocessing.Queue)
+        self.commands = None
+        # Thread mode: the producer thread. Process mode: the bridge thread of `worker`.
+        self.thread: Optional[threading.Thread] = None
+        self.worker: Optional[ProcessProducer] = None
+        self.stop_event = threading.Event()
+        self.started_at = 0.0
+        self.last_watched = 0.0
+        self.restarts = 0
+
+    @property
+    def state(self) -> str:
+        if self.thread is None:
+            return "stopped"
+        if self.thread.is_alive():
+            return "stopping" if self.stop_event.is_set() else "running"
+        # Thread ended without being asked to (e.g. source could not be opened)
+        return "stopped" if self.stop_event.is_set() else "exited"
+
+    def is_alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def to_dict(self) -> dict:
+        subscribers = {}
+        meta = {}
+        channel = FRAME_HUB.get_channel(self.source_path)
+        if channel is not None:
+            subscribers = channel.view_counts()
+            meta = channel.latest()[1].get('__meta__', {})
+        return {
+            'id': self.id,
+            'source_path': self.source_path,
+            'is_fisheye': self.is_fisheye,
+            'active_views': self.active_views,
+            'state': self.state,
+            'mode': 'process' if self.worker is not None else 'thread',
+            'pid': self.worker.pid if self.worker is not None else None,
+            'camera_ids': sorted(self.camera_ids),
+            'view_overrides': self.view_overrides,
+            'priority': self.priority,
+            'detection': self.detection,
+            'subscribers': subscribers,
+            # Timing of the latest published frame: rate, distance behind real time, frames skipped
+            'fps': meta.get('fps'),
+            'lag_ms': meta.get('lag_ms'),
+            'dropped': meta.get('dropped'),
+            'started_at': self.started_at,
+            'idle_s': round(time.time() - self.last_watched, 1) if self.is_alive() else None,
+            'restarts': self.restarts,
+        }
+
+
+class ProducerRegistry:
+    """
+    Owns producer threads: start/stop with stop events, reference counting by camera,
+    on-demand restart and reclaiming of sources nobody watches.
+    Entries are stored in ACTIVE_PRODUCERS keyed by source path.
+    """
+
+    def __init__(self, idle_timeout_s: float = IDLE_TIMEOUT_S):
+        self.idle_timeout_s = idle_timeout_s
+        self._lock = threading.RLock()
+        self._reaper: Optional[threading.Thread] = None
+
+    # --- Lookup ---
+    def get(self, source_path: str) -> Optional[ProducerHandle]:
+        return ACTIVE_PRODUCERS.get(source_path)
+
+    def get_by_id(self, producer_id: str) -> Optional[ProducerHandle]:
+        for handle in list(ACTIVE_PRODUCERS.values()):
+            if handle.id == producer_id:
+                return handle
+        return None
+
+    def list(self) -> List[ProducerHandle]:
+        return list(ACTIVE_PRODUCERS.values())
+
+    # --- Lifecycle ---
+    def start(self, source_path: str, is_fisheye: bool, active_views: list = None,
+              camera_ids: Iterable[str] = (), detection: Optional[Dict[str, dict]] = None) -> ProducerHandle:
+        """
+        Registers a source (or adds camera references to it) and makes sure its producer runs.
+        `detection` maps view keys to their cameras' detection settings.
+        """
+        with self._lock:
+            handle = ACTIVE_PRODUCERS.get(source_path)
+            if handle is None:
+                handle = ProducerHandle(source_path, is_fisheye, active_views)
+                ACTIVE_PRODUCERS[source_path] = handle
+            handle.camera_ids.update(camera_ids)
+            handle.detection.update(detection or {})
+            self._start_thread(handle)
+        self._ensure_reaper()
+        return handle
+
+    def ensure_running(self, source_path: str) -> Optional[ProducerHandle]:
+        """Restarts a stopped/reclaimed producer for a registered source. Blocks while an old thread exits."""
+        with self._lock:
+            handle = ACTIVE_PRODUCERS.get(source_path)
+            if handle is None:
+                return None
+            self._start_thread(handle)
+            return handle
+
+    def _start_thread(self, handle: ProducerHandle):
+        if handle.is_alive():
+            if not handle.stop_event.is_set():
+                return  # Already running
+            # Previous thread is still shutting down; wait so it cannot tear down the new channel
+            handle.thread.join(STOP_JOIN_TIMEOUT_S)
+            if handle.thread.is_alive():
+                print(f"[Registry] Producer {handle.id} did not stop in time, starting anyway")
+
+        if handle.thread is not None:
+            handle.restarts += 1
+        handle.started_at = time.time()
+        handle.last_watched = handle.started_at
+
+        if PRODUCER_MODE == "process":
+            worker = ProcessProducer(handle.source_path, handle.is_fisheye, handle.active_views,
+                                     dict(handle.view_overrides), dict(handle.detection))
+            handle.worker = worker
+            handle.commands = worker.commands
+            handle.stop_event = worker.stop_event
+            handle.thread = worker.bridge
+            self._queue_settings(handle)
+            worker.start()
+            return
+
+        handle.worker = None
+        handle.stop_event = threading.Event()
+        handle.commands = queue.Queue()
+        self._queue_settings(handle)
+        handle.thread = threading.Thread(
+            target=video_producer,
+            args=(handle.source_path, handle.is_fisheye, handle.active_views, handle.stop_event),
+            kwargs={'view_overrides': dict(handle.view_overrides), 'commands': handle.commands,
+                    'detection': dict(handle.detection)},
+            name=f"producer-{handle.id}",
+            daemon=True,
+        )
+        handle.thread.start()
+
+    def stop(self, source_path: str, wait: bool = False) -> bool:
+        """Signals the producer to stop. The source stays registered and can restart on demand."""
+        handle = ACTIVE_PRODUCERS.get(source_path)
+        if handle is None or not handle.is_alive():
+            return False
+        print(f"[Registry] Stopping producer {handle.id} for {source_path}")
+        handle.stop_event.set()
+        if wait:
+            handle.thread.join(STOP_JOIN_TIMEOUT_S)
+        return True
+
+    # --- Virtual PTZ ---
+    def get_view(self, source_path: str, index: int) -> dict:
+        """Current pan/tilt/zoom config of one partition. Raises KeyError/ValueError if invalid."""
+        handle = ACTIVE_PRODUCERS.get(source_path)
+        if handle is None:
+            raise KeyError(source_path)
+        if not handle.is_fisheye:
+            raise ValueError("Source is not a fisheye stream")
+        if not 0 <= index < len(DEFAULT_VIEW_CONFIGS) or (handle.active_views is not None and index not in handle.active_views):
+            raise ValueError(f"View {index} is not active for this source")
+        return dict(handle.view_overrides.get(index, DEFAULT_VIEW_CONFIGS[index]))
+
+    def update_view(self, source_path: str, index: int, pan=None, tilt=None, zoom=None,
+                    relative: bool = False) -> dict:
+        """
+        Re-aims one partition. The change is remembered for restarts and, if the producer is
+        running, sent to it; the new map is built off its hot loop and swapped in atomically.
+        """
+        with self._lock:
+            handle = ACTIVE_PRODUCERS[source_path]
+            config = apply_ptz(self.get_view(source_path, index), pan, tilt, zoom, relative)
+            handle.view_overrides[index] = config
+            if handle.is_alive() and handle.commands is not None:
+                handle.commands.put({'type': 'set_view', 'index': index, 'config': config})
+        return config
+
+    @staticmethod
+    def _queue_settings(handle: ProducerHandle):
+        """Replays runtime settings into a freshly started producer's control queue."""
+        handle.commands.put({'type': 'set_priority', 'priority': handle.priority})
+
+    def set_priority(self, source_path: str, priority: int):
+        """Inference priority for this source's images (lower = served first)."""
+        with self._lock:
+            handle = ACTIVE_PRODUCERS[source_path]
+            handle.priority = int(priority)
+            if handle.is_alive() and handle.commands is not None:
+                handle.commands.put({'type': 'set_priority', 'priority': handle.priority})
+
+    def set_detection(self, source_path: str, view: str, config: dict):
+        """Detection settings of one view ('original' or 'partition_N'); applied without a restart."""
+        with self._lock:
+            handle = ACTIVE_PRODUCERS[source_path]
+            handle.detection[view] = dict(config)
+            if handle.is_alive() and handle.commands is not None:
+                handle.commands.put({'type': 'set_detection', 'view': view, 'config': dict(config)})
+
+    def release_camera(self, camera_id: str):
+        """Drops a camera reference; the last reference stops the producer and forgets the source."""
+        with self._lock:
+            for source_path, handle in list(ACTIVE_PRODUCERS.items()):
+                if camera_id not in handle.camera_ids:
+                    continue
+                handle.camera_ids.discard(camera_id)
+                if not handle.camera_ids:
+                    self.stop(source_path)
+                    del ACTIVE_PRODUCERS[source_path]
+                    print(f"[Registry] Released source {source_path} (no cameras left)")
+
+    # --- Idle reclaim ---
+    def reap_idle(self):
+        now = time.time()
+        for handle in self.list():
+            if not handle.is_alive() or handle.stop_event.is_set():
+                continue
+            channel = FRAME_HUB.get_channel(handle.source_path)
+            if channel is not None and channel.subscriber_count() > 0:
+                handle.last_watched = now
+            elif now - handle.last_watched > self.idle_timeout_s:
+                print(f"[Registry] Producer {handle.id} unwatched for {now - handle.last_watched:.0f}s, reclaiming")
+                self.stop(handle.source_path)
+
+    def _ensure_reaper(self):
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reaper_loop, name="producer-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reaper_loop(self):
+        while True:
+            time.sleep(REAPER_INTERVAL_S)
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"[Registry] Reaper error: {e}")
+
+
+# Process-wide registry instance
+PRODUCERS = ProducerRegistry()
@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# States of a lazily created resource
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class _Resource:
+    def __init__(self, name: str, factory: Callable[[], object]):
+        self.name = name
+        self.factory = factory
+        self.state = PENDING
+        self.value = None
+        self.error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        # Asked for (get() or warm-up); resources nobody needs do not hold up readiness
+        self.requested = False
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        return {
+            'state': self.state,
+            'load_ms': round(self.load_ms, 1) if self.load_ms is not None else None,
+            'error': self.error,
+        }
+
+
+class ResourceRegistry:
+    """
+    Heavy process-wide objects (detector model, JPEG encoder) created on first use instead of
+    at import time, so the API answers immediately. Each factory runs once; a failure is
+    remembered and get() returns None from then on. warm_up() loads everything in the
+    background after startup so the first viewer does not pay for it.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, _Resource] = {}
+        self._warmup: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Callable[[], object]):
+        self._resources[name] = _Resource(name, factory)
+
+    def get(self, name: str):
+        """The resource, created on first call (blocks while another thread creates it). None if it failed."""
+        resource = self._resources[name]
+        resource.requested = True
+        if resource.state in (READY, FAILED):
+            return resource.value
+        with resource.lock:
+            if resource.state in (PENDING, LOADING):
+                resource.state = LOADING
+                start = time.perf_counter()
+                try:
+                    resource.value = resource.factory()
+                    resource.state = READY
+                except Exception as e:
+                    resource.error = str(e)
+                    resource.state = FAILED
+                    print(f"[System] Warning: Failed to load {name}: {e}")
+                resource.load_ms = (time.perf_counter() - start) * 1000
+                if resource.state == READY:
+                    print(f"[System] {name} ready in {resource.load_ms:.0f}ms")
+        return resource.value
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """Creates the resources (all by default) on a background thread; returns it."""
+        if self._warmup is None or not self._warmup.is_alive():
+            names = list(names) if names is not None else list(self._resources)
+            for name in names:
+                self._resources[name].requested = True
+            self._warmup = threading.Thread(target=lambda: [self.get(n) for n in names], name="warm-up", daemon=True)
+            self._warmup.start()
+        return self._warmup
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once every requested resource has been created or has failed (failures are reported,
+        not waited on). Resources never asked for (e.g. the detector in the API process of process
+        mode, or anything with CV_WARMUP=0 before first use) do not count.
+        """
+        return all(r.state in (READY, FAILED) for r in self._resources.values() if r.requested)
+
+    def states(self) -> Dict[str, str]:
+        return {name: r.state for name, r in self._resources.items()}
+
+    def status(self) -> dict:
+        return {
+            'ready': self.ready,
+            'degraded': sorted(name for name, r in self._resources.items() if r.state == FAILED),
+            'resources': {name: r.to_dict() for name, r in self._resources.items()},
+        }
+
+
+# Process-wide registry (worker processes in process mode have their own)
+RESOURCES = ResourceRegistry()
@@ -0,0 +1,195 @@
+import json
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+# --- Shared-memory frame ring ---
+# One ring per source, written by the producer worker process and read by the API process.
+#
+# Layout:
+#   control block (CONTROL_SIZE bytes)
+#     4s   magic
+#     I    number of slots
+#     I    payload capacity per slot
+#     Q    sequence number of the newest complete slot (0 = none yet)
+#     i*N  live subscriber count per view key (written by the API process)
+#   slot[n_slots], each SLOT_HEADER_SIZE + TABLE_SIZE + capacity bytes
+#     Q    seq_begin  (set first when a slot is (re)written)
+#     Q    seq_end    (set last; a slot is valid while seq_begin == seq_end == expected seq)
+#     H    number of entries
+#     table: MAX_ENTRIES x (B key index, I offset, I length), offsets relative to the payload
+#     payload: JPEG bytes per view + JSON-encoded '__meta__'
+MAGIC = b"CVFR"
+
+MAX_PARTITIONS = 16
+VIEW_KEYS = ['original'] + [f"partition_{i}" for i in range(MAX_PARTITIONS)]
+VIEW_INDEX = {key: i for i, key in enumerate(VIEW_KEYS)}
+META_INDEX = 255
+
+_CONTROL_FORMAT = "<4sIIQ"
+_WATCH_OFFSET = 32
+_LATEST_OFFSET = struct.calcsize("<4sII")
+CONTROL_SIZE = _WATCH_OFFSET + 4 * len(VIEW_KEYS)
+CONTROL_SIZE += (-CONTROL_SIZE) % 64
+
+_SLOT_HEADER_FORMAT = "<QQH"
+SLOT_HEADER_SIZE = 24
+_ENTRY_FORMAT = "<BII"
+_ENTRY_SIZE = struct.calcsize(_ENTRY_FORMAT)
+MAX_ENTRIES = len(VIEW_KEYS) + 1
+TABLE_SIZE = MAX_ENTRIES * _ENTRY_SIZE
+TABLE_SIZE += (-TABLE_SIZE) % 64
+
+DEFAULT_SLOTS = 4
+DEFAULT_SLOT_CAPACITY = 4 * 1024 * 1024
+
+
+class SharedFrameRing:
+    """
+    Single-writer / single-reader ring of encoded frame sets in multiprocessing shared memory.
+    The API process creates (and later unlinks) the ring; the producer process attaches by name.
+    Readers get memoryview slices straight into shared memory (no copy); a slice stays valid
+    until the writer laps the ring, which `is_valid` detects.
+    """
+
+    def __init__(self, name: str = None, create: bool = False,
+                 n_slots: int = DEFAULT_SLOTS, slot_capacity: int = DEFAULT_SLOT_CAPACITY):
+        if create:
+            size = CONTROL_SIZE + n_slots * (SLOT_HEADER_SIZE + TABLE_SIZE + slot_capacity)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            struct.pack_into(_CONTROL_FORMAT, self.shm.buf, 0, MAGIC, n_slots, slot_capacity, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            magic, n_slots, slot_capacity, _ = struct.unpack_from(_CONTROL_FORMAT, self.shm.buf, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Shared memory {name} is not a frame ring")
+        self.name = self.shm.name
+        self.n_slots = n_slots
+        self.slot_capacity = slot_capacity
+        self.slot_size = SLOT_HEADER_SIZE + TABLE_SIZE + slot_capacity
+        self._owner = create
+        self._write_seq = 0
+
+    def _slot_base(self, seq: int) -> int:
+        return CONTROL_SIZE + (seq % self.n_slots) * self.slot_size
+
+    # --- Writer side (producer process) ---
+    def write(self, frames: dict) -> int:
+        """Copies one frame set into the next slot. Returns its sequence number (0 if it did not fit)."""
+        buf = self.shm.buf
+        entries = [(VIEW_INDEX[key], data) for key, data in frames.items()
+                   if key in VIEW_INDEX and data is not None]
+        meta = frames.get('__meta__')
+        if meta:
+            entries.append((META_INDEX, json.dumps(meta, default=str).encode("utf-8")))
+        total = sum(len(data) for _, data in entries)
+        if total > self.slot_capacity:
+            print(f"[Ring] Frame set of {total} bytes exceeds slot capacity {self.slot_capacity}, dropped")
+            return 0
+
+        seq = self._write_seq + 1
+        base = self._slot_base(seq)
+        # Invalidate the slot before touching its payload
+        struct.pack_into("<QQ", buf, base, seq, 0)
+
+        payload = base + SLOT_HEADER_SIZE + TABLE_SIZE
+        offset = 0
+        for n, (index, data) in enumerate(entries):
+            length = len(data)
+            buf[payload + offset:payload + offset + length] = data
+            struct.pack_into(_ENTRY_FORMAT, buf, base + SLOT_HEADER_SIZE + n * _ENTRY_SIZE, index, offset, length)
+            offset += length
+        struct.pack_into("<H", buf, base + 16, len(entries))
+
+        # Publish: slot complete, then advance the ring head
+        struct.pack_into("<Q", buf, base + 8, seq)
+        struct.pack_into("<Q", buf, _LATEST_OFFSET, seq)
+        self._write_seq = seq
+        return seq
+
+    def watched_views(self) -> set:
+        counts = struct.unpack_from(f"<{len(VIEW_KEYS)}i", self.shm.buf, _WATCH_OFFSET)
+        return {key for key, count in zip(VIEW_KEYS, counts) if count > 0}
+
+    # --- Reader side (API process) ---
+    def latest_seq(self) -> int:
+        return struct.unpack_from("<Q", self.shm.buf, _LATEST_OFFSET)[0]
+
+    def read(self, seq: int) -> Optional[dict]:
+        """Returns {view_key: memoryview, '__meta__': {...}} for `seq`, or None if it was overwritten."""
+        buf = self.shm.buf
+        base = self._slot_base(seq)
+        seq_begin, seq_end, n_entries = struct.unpack_from(_SLOT_HEADER_FORMAT, buf, base)
+        if seq_begin != seq or seq_end != seq:
+            return None
+
+        payload = base + SLOT_HEADER_SIZE + TABLE_SIZE
+        frames = {}
+        meta = {}
+        for n in range(n_entries):
+            index, offset, length = struct.unpack_from(_ENTRY_FORMAT, buf, base + SLOT_HEADER_SIZE + n * _ENTRY_SIZE)
+            data = buf[payload + offset:payload + offset + length]
+            if index == META_INDEX:
+                meta = json.loads(bytes(data))
+                data.release()
+            else:
+                frames[VIEW_KEYS[index]] = data
+
+        if not self.is_valid(seq):
+            return None
+        frames['__meta__'] = meta
+        return frames
+
+    def is_valid(self, seq: int) -> bool:
+        """True while the slot holding `seq` has not been overwritten (slices read from it are intact)."""
+        return struct.unpack_from("<Q", self.shm.buf, self._slot_base(seq))[0] == seq
+
+    def set_watch_counts(self, view_counts: Dict[str, int]):
+        counts = [view_counts.get(key, 0) for key in VIEW_KEYS]
+        struct.pack_into(f"<{len(VIEW_KEYS)}i", self.shm.buf, _WATCH_OFFSET, *counts)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # Frame slices are still referenced somewhere; the mapping goes away with them
+            pass
+        if self._owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingPublisher:
+    """
+    Producer-process side of a ring. Offers the same interface video_producer uses on a
+    FrameChannel (watched_views / wait_for_subscribers / publish / close).
+    """
+
+    def __init__(self, ring: SharedFrameRing, frame_ready, poll_s: float = 0.05):
+        self.ring = ring
+        self.frame_ready = frame_ready  # multiprocessing.Event, wakes the API-side bridge
+        self.poll_s = poll_s
+
+    def watched_views(self) -> set:
+        return self.ring.watched_views()
+
+    def wait_for_subscribers(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.ring.watched_views():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_s)
+        return True
+
+    def publish(self, frames: dict) -> int:
+        seq = self.ring.write(frames)
+        if seq:
+            self.frame_ready.set()
+        return seq
+
+    def close(self):
+        self.frame_ready.set()
+        self.ring.close()
@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import map_cache
+from app.core.config import STALL_TIMEOUT_S
+from app.services.frame_hub import FRAME_HUB
+from app.services.producer_registry import PRODUCERS
+
+# Health of a registered source
+OK, STALLED, IDLE, STOPPED = "ok", "stalled", "idle", "stopped"
+
+# How often the watchdog thread checks the sources
+CHECK_INTERVAL_S = 1.0
+
+
+class _SourceHealth:
+    def __init__(self):
+        self.state = IDLE
+        self.stalls = 0
+        self.stalled_since: Optional[float] = None  # time.time() the current stall was noticed
+
+
+class SourceWatchdog:
+    """
+    Spots sources that stopped delivering: a running producer whose channel has subscribers
+    but published nothing for `stall_s` (camera down, network gone, decoder reconnecting).
+    Works off the hub channels, so it covers thread and process producers alike. Stalls and
+    recoveries are logged once per transition; status() reports every registered source.
+    """
+
+    def __init__(self, stall_s: float = STALL_TIMEOUT_S):
+        self.stall_s = stall_s
+        self._health: Dict[str, _SourceHealth] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _evaluate(self, handle, now: float):
+        """(state, seconds since the last frame or None, latest __meta__) of one source."""
+        channel = FRAME_HUB.get_channel(handle.source_path)
+        if not handle.is_alive() or handle.stop_event.is_set():
+            return STOPPED, None, {}
+        if channel is None:
+            return IDLE, None, {}
+        meta = channel.latest()[1].get('__meta__', {})
+        age = now - channel.published_at if channel.published_at is not None else None
+        if channel.watched_since is None:
+            return IDLE, age, meta
+        # Grace period: a new viewer (or a freshly started producer) needs a moment for the first frame
+        since = max(t for t in (channel.published_at, channel.watched_since) if t is not None)
+        return (STALLED if now - since > self.stall_s else OK), age, meta
+
+    def check(self) -> Dict[str, dict]:
+        """Evaluates every registered source, logging stall / recovery transitions."""
+        now = time.monotonic()
+        report = {}
+        with self._lock:
+            handles = PRODUCERS.list()
+            for handle in handles:
+                state, age, meta = self._evaluate(handle, now)
+                health = self._health.setdefault(handle.source_path, _SourceHealth())
+                if state == STALLED and health.state != STALLED:
+                    health.stalls += 1
+                    health.stalled_since = time.time()
+                    print(f"[Watchdog] {handle.source_path}: no frames for "
+                          f"{age if age is not None else self.stall_s:.1f}s, stalled")
+                elif state != STALLED and health.state == STALLED:
+                    if state == OK:
+                        print(f"[Watchdog] {handle.source_path}: recovered after "
+                              f"{time.time() - health.stalled_since:.1f}s")
+                    health.stalled_since = None
+                health.state = state
+                report[handle.source_path] = {
+                    'producer_id': handle.id,
+                    'state': state,
+                    'last_frame_age_s': round(age, 1) if age is not None else None,
+                    'stalled_since': health.stalled_since,
+                    'stalls': health.stalls,
+                    'reconnects': meta.get('reconnects'),
+                    'fps': meta.get('fps'),
+                    # Process mode: the worker's own map cache (thread producers share the API's)
+                    'map_cache': meta.get('map_cache'),
+                }
+            # Forget sources that were removed
+            for source_path in set(self._health) - {h.source_path for h in handles}:
+                del self._health[source_path]
+        return report
+
+    def status(self) -> dict:
+        report = self.check()
+        return {
+            'stall_timeout_s': self.stall_s,
+            'stalled': sorted(path for path, entry in report.items() if entry['state'] == STALLED),
+            # Dewarp maps held by this process (all thread-mode producers)
+            'map_cache': map_cache.memory_stats(),
+            'sources': report,
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="source-watchdog", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(CHECK_INTERVAL_S)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[Watchdog] Error: {e}")
+
+
+# Process-wide watchdog instance
+WATCHDOG = SourceWatchdog()
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.globals import STREAM_CLIENTS
+from app.services.frame_hub import ChannelClosed, FrameSubscription
+from app.services.frame_protocol import PROTOCOL_BINARY, pack_binary_frame, build_json_frame
+
+# A send that takes longer than this means the client is gone or hopelessly stalled
+SEND_TIMEOUT_S = 10.0
+
+# --- Adaptive mode ---
+# Every ADAPTIVE_WINDOW sends, the average send latency is compared with the frame
+# interval at the client's current rate. Clients that stay above the budget for
+# ADAPTIVE_BEHIND_WINDOWS windows get their rate halved; clients that stay healthy for
+# ADAPTIVE_RECOVER_WINDOWS windows get it raised again until they are back to full rate.
+ADAPTIVE_WINDOW = 30
+ADAPTIVE_SEND_BUDGET = 0.5      # fraction of the frame interval a send may take
+ADAPTIVE_BEHIND_WINDOWS = 2
+ADAPTIVE_RECOVER_WINDOWS = 4
+ADAPTIVE_MIN_FPS = 2.0
+
+# Producer timing fields of __meta__ forwarded with every frame (how far behind real time)
+PACING_FIELDS = ('lag_ms', 'dropped')
+
+
+class ClientStats:
+    """Per-connection delivery counters."""
+
+    def __init__(self):
+        self.frames_sent = 0
+        # Frames of this view replaced in the send slot before the connection took them
+        self.frames_dropped = 0
+        # Frames of this view skipped on purpose while the adaptive rate cap was waiting
+        self.frames_rate_limited = 0
+        self.bytes_sent = 0
+        self.send_ms_avg = 0.0  # exponential moving average
+        self.send_ms_max = 0.0
+        self.last_seq = 0
+
+    def record_send(self, seq: int, size: int, send_ms: float):
+        self.last_seq = seq
+        self.frames_sent += 1
+        self.bytes_sent += size
+        self.send_ms_avg = send_ms if self.frames_sent == 1 else 0.9 * self.send_ms_avg + 0.1 * send_ms
+        self.send_ms_max = max(self.send_ms_max, send_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'frames_rate_limited': self.frames_rate_limited,
+            'bytes_sent': self.bytes_sent,
+            'send_ms_avg': round(self.send_ms_avg, 2),
+            'send_ms_max': round(self.send_ms_max, 2),
+            'last_seq': self.last_seq,
+        }
+
+
+class StreamClient:
+    """
+    One WebSocket viewer. The hub fills a single outbound slot that always holds only the
+    newest frame set ("latest wins"); a separate sender drains it at whatever pace the
+    connection allows, so a slow client only ever falls behind by dropping frames and
+    never blocks the producer or other clients.
+    """
+
+    def __init__(self, websocket: WebSocket, camera_id: str, subscription: FrameSubscription,
+                 protocol: str, adaptive: bool = False, detections: bool = False,
+                 control_handler: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self.id = str(uuid.uuid4())[:8]
+        self.websocket = websocket
+        self.camera_id = camera_id
+        self.subscription = subscription
+        self.view_key = subscription.view_key
+        self.protocol = protocol
+        self.adaptive = adaptive
+        # Send the view's detections (boxes/keypoints) with each frame, for client-side overlays
+        self.detections = detections
+        # Called with each JSON control message the client sends (e.g. {"type": "ptz", ...})
+        self.control_handler = control_handler
+        self.connected_at = time.time()
+        self.stats = ClientStats()
+
+        # Rate cap applied by adaptive mode (None = send every frame)
+        self.max_fps: Optional[float] = None
+
+        self._slot = None  # (seq, frames) newest frame set not yet sent
+        self._slot_ready = asyncio.Event()
+        self._rate_capped = False  # Sender is sleeping off the max_fps interval
+
+        # Adaptive window state
+        self._window_sends = 0
+        self._window_send_ms = 0.0
+        self._behind_windows = 0
+        self._healthy_windows = 0
+
+    async def run(self):
+        """Serves the client until it disconnects or stalls."""
+        STREAM_CLIENTS[self.id] = self
+        tasks = [
+            asyncio.create_task(self._fill_slot()),
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receive_loop()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if isinstance(exc, ChannelClosed):
+                    # Producer stopped: tell the client the stream is going away
+                    print(f"[WS] Stream for {self.camera_id} ended, closing client {self.id}")
+                    try:
+                        await self.websocket.close(code=1001)
+                    except Exception:
+                        pass
+                elif exc is not None and not isinstance(exc, (WebSocketDisconnect, asyncio.TimeoutError)):
+                    print(f"[WS] Client {self.id} ({self.camera_id}) closed with error: {exc}")
+        finally:
+            # Also reached when the endpoint itself is cancelled: never leave tasks behind
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            del results
+            STREAM_CLIENTS.pop(self.id, None)
+
+    async def _fill_slot(self):
+        while True:
+            seq, frames = await self.subscription.next_frames()
+            if self.view_key not in frames:
+                continue
+            # Overwrite whatever is still pending: only the newest frame matters
+            if self._slot is not None:
+                if self._rate_capped:
+                    self.stats.frames_rate_limited += 1
+                else:
+                    self.stats.frames_dropped += 1
+            self._slot = (seq, frames)
+            self._slot_ready.set()
+
+    async def _receive_loop(self):
+        # Reading is also how a disconnect is noticed even when no frames are being published.
+        while True:
+            message = await self.websocket.receive()
+            if message.get('type') == 'websocket.disconnect':
+                raise WebSocketDisconnect(message.get('code', 1000))
+            text = message.get('text')
+            if text and self.control_handler is not None:
+                try:
+                    control = json.loads(text)
+                    if isinstance(control, dict):
+                        await self.control_handler(control)
+                except Exception as e:
+                    print(f"[WS] Client {self.id} control message rejected: {e}")
+
+    async def _send_loop(self):
+        while True:
+            await self._slot_ready.wait()
+            self._slot_ready.clear()
+            seq, frames = self._slot
+            self._slot = None
+
+            jpeg_bytes = frames[self.view_key]
+            meta = frames.get('__meta__', {})
+            fps = meta.get('fps', 0)
+            ts = meta.get('ts', 0.0)
+            # Set for frames that live in a shared-memory ring (process mode)
+            is_valid = meta.get('is_valid')
+            metadata = {field: meta[field] for field in PACING_FIELDS if field in meta}
+            if self.detections:
+                view_detections = meta.get('detections', {}).get(self.view_key)
+                if view_detections is not None:
+                    metadata['detections'] = view_detections
+
+            send_start = time.perf_counter()
+            if self.protocol == PROTOCOL_BINARY:
+                message = pack_binary_frame(jpeg_bytes, self.view_key, seq, fps, ts, metadata)
+                if is_valid is not None and not is_valid():
+                    self.stats.frames_dropped += 1
+                    continue  # Ring slot overwritten while packing; a newer frame is coming
+                await asyncio.wait_for(self.websocket.send_bytes(message), SEND_TIMEOUT_S)
+                size = len(message)
+            else:
+                message = json.dumps(build_json_frame(jpeg_bytes, seq, fps, ts, metadata))
+                if is_valid is not None and not is_valid():
+                    self.stats.frames_dropped += 1
+                    continue
+                await asyncio.wait_for(self.websocket.send_text(message), SEND_TIMEOUT_S)
+                size = len(message)
+            send_ms = (time.perf_counter() - send_start) * 1000
+            self.stats.record_send(seq, size, send_ms)
+
+            if self.adaptive:
+                self._adapt(send_ms, fps)
+
+            # Rate cap: frames published while waiting are simply overwritten in the slot
+            if self.max_fps:
+                wait = (1.0 / self.max_fps) - (time.perf_counter() - send_start)
+                if wait > 0:
+                    self._rate_capped = True
+                    try:
+                        await asyncio.sleep(wait)
+                    finally:
+                        self._rate_capped = False
+
+    def _adapt(self, send_ms: float, source_fps: float):
+        self._window_sends += 1
+        self._window_send_ms += send_ms
+        if self._window_sends < ADAPTIVE_WINDOW:
+            return
+
+        current_fps = self.max_fps or source_fps or 30.0
+        budget_ms = ADAPTIVE_SEND_BUDGET * 1000.0 / current_fps
+        avg_ms = self._window_send_ms / self._window_sends
+        self._window_sends = 0
+        self._window_send_ms = 0.0
+
+        if avg_ms > budget_ms:
+            self._behind_windows += 1
+            self._healthy_windows = 0
+        else:
+            self._healthy_windows += 1
+            self._behind_windows = 0
+
+        if self._behind_windows >= ADAPTIVE_BEHIND_WINDOWS:
+            self.max_fps = max(ADAPTIVE_MIN_FPS, current_fps / 2)
+            self._behind_windows = 0
+            print(f"[WS] Client {self.id} falling behind ({avg_ms:.1f}ms/send), capping at {self.max_fps:.1f} FPS")
+        elif self.max_fps and self._healthy_windows >= ADAPTIVE_RECOVER_WINDOWS:
+            self.max_fps = current_fps * 1.5
+            if source_fps and self.max_fps >= source_fps:
+                self.max_fps = None
+            self._healthy_windows = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'client_id': self.id,
+            'camera_id': self.camera_id,
+            'view_key': self.view_key,
+            'protocol': self.protocol,
+            'adaptive': self.adaptive,
+            'detections': self.detections,
+            'max_fps': round(self.max_fps, 1) if self.max_fps else None,
+            'connected_at': self.connected_at,
+            'pending': self._slot is not None,
+            **self.stats.to_dict(),
+        }
@@ -1,54 +1,122 @@
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import cv2
 import time
-import base64
 import sys
 import os
 
 # Ensure backend root is in path to import DefishVideoCV
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+import map_cache
 from DefishVideoCV import FisheyeMultiView
-from app.core.globals import FRAME_BUFFERS, ACTIVE_PRODUCERS
-from ultralytics import YOLO
-from turbojpeg import TurboJPEG
-
-# Initialize TurboJPEG
-try:
-    jpeg = TurboJPEG()
-except Exception as e:
-    print(f"[System] Warning: TurboJPEG not found: {e}. Using OpenCV fallback.")
-    jpeg = None
-
-# Initialize YOLO Model
-print("[System] Loading YOLOv11-Pose Model...")
-try:
-    model = YOLO("yolo11m-pose.pt")  # Ensure yolo11m-pose.pt is downloaded
-except Exception as e:
-    print(f"[System] Warning: Failed to load YOLO model: {e}")
-    model = None
-
-def start_producer_thread(source_path: str, is_fisheye: bool, active_views: list = None):
-    if source_path in ACTIVE_PRODUCERS:
-        return # Already running
-    
-    ACTIVE_PRODUCERS[source_path] = True
-    threading.Thread(target=video_producer, args=(source_path, is_fisheye, active_views), daemon=True).start()
+from detection_tracker import DetectionCadence, DetectionTracker, result_arrays
+from frame_reader import ALL, LATEST, FrameReader, is_live_source
+from pose_overlay import draw_tracks, tracks_to_meta
+from app.core.config import (DECODE_AHEAD, DECODE_FISHEYE_MAX_WIDTH, DECODE_MAX_WIDTH, DECODER,
+                             DETECT_ADAPTIVE, DETECT_BUDGET_SHARE, DETECT_BURN_IN, DETECT_INTERVAL,
+                             DETECT_MAX_INTERVAL, DETECT_TRACK_CONF, MOTION_GATING, MOTION_HOLD_FRAMES, MOTION_METHOD,
+                             MOTION_STATIC_REFRESH_S, INFERENCE_TIMEOUT_S, PACING, PACING_CATCHUP_FRAMES,
+                             REMAP_PRECISION, VIEW_WORKERS)
+from app.core.globals import FRAME_BUFFERS
+from app.services.frame_hub import FRAME_HUB
+from app.services.frame_pacer import LIVE, FramePacer
+from app.services.inference_scheduler import INFERENCE
+from app.services.motion_gate import MotionGate
+from app.services.resources import RESOURCES
+from background_subtraction import BackgroundSubtraction
+
+
+def _load_jpeg_encoder():
+    # TurboJPEG (SIMD libjpeg-turbo); loaded on first use so importing this module stays cheap
+    from turbojpeg import TurboJPEG
+    return TurboJPEG()
+
+
+RESOURCES.register('jpeg', _load_jpeg_encoder)
+
+# Standard 8 views; runtime PTZ overrides (see ProducerRegistry.update_view) are merged on top
+DEFAULT_VIEW_CONFIGS = [
+    {'angle_z': 0,   'angle_up': 35, 'zoom': 80}, # View 0
+    {'angle_z': 45,  'angle_up': 35, 'zoom': 80}, # View 1
+    {'angle_z': 90,  'angle_up': 35, 'zoom': 80}, # View 2
+    {'angle_z': 135, 'angle_up': 35, 'zoom': 80}, # View 3
+    {'angle_z': 180, 'angle_up': 35, 'zoom': 80}, # View 4
+    {'angle_z': 225, 'angle_up': 35, 'zoom': 80}, # View 5
+    {'angle_z': 270, 'angle_up': 35, 'zoom': 80}, # View 6
+    {'angle_z': 315, 'angle_up': 35, 'zoom': 80}, # View 7
+]
+
+# Virtual PTZ limits: tilt (angle_up) in degrees from the horizon, zoom as vertical FOV in degrees
+PTZ_TILT_RANGE = (0.0, 90.0)
+PTZ_ZOOM_RANGE = (20.0, 150.0)
+
+def apply_ptz(config: dict, pan=None, tilt=None, zoom=None, relative: bool = False) -> dict:
+    """Returns a copy of a view config with pan/tilt/zoom applied (absolute or as deltas), clamped."""
+    updated = dict(config)
+    for key, value in (('angle_z', pan), ('angle_up', tilt), ('zoom', zoom)):
+        if value is None:
+            continue
+        updated[key] = float(value) + (float(config.get(key, 0)) if relative else 0.0)
+    updated['angle_z'] = float(updated.get('angle_z', 0)) % 360
+    updated['angle_up'] = min(max(float(updated.get('angle_up', 0)), PTZ_TILT_RANGE[0]), PTZ_TILT_RANGE[1])
+    updated['zoom'] = min(max(float(updated.get('zoom', 90)), PTZ_ZOOM_RANGE[0]), PTZ_ZOOM_RANGE[1])
+    return updated
 
-def video_producer(source_path: str, is_fisheye: bool, active_views: list = None):
+# Delivery size of every streamed view (width, height)
+WEB_SIZE = (640, 360)
+# Views that go through YOLO are rendered larger for detection, then downscaled for delivery
+YOLO_VIEW_SIZE = (1280, 720)
+
+# How long an unwatched producer sleeps between subscriber checks (decode is paused meanwhile)
+IDLE_WAIT_S = 0.5
+# After a failed view rebuild (frame size change), frames are held back and the rebuild is retried this often
+REBUILD_RETRY_S = 2.0
+
+def video_producer(source_path: str, is_fisheye: bool, active_views: list = None, stop_event: threading.Event = None, channel=None,
+                   view_overrides: dict = None, commands=None, detection: dict = None):
+    """
+    Decode -> dewarp -> (YOLO) -> encode loop for one source. Runs until stop_event is set;
+    started and stopped by the ProducerRegistry (app/services/producer_registry.py).
+    `channel` defaults to this source's FRAME_HUB channel; worker processes pass a RingPublisher.
+    `view_overrides` ({index: config}) replaces default view configs (PTZ set before this start);
+    `detection` ({view key: DetectionConfig dict}) selects the views that run YOLO and how;
+    `commands` is a queue of control messages for the running loop: PTZ changes
+    ({'type': 'set_view', 'index', 'config'}), inference priority ({'type': 'set_priority', 'priority'})
+    and detection settings ({'type': 'set_detection', 'view', 'config'}).
+    """
     print(f"[Producer] Starting loop for {source_path}")
+    if stop_event is None:
+        stop_event = threading.Event()
     
-    cap = cv2.VideoCapture(source_path)
+    # Decoding runs ahead on its own thread; files loop forever without drops. Live streams
+    # keep only the newest frame (no backlog building up behind slow processing) and are
+    # reopened with backoff when they drop. Frames arrive already scaled to the width this source needs.
+    live = is_live_source(source_path)
+    cap = FrameReader(source_path, LATEST if live else ALL, 1 if live else DECODE_AHEAD, loop=not live,
+                      name=f"decoder-{os.path.basename(str(source_path))}",
+                      max_width=DECODE_FISHEYE_MAX_WIDTH if is_fisheye else DECODE_MAX_WIDTH, decoder=DECODER,
+                      reconnect=live)
     if not cap.isOpened():
         print(f"[Producer] Failed to open {source_path}")
-        if source_path in ACTIVE_PRODUCERS:
-            del ACTIVE_PRODUCERS[source_path]
+        cap.release()
         return
+    if live:
+        # Frame size is only known once the stream delivers (it may be down or still connecting)
+        while not cap.wait_ready(IDLE_WAIT_S):
+            if stop_event.is_set():
+                cap.release()
+                print(f"[Producer] Stopped {source_path} (never connected)")
+                return
 
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = cap.width
+    height = cap.height
+    # Streams often report no rate or a timebase (e.g. 90000) instead of one
+    fps = cap.fps if 0 < cap.fps <= 120 else 30
     delay = 1.0 / fps
+    # Frames are due at their timestamps on the monotonic clock; when behind, the reader skips ahead
+    pacer = FramePacer(LIVE if live else PACING, fps, PACING_CATCHUP_FRAMES)
 
     # Detect CUDA availability once
     cuda_available = hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
@@ -57,194 +125,454 @@ def video_producer(source_path: str, is_fisheye: bool, active_views: list = None
     else:
         print("[System] CUDA not available, using CPU pipeline")
 
+    # Logic: Only apply YOLO on views whose camera enabled detection (changeable at runtime)
+    detect_settings = {key: dict(config) for key, config in (detection or {}).items()}
+
+    def detection_enabled(key):
+        return detect_settings.get(key, {}).get('enabled', False)
+
+    def build_processor(frame_shape, view_configs):
+        return FisheyeMultiView(
+            frame_shape,
+            view_configs,
+            show_original=True,
+            use_cuda=cuda_available,
+            downscale_size=None,  # Views are already rendered at delivery size
+            remap_precision=REMAP_PRECISION,
+            output_size=WEB_SIZE,
+            overlay_on_downscaled=True,  # Boundaries drawn on the 640x360 letterbox; frame stays read-only
+            motion_detection_enabled=MOTION_GATING,
+            motion_method=MOTION_METHOD,
+            motion_alert_border=False  # Motion only gates work here; the stream looks unchanged
+        )
+
     processor = None
     if is_fisheye:
-         # Standard 8 views
-         all_configs = [
-            {'angle_z': 0,   'angle_up': 35, 'zoom': 80}, # View 0
-            {'angle_z': 45,  'angle_up': 35, 'zoom': 80}, # View 1
-            {'angle_z': 90,  'angle_up': 35, 'zoom': 80}, # View 2
-            {'angle_z': 135, 'angle_up': 35, 'zoom': 80}, # View 3
-            {'angle_z': 180, 'angle_up': 35, 'zoom': 80}, # View 4
-            {'angle_z': 225, 'angle_up': 35, 'zoom': 80}, # View 5
-            {'angle_z': 270, 'angle_up': 35, 'zoom': 80}, # View 6
-            {'angle_z': 315, 'angle_up': 35, 'zoom': 80}, # View 7
-        ]
+         # Standard 8 views, with any PTZ changes made earlier for this source
+         all_configs = [dict(c) for c in DEFAULT_VIEW_CONFIGS]
+         for index, config in (view_overrides or {}).items():
+             all_configs[int(index)] = dict(config)
          
          final_configs = []
          for i in range(8):
              if active_views is None or i in active_views:
-                 final_configs.append(all_configs[i])
+                 # Remap straight to the size the consumer needs (no full-res render + downscale)
+                 size = YOLO_VIEW_SIZE if detection_enabled(f"partition_{i}") else WEB_SIZE
+                 final_configs.append(dict(all_configs[i], output_size=size))
              else:
                  final_configs.append(None) # Skip this view
                  
-         processor = FisheyeMultiView(
-             (height, width),
-             final_configs,
-             show_original=True,
-             use_cuda=cuda_available,
-             downscale_size=(640, 360) if cuda_available else None
-         )
+         processor = build_processor((height, width), final_configs)
+
+    # Motion gating: static views skip YOLO/encode and re-serve their last JPEG
+    gate = MotionGate(MOTION_HOLD_FRAMES, MOTION_STATIC_REFRESH_S) if MOTION_GATING else None
+    # Non-fisheye sources have a single view, gated by one subtractor on the full frame
+    frame_subtractor = BackgroundSubtraction(method=MOTION_METHOD) if MOTION_GATING and processor is None else None
     
-    # Init buffer for this source
-    FRAME_BUFFERS[source_path] = {}
+    # Init hub channel for this source (frame sets are versioned by the hub)
+    owns_hub_channel = channel is None
+    if owns_hub_channel:
+        channel = FRAME_HUB.channel(source_path)
+    idle = False
     
+    # --- Helper: Run Detection (classes/confidence per camera, person only by default) ---
+    # Inference goes through the shared scheduler (batched across views and producers);
+    # submit everything first, then collect, so one frame's views share a batch.
+    # Each YOLO view runs the detector on its cadence and tracks people in between.
+    detectors = {}  # view key -> (DetectionTracker, DetectionCadence)
+    # Latest detections per view, published in __meta__ (also while a static view re-serves its JPEG)
+    last_detections = {}
+    # Detector requests that outlived their frame's wait: view key -> (future, submitted_at).
+    # Picked up on a later frame; the view submits nothing new meanwhile.
+    inflight = {}
+
+    def detection_state(key):
+        state = detectors.get(key)
+        if state is None:
+            setting = detect_settings.get(key, {})
+            state = detectors[key] = (
+                DetectionTracker(high_thresh=setting.get('conf', DETECT_TRACK_CONF)),
+                DetectionCadence(setting.get('interval', DETECT_INTERVAL), setting.get('adaptive', DETECT_ADAPTIVE),
+                                 DETECT_MAX_INTERVAL, DETECT_BUDGET_SHARE, setting.get('max_fps')),
+            )
+        return state
+
+    def submit_yolo(key, img):
+        """Returns (future, submitted_at) if this frame of the view goes to the detector, else None."""
+        if key in inflight:
+            return None  # An earlier image of this view is still being detected
+        _, cadence = detection_state(key)
+        if not cadence.due(img):
+            return None
+        setting = detect_settings.get(key, {})
+        return INFERENCE.submit(img, source_path, setting.get('model'), setting.get('imgsz')), time.time()
+
+    def draw_yolo(key, img, pending):
+        tracker, cadence = detection_state(key)
+        result = None
+        # Wait at most about one frame for this frame's detections; results that take longer
+        # (or arrive while the model is still loading) are applied on a later frame instead of
+        # stalling the stream
+        wait = min(delay, INFERENCE_TIMEOUT_S)
+        if pending is None:
+            pending, wait = inflight.pop(key, None), 0
+        if pending is not None:
+            future, submitted_at = pending
+            setting = detect_settings.get(key, {})
+            if not INFERENCE.model_ready(setting.get('model'), setting.get('imgsz')):
+                wait = 0
+            try:
+                result = future.result(wait)
+                cadence.record((time.time() - submitted_at) * 1000, delay * 1000)
+            except FutureTimeoutError:
+                if time.time() - submitted_at < INFERENCE_TIMEOUT_S:
+                    inflight[key] = pending
+                else:
+                    cadence.record((time.time() - submitted_at) * 1000, delay * 1000)  # Given up on it
+            except Exception:
+                pass  # Failed; keep tracking
+        if result is None:
+            # No detector run (or dropped / no model): move the existing tracks
+            tracks = tracker.propagate(img, frame_no)
+        else:
+            tracks = tracker.update(img, frame_no, *result_arrays(result, detect_settings.get(key, {}).get('classes')))
+        last_detections[key] = tracks_to_meta(tracks, img.shape)
+        if detect_settings.get(key, {}).get('burn_in', DETECT_BURN_IN):
+            draw_tracks(img, tracks)
+        return img
+
+    def run_yolo(key, img):
+        return draw_yolo(key, img, submit_yolo(key, img))
+
+    # --- Helper: GPU-aware resize ---
+    def resize_for_web(img):
+        if cuda_available and hasattr(cv2, "cuda"):
+            try:
+                gpu_img = cv2.cuda_GpuMat()
+                gpu_img.upload(img)
+                gpu_resized = cv2.cuda.resize(gpu_img, WEB_SIZE, interpolation=cv2.INTER_AREA)
+                return gpu_resized.download()
+            except Exception as e:
+                print(f"[GPU] Resize fallback due to: {e}")
+        return cv2.resize(img, WEB_SIZE, interpolation=cv2.INTER_AREA)
+
+    # --- Helper: Resize (if needed) + JPEG encode ---
+    def encode_for_web(img):
+        # Partitions rendered at WEB_SIZE (and the letterboxed original) are encoded as-is;
+        # YOLO views and non-fisheye frames are resized here.
+        if (img.shape[1], img.shape[0]) != WEB_SIZE:
+            img = resize_for_web(img)
+        jpeg = RESOURCES.get('jpeg')
+        if jpeg:
+            # Optimize: Use TurboJPEG for faster encoding (SIMD accelerated)
+            return jpeg.encode(img, quality=40)
+        # Fallback (TurboJPEG not installed)
+        _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 40])
+        return buffer.tobytes()
+
+    # --- Helper: Per-view pool task ---
+    def render_and_encode_view(key, cropped_frame, frame_no):
+        """Returns (key, raw_view, None) for YOLO views, (key, None, jpeg_bytes) otherwise."""
+        try:
+            index = int(key.split('_')[1])
+            if index >= len(processor.dewarp_maps):
+                return key, None, None
+            rendered = processor.render_view(index, cropped_frame)
+            if rendered is None:
+                return key, None, None
+            planar_view, _, motion_flag = rendered
+            if gate is not None and not gate.update(key, frame_no, motion_flag):
+                # Static view: no YOLO, no encode
+                cached = gate.cached(key)
+                if cached is not None:
+                    return key, None, cached
+            if detection_enabled(key):
+                # YOLO runs on the producer thread; hand the raw view back
+                return key, planar_view, None
+            encoded = encode_for_web(planar_view)
+            if gate is not None:
+                gate.store(key, encoded)
+            return key, None, encoded
+        except Exception as e:
+            print(f"Encoding error for {key}: {e}")
+            return key, None, None
+
+    # The letterbox canvas is reused across frames; never let two originals render at once
+    original_lock = threading.Lock()
+
+    def render_and_encode_original(frame):
+        try:
+            with original_lock:
+                return encode_for_web(processor.render_original(frame, overlay=True))
+        except Exception as e:
+            print(f"Encoding error for original: {e}")
+            return None
+
+    # Persistent per-source pool for the per-view stage (None = serial).
+    # cv2.remap/resize and libjpeg-turbo release the GIL, so views render in parallel.
+    view_pool = None
+    if processor is not None and VIEW_WORKERS > 1:
+        configured_views = sum(1 for m in processor.dewarp_maps if m is not None)
+        pool_size = min(VIEW_WORKERS, configured_views + 1)
+        if pool_size > 1:
+            view_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="view-worker")
+
+    # --- PTZ: maps for re-aimed views are built on a side thread, then swapped in ---
+    map_builder = None
+
+    def apply_view_change(index, config):
+        """Re-aims a view, or re-renders it at the size its detection setting needs."""
+        try:
+            t_start = time.time()
+            size = YOLO_VIEW_SIZE if detection_enabled(f"partition_{index}") else WEB_SIZE
+            processor.set_view(index, dict(config, output_size=size))
+            if gate is not None:
+                gate.invalidate(f"partition_{index}")
+            print(f"[PTZ] partition_{index} -> pan {config.get('angle_z')} tilt {config.get('angle_up')} "
+                  f"zoom {config.get('zoom')} size {size[0]}x{size[1]} ({(time.time() - t_start) * 1000:.0f}ms)")
+        except Exception as e:
+            print(f"[PTZ] Failed to update partition_{index}: {e}")
+
+    def apply_detection_change(key, config):
+        was_enabled = detection_enabled(key)
+        detect_settings[key] = dict(config)
+        if not config.get('enabled'):
+            detectors.pop(key, None)
+            last_detections.pop(key, None)
+            inflight.pop(key, None)
+        elif key in detectors:
+            tracker, cadence = detectors[key]
+            tracker.high_thresh = config.get('conf', DETECT_TRACK_CONF)
+            cadence.configure(config.get('interval'), config.get('adaptive'), config.get('max_fps'))
+        print(f"[Detect] {key}: {'on' if config.get('enabled') else 'off'} {config}")
+        # YOLO views render at a larger size: rebuild the view's maps when that changes
+        if key.startswith('partition_') and processor is not None and was_enabled != bool(config.get('enabled')):
+            index = int(key.split('_')[1])
+            if index < len(processor.view_configs) and processor.view_configs[index] is not None:
+                submit_map_change(index, processor.view_configs[index])
+
+    def submit_map_change(index, config):
+        nonlocal map_builder
+        if map_builder is None:
+            map_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptz-maps")
+        map_builder.submit(apply_view_change, index, config)
+
+    rebuild_retry_at = 0.0
+
+    def rebuild_for_frame_size(frame_shape) -> bool:
+        """
+        A live camera came back with another resolution / aspect (stream profile change):
+        maps, crop, motion models, cached JPEGs and tracks were all built for the old size.
+        Returns False if the views could not be rebuilt; height/width then keep the old size,
+        so a later frame retries (at most every REBUILD_RETRY_S).
+        """
+        nonlocal processor, frame_subtractor, gate, map_builder, height, width, rebuild_retry_at
+        if time.monotonic() < rebuild_retry_at:
+            return False
+        print(f"[Producer] {source_path}: frame size changed {width}x{height} -> "
+              f"{frame_shape[1]}x{frame_shape[0]}, rebuilding views")
+        if map_builder is not None:
+            # Let queued PTZ changes land first, so the rebuilt views keep them
+            map_builder.shutdown(wait=True)
+            map_builder = None
+        if processor is not None:
+            try:
+                processor = build_processor(frame_shape[:2], list(processor.view_configs))
+            except Exception as e:
+                print(f"[Producer] Failed to rebuild views for {source_path}: {e}, "
+                      f"holding frames and retrying in {REBUILD_RETRY_S:.0f}s")
+                rebuild_retry_at = time.monotonic() + REBUILD_RETRY_S
+                return False
+        height, width = frame_shape[:2]
+        if frame_subtractor is not None:
+            frame_subtractor = BackgroundSubtraction(method=MOTION_METHOD)
+        if gate is not None:
+            gate = MotionGate(MOTION_HOLD_FRAMES, MOTION_STATIC_REFRESH_S)
+        detectors.clear()
+        last_detections.clear()
+        inflight.clear()
+        return True
+
+    def drain_commands():
+        while commands is not None:
+            try:
+                command = commands.get_nowait()
+            except queue.Empty:
+                return
+            if command.get('type') == 'set_priority':
+                INFERENCE.set_priority(source_path, command['priority'])
+                continue
+            if command.get('type') == 'set_detection':
+                apply_detection_change(command['view'], command['config'])
+                continue
+            if command.get('type') != 'set_view' or processor is None:
+                continue
+            submit_map_change(int(command['index']), command['config'])
+
+    # Frames processed so far (motion hold window is counted in frames)
+    frame_no = 0
+
     # FPS Calculation Vars
     fps_start_time = time.time()
     fps_frame_count = 0
     current_real_fps = 0.0
 
-    while True:
-        loop_start = time.time()
-        ret, frame = cap.read()
+    try:
+        while not stop_event.is_set():
+            drain_commands()
+
+            # --- Subscriber-aware: only decode/process what someone is watching ---
+            watched_views = channel.watched_views()
+            if not watched_views:
+                if not idle:
+                    print(f"[Producer] No subscribers for {source_path}, pausing decode")
+                    idle = True
+                channel.wait_for_subscribers(IDLE_WAIT_S)
+                continue
+            if idle:
+                print(f"[Producer] Subscribers back for {source_path}, resuming")
+                idle = False
+                pacer.reset()
+                fps_start_time = time.time()
+                fps_frame_count = 0
+
+            ret, frame = cap.read(IDLE_WAIT_S)
         
-        if not ret:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
+            if not ret:
+                if cap.ended:
+                    print(f"[Producer] No more frames from {source_path}")
+                    break
+                continue  # Nothing decoded yet; re-check stop / subscribers
             
-        # FPS Counter
-        fps_frame_count += 1
-        if (time.time() - fps_start_time) >= 1.0:
-            current_real_fps = fps_frame_count / (time.time() - fps_start_time)
-            fps_frame_count = 0
-            fps_start_time = time.time()
-        
-        # --- Helper: Run Detection (Person Only, Conf > 0.5) ---
-        def run_yolo(img):
-            if model is None:
-                return img
-            try:
-                # Run inference: classes=0 (person), conf=0.5
-                # Ensure device='0' is used to leverage GPU when available
-                results = model(
-                    img,
-                    classes=[0],
-                    conf=0.5,
-                    verbose=False,
-                    device='0'
-                )
-                return results[0].plot()
-            except Exception as e:
-                return img
+            if frame.shape[:2] != (height, width) and not rebuild_for_frame_size(frame.shape):
+                # The views still fit the old size: publish nothing rather than wrong crops
+                # (the watchdog reports the source as stalled meanwhile)
+                continue
+
+            frame_no += 1
+            pacer.wait(cap.pts, cap.decoded_at, stop_event)
 
-        # --- Process ---
-        current_buffer = {}
-        # Store FPS in the buffer metadata
-        current_buffer['__meta__'] = { 'fps': round(current_real_fps, 1) }
+            # FPS Counter
+            fps_frame_count += 1
+            if (time.time() - fps_start_time) >= 1.0:
+                current_real_fps = fps_frame_count / (time.time() - fps_start_time)
+                fps_frame_count = 0
+                fps_start_time = time.time()
         
-        # --- Timing ---
-        t0 = time.time()
+            # --- Process ---
+            current_buffer = {}
+            # Store FPS / capture time in the buffer metadata ('seq' is assigned by the hub on publish)
+            # lag_ms: how far this frame is behind real time; dropped: frames skipped to keep up
+            frame_meta = { 'fps': round(current_real_fps, 1), 'ts': time.time(),
+                           'lag_ms': round(pacer.lag_s * 1000, 1), 'dropped': cap.dropped + cap.dropped_late }
+            if live:
+                frame_meta['reconnects'] = cap.reconnects
+            if not owns_hub_channel:
+                # Worker process: its own model/encoder state (/api/ready) and map cache (/api/streams/health)
+                frame_meta['resources'] = RESOURCES.states()
+                frame_meta['map_cache'] = map_cache.memory_stats()
+            current_buffer['__meta__'] = frame_meta
+        
+            # --- Timing ---
+            t0 = time.time()
 
-        # --- Helper: GPU-aware resize ---
-        def resize_for_web(img):
-            if cuda_available and hasattr(cv2, "cuda"):
+            if is_fisheye and processor:
                 try:
-                    gpu_img = cv2.cuda_GpuMat()
-                    gpu_img.upload(img)
-                    gpu_resized = cv2.cuda.resize(gpu_img, (640, 360), interpolation=cv2.INTER_AREA)
-                    return gpu_resized.download()
-                except Exception as e:
-                    print(f"[GPU] Resize fallback due to: {e}")
-            return cv2.resize(img, (640, 360))
-        
-        # --- Helper: Task for Parallel Encoding ---
-        def process_and_encode_view(key, img):
-            try:
-                # Logic: Only apply YOLO on specific views
-                target_views = ['partition_3'] # Only 135 degree
-                
-                # Note: YOLO inference itself is not thread-safe if sharing the same model instance simply.
-                # Ideally, YOLO runs on main thread, but here we keep it simple or assume inference is fast/locked.
-                # For safety/speed, let's keep YOLO sequentially on main thread mostly, 
-                # BUT since run_yolo is here, let's move YOLO OUT of this parallel block if possible, 
-                # OR assume checking logic is fast.
-                # Actually, running YOLO in parallel threads with one model instance might cause issues or not speed up GPU.
-                # Better Strategy: Run YOLO sequentially first if needed, THEN encode in parallel.
-                
-                img_2_process = img
-                if key in target_views:
-                     img_2_process = run_yolo(img) # This might still be the bottleneck if plot() is slow
-                
-                # CPU Intensive: Resize and Encode
-                img_small = cv2.resize(img_2_process, (640, 360))
-                _, buffer = cv2.imencode('.jpg', img_small, [cv2.IMWRITE_JPEG_QUALITY, 40])
-                b64_str = base64.b64encode(buffer).decode('utf-8')
-                return key, b64_str
-            except Exception as e:
-                print(f"Encoding error for {key}: {e}")
-                return key, None
+                    # 0. Original view. The overlay is drawn on the downscaled letterbox, so the source
+                    # frame is only read and the original can render alongside the partitions.
+                    original_future = None
+                    if 'original' in watched_views and processor.show_original and view_pool is not None:
+                        original_future = view_pool.submit(render_and_encode_original, frame)
 
-        if is_fisheye and processor:
-            try:
-                # 1. Fisheye Processing (CPU Bound - Single Core mostly unless OpenCV is optimized)
-                processed_frames, _, _ = processor.process_frame(frame, overlay=True, view_id=None)
-                t1 = time.time()
-                
-                # 2. Sequential Encoding (Optimized)
-                # Reverting Parallel due to GIL overhead.
-                # Optimization: 
-                # 1. Skip YOLO if not needed
-                # 2. Encode sequentially but efficiently
+                    # 1. Dewarp + encode, one remap->encode task per watched partition.
+                    # Unwatched partitions are skipped entirely (no remap, no YOLO, no encode).
+                    cropped_frame = processor.crop(frame)
+                    partition_keys = [key for key in sorted(watched_views) if key.startswith('partition_')]
+                    if view_pool is not None and len(partition_keys) > 1:
+                        results = list(view_pool.map(lambda key: render_and_encode_view(key, cropped_frame, frame_no), partition_keys))
+                    else:
+                        results = [render_and_encode_view(key, cropped_frame, frame_no) for key in partition_keys]
+                    t1 = time.time()
                 
-                current_buffer = {}
-                current_buffer['__meta__'] = { 'fps': round(current_real_fps, 1) }
-
-                for key, img in processed_frames.items():
-                    try:
-                        # Logic: Only apply YOLO on specific views
-                        target_views = ['partition_3'] # Only 135 degree
-                        
-                        img_2_process = img
-                        if key in target_views:
-                             img_2_process = run_yolo(img)
-                        
-                        # If CUDA downscaling was applied in FisheyeMultiView, the frame
-                        # is already small; otherwise, resize here.
-                        if cuda_available and processor.use_cuda and processor.downscale_size:
-                            img_small = img_2_process
-                        else:
-                            img_small = resize_for_web(img_2_process)
-                        
-                        if jpeg:
-                            # Optimize: Use TurboJPEG for faster encoding (SIMD accelerated)
-                            buffer = jpeg.encode(img_small, quality=40)
-                        else:
-                            # Fallback
-                            _, buffer = cv2.imencode('.jpg', img_small, [cv2.IMWRITE_JPEG_QUALITY, 40])
-                            
-                        current_buffer[key] = base64.b64encode(buffer).decode('utf-8')
-                        
-                    except Exception as e:
-                        print(f"Encoding error for {key}: {e}")
+                    # 2. YOLO views: the scheduler owns the model; this thread only waits for and draws results
+                    if 'original' in watched_views and processor.show_original and view_pool is None:
+                        current_buffer['original'] = render_and_encode_original(frame)
+
+                    pending_yolo = {key: submit_yolo(key, raw_view) for key, raw_view, _ in results if raw_view is not None}
+                    for key, raw_view, encoded in results:
+                        if raw_view is not None:
+                            try:
+                                encoded = encode_for_web(draw_yolo(key, raw_view, pending_yolo[key]))
+                                if gate is not None:
+                                    gate.store(key, encoded)
+                            except Exception as e:
+                                print(f"Encoding error for {key}: {e}")
+                        if encoded is not None:
+                            # Raw JPEG bytes; base64 (JSON fallback) is done per client in the router
+                            current_buffer[key] = encoded
+
+                    if original_future is not None:
+                        encoded = original_future.result()
+                        if encoded is not None:
+                            current_buffer['original'] = encoded
                 
-                t2 = time.time()
+                    t2 = time.time()
                 
-                # Log performance
-                if fps_frame_count % 30 == 0:
-                    fisheye_time = (t1 - t0) * 1000
-                    encoding_time = (t2 - t1) * 1000
-                    total_time = (t2 - t0) * 1000
-                    print(f"[Perf] Fisheye: {fisheye_time:.1f}ms | Seq-Encode/YOLO: {encoding_time:.1f}ms | Total: {total_time:.1f}ms | FPS: {current_real_fps:.1f}")
+                    # Log performance
+                    if fps_frame_count % 30 == 0:
+                        fisheye_time = (t1 - t0) * 1000
+                        encoding_time = (t2 - t1) * 1000
+                        total_time = (t2 - t0) * 1000
+                        mode = f"Pool x{view_pool._max_workers}" if view_pool is not None else "Serial"
+                        gated = f" | Static served: {gate.skipped}" if gate is not None else ""
+                        cadence = "".join(f" | Detect {key} every {c.current}" for key, (_, c) in sorted(detectors.items()))
+                        decode = f" | Decode: {cap.decode_ms:.1f}ms (waited {cap.wait_ms:.1f}ms) | Lag: {pacer.lag_s * 1000:.0f}ms, dropped {cap.dropped + cap.dropped_late}"
+                        print(f"[Perf] Fisheye+Encode ({mode}): {fisheye_time:.1f}ms | YOLO/Original: {encoding_time:.1f}ms | Total: {total_time:.1f}ms | FPS: {current_real_fps:.1f}{gated}{cadence}{decode}")
 
-            except Exception as e:
-                print(f"[Producer] Error: {e}")
-        else:
-             # Normal video processing
-             try:
-                 # Encode Normal Frame
-                 frame_detected = run_yolo(frame)
-                 
-                 img_small = resize_for_web(frame_detected)
-                 _, buffer = cv2.imencode('.jpg', img_small, [cv2.IMWRITE_JPEG_QUALITY, 40])
-                 current_buffer['original'] = base64.b64encode(buffer).decode('utf-8')
-             except Exception as e:
-                 print(f"[Producer] Normal video error: {e}")
+                except Exception as e:
+                    print(f"[Producer] Error: {e}")
+            else:
+                 # Normal video processing
+                 try:
+                     encoded = None
+                     if gate is not None:
+                         detections, _ = frame_subtractor.get_detections(frame, bbox_thresh=400)
+                         if not gate.update('original', frame_no, detections is not None or frame_subtractor.warming_up):
+                             encoded = gate.cached('original')
+                     if encoded is None:
+                         # Encode Normal Frame
+                         if detection_enabled('original'):
+                             frame = run_yolo('original', frame)
+                         encoded = encode_for_web(frame)
+                         if gate is not None:
+                             gate.store('original', encoded)
+                     current_buffer['original'] = encoded
+                 except Exception as e:
+                     print(f"[Producer] Normal video error: {e}")
         
-        # Update Global Buffer (Atomic assignment)
-        FRAME_BUFFERS[source_path] = current_buffer
+            if gate is not None:
+                frame_meta['motion'] = gate.motion_views()
+            if last_detections:
+                frame_meta['detections'] = {key: last_detections[key] for key in current_buffer if key in last_detections}
+
+            # Publish to the hub: versions the frame set and wakes waiting consumers
+            channel.publish(current_buffer)
         
-        # --- Timing Control ---
-        elapsed = time.time() - loop_start
-        wait = delay - elapsed
-        if wait > 0:
-            time.sleep(wait)
+            # --- Timing Control: behind schedule -> skip ahead instead of falling behind for good ---
+            catch_up = pacer.catch_up_to()
+            if catch_up is not None:
+                cap.skip_to(catch_up)
+    finally:
+        # Release decoder, dewarp maps (incl. GPU copies) and buffers for this source
+        cap.release()
+        if view_pool is not None:
+            view_pool.shutdown(wait=True)
+        if map_builder is not None:
+            map_builder.shutdown(wait=True)
+        processor = None
+        FRAME_BUFFERS.pop(source_path, None)
+        if owns_hub_channel:
+            FRAME_HUB.close_channel(source_path, channel)
+        else:
+            channel.close()
+        print(f"[Producer] Stopped {source_path}")
@@ -1,6 +1,108 @@
+import cv2
+import numpy as np
+
+# Motion is analysed on a small copy of each view; people in a corridor are still many pixels
+# wide at this size, and MOG2 cost scales with the pixel count.
+ANALYSIS_WIDTH = 160
+
+METHODS = ("mog2", "diff")
+
 
 class BackgroundSubtraction:
-    def __init__(self):
-        pass
+    """
+    Per-view motion detector (MOG2 or plain frame differencing) on a downscaled grayscale copy.
+
+    Zones restrict where motion counts: {name: [(x, y), ...]} polygons in normalized view
+    coordinates (0..1), so they stay valid whatever size the view is rendered at.
+    Empty/None zones means the whole view.
+    """
+
+    def __init__(self, method="mog2", analysis_width=ANALYSIS_WIDTH, history=300, var_threshold=25,
+                 diff_threshold=25, warmup_frames=30):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        self.method = method
+        self.analysis_width = analysis_width
+        self.diff_threshold = diff_threshold
+        self.warmup_frames = warmup_frames
+        self.frames_seen = 0
+        self._previous = None  # Last blurred frame (diff method)
+        self._subtractor = None
+        if method == "mog2":
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=history, varThreshold=var_threshold, detectShadows=False
+            )
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._zone_mask = None
+        self._zone_key = None
+
+    @property
+    def warming_up(self) -> bool:
+        """True until the background model has seen enough frames to be trusted."""
+        return self.frames_seen < self.warmup_frames
+
+    def _zones_mask(self, zones, shape):
+        key = (repr(zones), shape)
+        if key != self._zone_key:
+            self._zone_key = key
+            if not zones:
+                self._zone_mask = None
+            else:
+                h, w = shape
+                mask = np.zeros((h, w), dtype=np.uint8)
+                for points in zones.values():
+                    pts = np.array([[x * w, y * h] for x, y in points], dtype=np.int32).reshape((-1, 1, 2))
+                    cv2.fillPoly(mask, [pts], 255)
+                self._zone_mask = mask
+        return self._zone_mask
+
     def get_detections(self, frame, zones=None, bbox_thresh=50):
-        return None, None
+        """
+        Feeds one frame of the view to the background model.
+
+        Args:
+            frame (np.ndarray): BGR view (only read).
+            zones (dict): Optional motion zones, see class docstring.
+            bbox_thresh (int): Minimum bounding box area, in pixels of `frame`, for a blob to count.
+        Returns:
+            (detections, motion_mask): detections is a list of (x, y, w, h) boxes in `frame`
+            coordinates, or None when there is no motion (also during warm-up). motion_mask is the
+            binary foreground mask at analysis resolution.
+        """
+        h, w = frame.shape[:2]
+        scale = self.analysis_width / float(w)
+        small_size = (self.analysis_width, max(1, int(round(h * scale))))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self._subtractor is not None:
+            motion_mask = self._subtractor.apply(gray)
+        else:
+            if self._previous is None or self._previous.shape != gray.shape:
+                self._previous = gray
+            motion_mask = cv2.absdiff(gray, self._previous)
+            self._previous = gray
+            _, motion_mask = cv2.threshold(motion_mask, self.diff_threshold, 255, cv2.THRESH_BINARY)
+        self.frames_seen += 1
+
+        motion_mask = cv2.morphologyEx(motion_mask, cv2.MORPH_OPEN, self._kernel)
+        motion_mask = cv2.dilate(motion_mask, self._kernel, iterations=2)
+        zone_mask = self._zones_mask(zones, motion_mask.shape)
+        if zone_mask is not None:
+            motion_mask = cv2.bitwise_and(motion_mask, zone_mask)
+
+        if self.warming_up:
+            return None, motion_mask
+
+        # Area threshold in analysis pixels
+        min_area = bbox_thresh * scale * scale
+        contours, _ = cv2.findContours(motion_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        detections = []
+        for contour in contours:
+            x, y, bw, bh = cv2.boundingRect(contour)
+            if bw * bh < min_area:
+                continue
+            detections.append((int(x / scale), int(y / scale), int(bw / scale), int(bh / scale)))
+        return (detections or None), motion_mask
+
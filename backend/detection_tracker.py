@@ -0,0 +1,301 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+# --- Detect every N frames, track in between ---
+# DetectionTracker associates detections to tracks with ByteTrack's two-stage IoU matching
+# (confident detections first, then low-score ones to the tracks still unmatched), and moves
+# the tracks on frames without detection by sparse optical flow (constant velocity fallback).
+# DetectionCadence decides which frames run the detector.
+
+# Optical flow runs on a grayscale copy of the view this wide
+FLOW_WIDTH = 320
+
+# Points sampled per track for optical flow (grid over the inner part of the box)
+FLOW_GRID = 4
+
+# Scene change: mean absolute difference (0..255) of a tiny grayscale thumbnail vs the last
+# detected frame above which the detector runs early
+SCENE_CHANGE_THRESHOLD = 18.0
+_THUMB_SIZE = (64, 36)
+
+
+def result_arrays(result, classes=None):
+    """
+    (boxes Nx4 xyxy, scores N, keypoints Nx17x3 or None) of one ultralytics result,
+    keeping only the given class ids (None = all).
+    """
+    if result is None or result.boxes is None or len(result.boxes) == 0:
+        return np.empty((0, 4), np.float32), np.empty(0, np.float32), None
+    boxes = result.boxes.xyxy.cpu().numpy().astype(np.float32)
+    scores = result.boxes.conf.cpu().numpy().astype(np.float32)
+    keypoints = result.keypoints.data.cpu().numpy().astype(np.float32) if result.keypoints is not None else None
+    if classes is not None:
+        keep = np.isin(result.boxes.cls.cpu().numpy().astype(int), classes)
+        boxes, scores = boxes[keep], scores[keep]
+        keypoints = keypoints[keep] if keypoints is not None else None
+    return boxes, scores, keypoints
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of xyxy boxes, shape (len(a), len(b))."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _greedy_match(iou, min_iou):
+    """One-to-one (row, col) pairs, best overlaps first."""
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    used_rows, used_cols = set(), set()
+    for r, c in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+        if iou[r, c] < min_iou:
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((int(r), int(c)))
+    return pairs
+
+
+class Track:
+    __slots__ = ("id", "box", "score", "keypoints", "velocity", "hits", "last_seen")
+
+    def __init__(self, track_id, box, score, keypoints, frame_no):
+        self.id = track_id
+        self.box = box.astype(np.float32)
+        self.score = float(score)
+        self.keypoints = keypoints
+        self.velocity = np.zeros(2, np.float32)  # Box centre shift per frame
+        self.hits = 1
+        self.last_seen = frame_no  # Last frame a detection was matched
+
+    def shift(self, delta):
+        self.box[[0, 2]] += delta[0]
+        self.box[[1, 3]] += delta[1]
+        if self.keypoints is not None:
+            self.keypoints[:, :2] += delta
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'box': [round(float(v), 1) for v in self.box],
+            'score': round(self.score, 3),
+        }
+
+
+class DetectionTracker:
+    """
+    Keeps person tracks of one view alive between detector runs.
+
+    update() is called with the detections of a detector frame, propagate() on every other
+    frame. Both return the tracks to draw (matched at the latest detector run).
+    """
+
+    def __init__(self, high_thresh=0.5, low_thresh=0.1, match_iou=0.2, track_buffer=30, use_flow=True):
+        self.high_thresh = high_thresh  # Detections that can start tracks / match first
+        self.low_thresh = low_thresh    # Weaker detections only extend existing tracks
+        self.match_iou = match_iou
+        self.track_buffer = track_buffer  # Frames an unmatched track is kept for re-association
+        self.use_flow = use_flow
+        self.tracks = []
+        self._next_id = 1
+        self._prev_gray = None
+        self._scale = 1.0
+        self._last_frame_no = 0
+        self._last_detect_frame = 0
+        self._frame_shape = None
+
+    def _gray(self, frame):
+        h, w = frame.shape[:2]
+        self._scale = min(1.0, FLOW_WIDTH / float(w))
+        if self._scale < 1.0:
+            frame = cv2.resize(frame, (FLOW_WIDTH, max(1, int(round(h * self._scale)))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def visible(self):
+        """Tracks matched at the latest detector run."""
+        return [t for t in self.tracks if t.last_seen == self._last_detect_frame]
+
+    def update(self, frame, frame_no, boxes, scores, keypoints=None):
+        """Associates one frame's detections (xyxy boxes in view pixels) with the tracks."""
+        self._predict(frame, frame_no)
+        self._last_detect_frame = frame_no
+
+        high = np.flatnonzero(scores >= self.high_thresh)
+        low = np.flatnonzero((scores >= self.low_thresh) & (scores < self.high_thresh))
+        unmatched = list(range(len(self.tracks)))
+
+        # Stage 1: confident detections against all tracks, stage 2: weak detections against the rest
+        for candidates, new_tracks in ((high, True), (low, False)):
+            if len(candidates) == 0:
+                continue
+            track_boxes = np.array([self.tracks[i].box for i in unmatched], np.float32).reshape(-1, 4)
+            pairs = _greedy_match(iou_matrix(track_boxes, boxes[candidates]), self.match_iou)
+            matched_tracks = set()
+            matched_dets = set()
+            for r, c in pairs:
+                track = self.tracks[unmatched[r]]
+                det = candidates[c]
+                gap = max(1, frame_no - track.last_seen)
+                old_centre = (track.box[:2] + track.box[2:]) / 2
+                new_centre = (boxes[det, :2] + boxes[det, 2:]) / 2
+                if not self.use_flow:
+                    track.velocity = 0.5 * track.velocity + 0.5 * (new_centre - old_centre) / gap
+                track.box = boxes[det].astype(np.float32).copy()
+                track.score = float(scores[det])
+                track.keypoints = None if keypoints is None else keypoints[det].copy()
+                track.hits += 1
+                track.last_seen = frame_no
+                matched_tracks.add(unmatched[r])
+                matched_dets.add(c)
+            unmatched = [i for i in unmatched if i not in matched_tracks]
+            if new_tracks:
+                for c, det in enumerate(candidates):
+                    if c not in matched_dets:
+                        kps = None if keypoints is None else keypoints[det].copy()
+                        self.tracks.append(Track(self._next_id, boxes[det], scores[det], kps, frame_no))
+                        self._next_id += 1
+
+        # Forget tracks that stayed unmatched too long
+        self.tracks = [t for t in self.tracks if frame_no - t.last_seen <= self.track_buffer]
+        return self.visible()
+
+    def propagate(self, frame, frame_no):
+        """Moves the tracks to this frame without running the detector."""
+        self._predict(frame, frame_no)
+        return self.visible()
+
+    def _predict(self, frame, frame_no):
+        if frame.shape[:2] != self._frame_shape:
+            # View re-rendered at another size: old boxes are in the wrong coordinates
+            self._frame_shape = frame.shape[:2]
+            self.tracks = []
+            self._prev_gray = None
+        gray = self._gray(frame) if self.use_flow else None
+        steps = max(1, frame_no - self._last_frame_no)
+        self._last_frame_no = frame_no
+        moved = set()
+        live = self.visible()
+        if gray is not None and self._prev_gray is not None and self._prev_gray.shape == gray.shape and live:
+            moved = self._flow(live, self._prev_gray, gray)
+        for track in live:
+            if track.id not in moved:
+                track.shift(track.velocity * steps)
+        self._prev_gray = gray
+
+    def _flow(self, tracks, prev_gray, gray):
+        """Median Lucas-Kanade shift of a point grid inside each box. Returns ids of moved tracks."""
+        s = self._scale
+        offsets = (np.arange(FLOW_GRID, dtype=np.float32) + 0.5) / FLOW_GRID
+        points, owners = [], []
+        for n, track in enumerate(tracks):
+            x1, y1, x2, y2 = track.box * s
+            # Inner 60% of the box: less background, so the median follows the person
+            cx, cy, w, h = (x1 + x2) / 2, (y1 + y2) / 2, (x2 - x1) * 0.6, (y2 - y1) * 0.6
+            xs = cx - w / 2 + offsets * w
+            ys = cy - h / 2 + offsets * h
+            grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+            points.append(grid)
+            owners.extend([n] * len(grid))
+        points = np.concatenate(points).astype(np.float32).reshape(-1, 1, 2)
+        owners = np.array(owners)
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2)
+        ok = status.reshape(-1) == 1
+        shifts = (new_points - points).reshape(-1, 2)
+
+        moved = set()
+        for n, track in enumerate(tracks):
+            mask = ok & (owners == n)
+            if mask.sum() < 3:
+                continue
+            delta = np.median(shifts[mask], axis=0) / s
+            track.velocity = 0.7 * track.velocity + 0.3 * delta
+            track.shift(delta)
+            moved.add(track.id)
+        return moved
+
+
+class DetectionCadence:
+    """
+    Decides which frames of one view go to the detector: every `interval` frames, earlier on a
+    scene change, never more than `max_fps` times per second. With `adaptive`, the interval
+    grows while the measured detection latency does not fit in `budget_share` of the frame
+    budget, up to `max_interval`.
+    """
+
+    def __init__(self, interval=1, adaptive=False, max_interval=15, budget_share=0.5, max_fps=None):
+        self.interval = max(1, int(interval))
+        self.adaptive = adaptive
+        self.max_fps = max_fps
+        self.max_interval = max(self.interval, int(max_interval))
+        self.budget_share = budget_share
+        self.current = self.interval  # Interval in effect (== interval unless adaptive)
+        self.latency_ms = 0.0
+        self.detections = 0
+        self.scene_changes = 0
+        self._since = None  # Frames since the last detector run (None = never ran)
+        self._last_run = 0.0
+        self._thumb = None
+
+    def configure(self, interval=None, adaptive=None, max_fps=None):
+        if interval is not None:
+            self.interval = max(1, int(interval))
+            self.max_interval = max(self.interval, self.max_interval)
+        if adaptive is not None:
+            self.adaptive = adaptive
+        self.max_fps = max_fps
+        self.current = self.interval if not self.adaptive else max(self.interval, self.current)
+
+    def due(self, frame) -> bool:
+        """Call once per frame; True when this frame should run the detector."""
+        thumb = cv2.cvtColor(cv2.resize(frame, _THUMB_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        now = time.monotonic()
+        if self.max_fps and now - self._last_run < 1.0 / self.max_fps:
+            run = False
+        elif self._since is None or self._since + 1 >= self.current:
+            run = True
+        elif self._thumb is not None and float(cv2.absdiff(thumb, self._thumb).mean()) > SCENE_CHANGE_THRESHOLD:
+            self.scene_changes += 1
+            run = True
+        else:
+            run = False
+        if run:
+            self._since = 0
+            self._last_run = now
+            self._thumb = thumb
+            self.detections += 1
+        else:
+            self._since += 1
+        return run
+
+    def record(self, latency_ms, frame_budget_ms):
+        """Feeds the latency of one detector run (submit -> result) and re-derives the interval."""
+        self.latency_ms = latency_ms if self.detections <= 1 else 0.8 * self.latency_ms + 0.2 * latency_ms
+        if self.adaptive and frame_budget_ms > 0:
+            needed = math.ceil(self.latency_ms / (frame_budget_ms * self.budget_share))
+            self.current = min(self.max_interval, max(self.interval, needed))
+
+    def to_dict(self) -> dict:
+        return {
+            'interval': self.interval,
+            'adaptive': self.adaptive,
+            'max_fps': self.max_fps,
+            'current_interval': self.current,
+            'latency_ms': round(self.latency_ms, 1),
+            'detections': self.detections,
+            'scene_changes': self.scene_changes,
+        }
@@ -0,0 +1,249 @@
+import glob
+import os
+import shutil
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# --- Pluggable pose-detector backends ---
+# 'torch'    - the .pt weights through PyTorch (GPU when available)
+# 'onnx'     - ONNX export run by ONNX Runtime (CPUExecutionProvider on CPU nodes)
+# 'openvino' - OpenVINO IR export (fastest on Intel CPUs)
+# Exported models are written next to the .pt weights and reused; ultralytics loads every
+# format, so results (boxes, keypoints, .plot()) look the same whichever backend ran.
+# INT8 variants are statically quantized on frames from scripts/prepare_training_data.py --calib-dir.
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+DEFAULT_WEIGHTS = "yolo11m-pose.pt"
+DEFAULT_IMGSZ = 640
+
+# Upper bound on calibration images for INT8 quantization, sampled evenly over the folder
+CALIB_MAX_IMAGES = 300
+
+# Letterbox padding value ultralytics uses
+_PAD_VALUE = 114
+
+
+def cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def select_device(preference: str = "auto") -> str:
+    """'auto' -> '0' (first GPU) if CUDA is usable, else 'cpu'. Anything else is returned as is."""
+    if preference and preference != "auto":
+        return preference
+    return "0" if cuda_available() else "cpu"
+
+
+def _importable(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def select_backend(preference: str = "auto", device: str = "cpu") -> str:
+    """
+    'auto' keeps PyTorch on GPU nodes; on CPU nodes it prefers OpenVINO, then ONNX Runtime,
+    then falls back to PyTorch if neither runtime is installed.
+    """
+    if preference and preference != "auto":
+        if preference not in BACKENDS:
+            raise ValueError(f"backend must be 'auto' or one of {BACKENDS}, got {preference!r}")
+        return preference
+    if device != "cpu":
+        return "torch"
+    if _importable("openvino"):
+        return "openvino"
+    if _importable("onnxruntime"):
+        return "onnx"
+    return "torch"
+
+
+def exported_path(weights: str, backend: str, int8: bool = False) -> str:
+    """Where the export of `weights` for `backend` lives (ultralytics naming, '_int8' suffix for INT8)."""
+    if backend == "torch":
+        return weights
+    stem = os.path.splitext(weights)[0] + ("_int8" if int8 else "")
+    if backend == "onnx":
+        return stem + ".onnx"
+    return stem + "_openvino_model"
+
+
+# --- Calibration data ---
+
+def list_calibration_images(calib_dir: str, max_images: int = CALIB_MAX_IMAGES) -> List[str]:
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(calib_dir, f"*.{ext}")))
+    if not paths:
+        raise ValueError(f"No calibration images in {calib_dir}")
+    # Spread the sample over the whole recording rather than its first minutes
+    step = max(1, len(paths) // max_images)
+    return paths[::step][:max_images]
+
+
+def preprocess(image, imgsz: int = DEFAULT_IMGSZ) -> np.ndarray:
+    """BGR image -> 1x3xSxS float32 RGB tensor in [0, 1], letterboxed like ultralytics does."""
+    h, w = image.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), _PAD_VALUE, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor[np.newaxis]
+
+
+def _calibration_tensors(calib_dir: str, imgsz: int):
+    for path in list_calibration_images(calib_dir):
+        image = cv2.imread(path)
+        if image is not None:
+            yield preprocess(image, imgsz)
+
+
+def _head_index(weights: str) -> int:
+    """Module index of the pose head (its decode math must stay in float)."""
+    from ultralytics import YOLO
+    return len(YOLO(weights).model.model) - 1
+
+
+# --- Export ---
+
+def export_model(weights: str, backend: str, imgsz: int = DEFAULT_IMGSZ, int8: bool = False,
+                 calib_dir: Optional[str] = None) -> str:
+    """
+    Exports `weights` for `backend` (dynamic batch) and returns the model path. With int8,
+    the float export is quantized on the calibration images in `calib_dir`.
+    """
+    if backend == "torch":
+        return weights
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    if int8 and not calib_dir:
+        raise ValueError("INT8 export needs calibration images (calib_dir)")
+
+    from ultralytics import YOLO
+
+    float_path = exported_path(weights, backend)
+    if not os.path.exists(float_path):
+        print(f"[Detector] Exporting {weights} to {backend} (imgsz {imgsz})...")
+        exported = YOLO(weights).export(format=backend, imgsz=imgsz, dynamic=True, half=False)
+        if os.path.abspath(exported) != os.path.abspath(float_path):
+            shutil.move(exported, float_path)
+    if not int8:
+        return float_path
+
+    int8_path = exported_path(weights, backend, int8=True)
+    print(f"[Detector] Quantizing {float_path} to INT8 with images from {calib_dir}...")
+    if backend == "onnx":
+        _quantize_onnx(float_path, int8_path, calib_dir, imgsz, _head_index(weights))
+    else:
+        _quantize_openvino(float_path, int8_path, calib_dir, imgsz, _head_index(weights))
+    return int8_path
+
+
+def _quantize_onnx(float_path: str, int8_path: str, calib_dir: str, imgsz: int, head: int):
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+
+    model = onnx.load(float_path)
+    input_name = model.graph.input[0].name
+    # Keep the head's box/keypoint decoding (Add/Mul/Sigmoid/...) in float; only its convs go INT8
+    exclude = [node.name for node in model.graph.node
+               if node.name.startswith(f"/model.{head}/") and node.op_type != "Conv"]
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._tensors = _calibration_tensors(calib_dir, imgsz)
+
+        def get_next(self):
+            tensor = next(self._tensors, None)
+            return None if tensor is None else {input_name: tensor}
+
+    quantize_static(
+        float_path, int8_path, FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=exclude,
+    )
+
+    # ultralytics reads task/names/kpt_shape/imgsz from the model metadata
+    quantized = onnx.load(int8_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(model.metadata_props)
+    onnx.save(quantized, int8_path)
+
+
+def _quantize_openvino(float_dir: str, int8_dir: str, calib_dir: str, imgsz: int, head: int):
+    import nncf
+    import openvino as ov
+
+    xml_path = glob.glob(os.path.join(float_dir, "*.xml"))[0]
+    model = ov.Core().read_model(xml_path)
+    # Same split as ultralytics' own OpenVINO INT8 export: decode ops of the head stay float
+    head_name = f"model.{head}"
+    ignored_scope = nncf.IgnoredScope(
+        patterns=[f".*{head_name}/.*/Add", f".*{head_name}/.*/Sub*", f".*{head_name}/.*/Mul*",
+                  f".*{head_name}/.*/Div*", f".*{head_name}\\.dfl.*"],
+        types=["Sigmoid"],
+    )
+    dataset = nncf.Dataset(list(_calibration_tensors(calib_dir, imgsz)))
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED, ignored_scope=ignored_scope)
+
+    os.makedirs(int8_dir, exist_ok=True)
+    ov.save_model(quantized, os.path.join(int8_dir, os.path.basename(xml_path)))
+    metadata = os.path.join(float_dir, "metadata.yaml")
+    if os.path.exists(metadata):
+        shutil.copy(metadata, int8_dir)
+
+
+# --- Runtime ---
+
+def load_predict(backend: str = "auto", weights: str = DEFAULT_WEIGHTS, device: str = "auto",
+                 imgsz: int = DEFAULT_IMGSZ, int8: bool = False, conf: float = 0.5,
+                 export_missing: bool = True) -> tuple:
+    """
+    Loads the pose model for the chosen backend and returns (predict, info).
+    predict(list of BGR images) -> list of ultralytics Results (all classes of the model;
+    callers filter by class and confidence).
+    A missing float export is created on the fly; a missing INT8 export falls back to float
+    (quantization needs calibration images, see scripts/export_detector.py).
+    """
+    from ultralytics import YOLO
+
+    device = select_device(device)
+    backend = select_backend(backend, device)
+    if backend == "torch":
+        int8 = False
+
+    path = exported_path(weights, backend, int8)
+    if int8 and not os.path.exists(path):
+        print(f"[Detector] {path} not found, using the float {backend} model (run scripts/export_detector.py --int8)")
+        int8 = False
+        path = exported_path(weights, backend)
+    if not os.path.exists(path) and backend != "torch":
+        if not export_missing:
+            raise FileNotFoundError(path)
+        path = export_model(weights, backend, imgsz)
+
+    model = YOLO(path, task="pose")
+    # Exported runtimes run on CPU here; only PyTorch takes a CUDA device
+    run_device = device if backend == "torch" else "cpu"
+
+    def predict(images: list) -> list:
+        return model(images, conf=conf, imgsz=imgsz, verbose=False, device=run_device)
+
+    info = {'backend': backend, 'device': run_device, 'model': path, 'int8': int8, 'imgsz': imgsz}
+    print(f"[Detector] {backend}{' INT8' if int8 else ''} on {run_device}: {path}")
+    return predict, info
@@ -0,0 +1,472 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+# Read policies
+LATEST = "latest"  # Live sources: keep only the newest frames, drop the oldest when the consumer lags
+ALL = "all"        # Files / batch jobs: every frame is delivered, decoding waits for the consumer
+POLICIES = (LATEST, ALL)
+
+# How often a blocked decoder re-checks for release()
+_PUT_POLL_S = 0.1
+# release() waits this long for a decoder stuck in a network read, then leaves the
+# capture to be released by the decoder thread when that read returns
+RELEASE_TIMEOUT_S = 2.0
+
+# Decoders: 'opencv' (cv2.VideoCapture), 'pyav' (optional PyAV: decode + swscale straight to
+# the target size) or 'auto' (PyAV when frames are scaled down / keyframes-only and it is installed)
+DECODERS = ("auto", "opencv", "pyav")
+
+# Live sources: open/read timeouts (a dead camera must not hang the decoder forever) and
+# reconnect backoff, doubling from RECONNECT_MIN_S up to RECONNECT_MAX_S
+LIVE_OPEN_TIMEOUT_S = 5.0
+LIVE_READ_TIMEOUT_S = 5.0
+RECONNECT_MIN_S = 0.5
+RECONNECT_MAX_S = 30.0
+# RTSP over TCP: no smeared frames from lost UDP packets (OpenCV's FFmpeg backend reads this
+# variable on every open; an explicit setting wins)
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp")
+
+# Reader states
+CONNECTING, STREAMING, RECONNECTING, ENDED = "connecting", "streaming", "reconnecting", "ended"
+
+_END = object()  # Queued after the last frame
+
+# PyAV fallbacks already reported (None = PyAV not installed, else the source), so reconnects
+# and every new source do not repeat the same warning
+_FALLBACKS_LOGGED = set()
+
+
+def is_live_source(source) -> bool:
+    """True for network streams / devices (rtsp://, http://, camera index), False for files."""
+    return isinstance(source, int) or "://" in str(source)
+
+
+def scaled_size(width: int, height: int, max_width: int):
+    """(width, height) fitting max_width with the aspect ratio kept (even sizes), or None if it already fits."""
+    if not max_width or width <= max_width:
+        return None
+    return max_width - max_width % 2, max(2, int(round(height * max_width / width / 2)) * 2)
+
+
+class PyAVCapture:
+    """
+    The part of the cv2.VideoCapture interface FrameReader uses, backed by PyAV (FFmpeg).
+
+    Frames are converted from the decoder's YUV straight to BGR (at most max_width wide) in
+    one swscale pass, so a 4K source never exists as a full-resolution BGR array. grab()
+    decodes without converting. keyframes_only makes the decoder skip every non-key frame.
+    """
+
+    def __init__(self, source, max_width=0, keyframes_only=False, live=False):
+        import av  # Optional dependency (pip install av)
+
+        if live:
+            self.container = av.open(str(source), options={'rtsp_transport': 'tcp'},
+                                     timeout=(LIVE_OPEN_TIMEOUT_S, LIVE_READ_TIMEOUT_S))
+        else:
+            self.container = av.open(str(source))
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"  # Frame + slice threads
+        if keyframes_only:
+            self.stream.codec_context.skip_frame = "NONKEY"
+        codec = self.stream.codec_context
+        self.size = scaled_size(codec.width, codec.height, max_width) or (codec.width, codec.height)
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0)
+        self.frame_count = int(self.stream.frames or 0)
+        self._frames = self.container.decode(self.stream)
+        self._frame = None
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.size[0],
+            cv2.CAP_PROP_FRAME_HEIGHT: self.size[1],
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+        }.get(prop, 0)
+
+    def frame_time(self):
+        """Timestamp (seconds) of the last grabbed frame, or None if unknown."""
+        frame = self._frame
+        return float(frame.time) if frame is not None and frame.time is not None else None
+
+    def frame_index(self):
+        """Index of the last grabbed frame (from its timestamp, so skipped frames are counted)."""
+        frame = self._frame
+        if frame is None or frame.pts is None or not self.fps:
+            return None
+        return int(round(float(frame.pts * self.stream.time_base) * self.fps))
+
+    def grab(self) -> bool:
+        try:
+            self._frame = next(self._frames)
+            return True
+        except (StopIteration, EOFError):
+            self._frame = None
+            return False
+
+    def retrieve(self):
+        if self._frame is None:
+            return False, None
+        width, height = self.size
+        return True, self._frame.to_ndarray(width=width, height=height, format="bgr24")
+
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES or value != 0:
+            return False
+        # Only rewinding is needed (looping files)
+        self.container.seek(0, stream=self.stream)
+        self._frames = self.container.decode(self.stream)
+        return True
+
+    def release(self):
+        if self._opened:
+            self._opened = False
+            self.container.close()
+
+
+def _open_opencv(source, live):
+    if not live or isinstance(source, int):
+        return cv2.VideoCapture(source)
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(LIVE_OPEN_TIMEOUT_S * 1000),
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(LIVE_READ_TIMEOUT_S * 1000),
+    ])
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Honoured by some backends; the decoder thread drains the rest
+    return cap
+
+
+def _open_capture(source, decoder, max_width, keyframes_only, live=False):
+    """(capture, size or None). size is set when frames still need a cv2.resize after decoding."""
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown decoder '{decoder}', expected one of {DECODERS}")
+    cap = None
+    if decoder != "pyav":
+        cap = _open_opencv(source, live)
+        size = scaled_size(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), max_width)
+        # PyAV only pays off when frames are scaled down or non-key frames skipped
+        if decoder == "opencv" or isinstance(source, int) or not (size or keyframes_only):
+            return cap, size
+    try:
+        pyav_cap = PyAVCapture(source, max_width, keyframes_only, live)
+    except Exception as e:
+        if cap is None:
+            raise
+        not_installed = isinstance(e, ImportError)
+        if (None if not_installed else source) not in _FALLBACKS_LOGGED:
+            _FALLBACKS_LOGGED.add(None if not_installed else source)
+            if not_installed:
+                print("[Decoder] PyAV not installed (pip install av): scaled decodes fall back to OpenCV + resize")
+            else:
+                print(f"[Decoder] PyAV unavailable for {source} ({e}), decoding full frames with OpenCV")
+        return cap, size
+    if cap is not None:
+        cap.release()
+    return pyav_cap, None
+
+
+class FrameReader:
+    """
+    cv2.VideoCapture with decode-ahead: a decoder thread fills a bounded queue while the
+    caller processes the previous frame, so decode time overlaps with processing instead
+    of adding to it. read() has the same (ret, frame) contract as VideoCapture.read().
+
+    policy LATEST drops the oldest queued frame when the queue is full (live use: always
+    process the most recent picture); ALL blocks the decoder instead (no frame is lost).
+    With loop=True the source rewinds at its end (files played as endless streams).
+    queue_size=0 decodes inline on read() (no thread), for comparison and debugging.
+
+    Frames that would be thrown away are not fully decoded: stride=N returns every Nth frame
+    and only grab()s the others (no pixel conversion), keyframes_only (PyAV) lets the decoder
+    skip non-key frames, and max_width delivers frames no wider than that (PyAV scales while
+    converting out of YUV; with OpenCV the frame is resized on the decoder thread).
+    `position` is the source frame index of the frame last returned by read() and `pts`
+    its timestamp; skip_to() lets a consumer that fell behind real time catch up.
+
+    With reconnect=True (live streams) a source that fails to open, errors or stops
+    delivering (read timeout) is reopened with exponential backoff instead of ending;
+    `state`, `last_frame_at` and `reconnects` describe its health.
+    """
+
+    def __init__(self, source, policy: str = ALL, queue_size: int = 4, loop: bool = False, name: str = "decoder",
+                 stride: int = 1, max_width: int = 0, decoder: str = "auto", keyframes_only: bool = False,
+                 reconnect: bool = False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown read policy '{policy}', expected one of {POLICIES}")
+        self.source = source
+        self.policy = policy
+        self.loop = loop
+        self.stride = max(1, int(stride))
+        self.reconnect = reconnect
+        self._open_args = (decoder, max_width, keyframes_only, is_live_source(source))
+        self.cap, self._resize_to = _open_capture(source, *self._open_args)
+        self._read_properties()
+        self.state = CONNECTING
+        self.reconnects = 0
+        self.last_frame_at = None  # time.monotonic() of the last decoded frame
+        self.last_error = None if self.cap.isOpened() else "open failed"
+        self._backoff = RECONNECT_MIN_S
+        self._ready = threading.Event()  # Set once the first frame is decoded
+        self.position = -1
+        self.pts = 0.0  # Timestamp (seconds) of the frame last returned; keeps increasing across loops
+        self.decoded_at = None  # time.monotonic() when that frame finished decoding
+        self._next_index = 0  # Source index of the next frame the capture delivers
+        self._pts_offset = 0.0  # Length of the loops played so far
+        self._last_pts = 0.0
+        self._skip_until = 0.0  # skip_to() target
+
+        self.ended = False     # Source exhausted (or failed) and every decoded frame was read
+        self.decoded = 0
+        self.dropped = 0       # LATEST only: decoded frames the consumer never saw
+        self.rewinds = 0
+        self.skipped = 0       # Frames grabbed but not converted (stride)
+        self.dropped_late = 0  # Frames skipped to catch up (skip_to)
+        self.decode_ms = 0.0   # Moving average per frame
+        self.wait_ms = 0.0     # Moving average the consumer blocked in read()
+
+        self._stop = threading.Event()
+        self._release_lock = threading.Lock()
+        self._orphaned = False  # release() gave up waiting; the decoder releases the capture
+        self._finished = False  # Decoder thread is done with the capture
+        self._queue = queue.Queue(maxsize=queue_size) if queue_size > 0 else None
+        self._thread = None
+        if self._queue is not None and (self.cap.isOpened() or reconnect):
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def _read_properties(self):
+        """Size / rate of the current capture (the decoder thread owns it after startup)."""
+        self.decoder = "pyav" if isinstance(self.cap, PyAVCapture) else "opencv"
+        self.width, self.height = self._resize_to or (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                                      int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def isOpened(self) -> bool:
+        # A reconnecting reader counts as open: it keeps trying until release()
+        return self.cap.isOpened() or (self.reconnect and self._thread is not None)
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Blocks until the first frame has been decoded (width/height are then known). False on timeout."""
+        return self._ready.wait(timeout)
+
+    def _reopen(self) -> bool:
+        """Reconnects with exponential backoff until the source opens again. False once released."""
+        self.cap.release()
+        while not self._stop.is_set():
+            self.state = RECONNECTING
+            print(f"[Decoder] {self.source}: {self.last_error or 'no frames'}, reconnecting in {self._backoff:.1f}s")
+            if self._stop.wait(self._backoff):
+                return False
+            self._backoff = min(self._backoff * 2, RECONNECT_MAX_S)
+            self.reconnects += 1
+            try:
+                cap, resize_to = _open_capture(self.source, *self._open_args)
+            except Exception as e:
+                self.last_error = str(e)
+                continue
+            if cap.isOpened():
+                self.cap, self._resize_to = cap, resize_to
+                self._read_properties()
+                return True
+            cap.release()
+            self.last_error = "open failed"
+        return False
+
+    def _media_time(self, index) -> float:
+        """Presentation time (seconds from the start of the source) of the frame just grabbed."""
+        if self.decoder == "pyav":
+            pts = self.cap.frame_time()
+            if pts is not None:
+                return pts
+        if self.fps:
+            return index / self.fps
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def _read_next(self):
+        """
+        (index, pts, frame) of the next frame to deliver, or None at the end. Frames inside
+        the stride and frames before the skip_to() target are only grabbed.
+        """
+        grabbed = 0
+        while True:
+            if not self.cap.grab():
+                return None
+            grabbed += 1
+            index = self.cap.frame_index() if self.decoder == "pyav" else None
+            index = self._next_index if index is None else index
+            self._next_index = index + 1
+            if grabbed < self.stride:
+                self.skipped += 1
+                continue
+            pts = self._pts_offset + self._media_time(index)
+            if pts < self._skip_until:
+                self.dropped_late += 1
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                return None
+            self._last_pts = pts
+            return index, pts, frame
+
+    def _decode(self):
+        """(index, pts, decoded_at, frame) of the next frame to deliver (rewinding if looping), or None at the end."""
+        start = time.perf_counter()
+        item = self._read_next()
+        if item is None and self.loop and not self._stop.is_set():
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.rewinds += 1
+            self._next_index = 0
+            # Timestamps keep counting up across loops, so pacing sees one endless stream
+            self._pts_offset = self._last_pts + (1.0 / self.fps if self.fps else 0.0)
+            item = self._read_next()  # Still nothing: empty or broken source
+        if item is None:
+            return None
+        index, pts, frame = item
+        if self._resize_to is not None:
+            frame = cv2.resize(frame, self._resize_to, interpolation=cv2.INTER_AREA)
+        ms = (time.perf_counter() - start) * 1000
+        self.decode_ms = ms if self.decoded == 0 else 0.9 * self.decode_ms + 0.1 * ms
+        self.decoded += 1
+        return index, pts, time.monotonic(), frame
+
+    def skip_to(self, pts: float):
+        """
+        Catch up: frames with a timestamp before `pts` (seconds, as in `self.pts`) are
+        discarded, and the decoder only grab()s them (no pixel conversion) until it passes it.
+        """
+        self._skip_until = max(self._skip_until, pts)
+
+    def _put(self, item):
+        if self.policy == LATEST:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+            return
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_PUT_POLL_S)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            if self.reconnect and not self.cap.isOpened() and not self._reopen():
+                return
+            while not self._stop.is_set():
+                try:
+                    item = self._decode()
+                except Exception as e:
+                    if not self.reconnect:
+                        raise
+                    item, self.last_error = None, str(e)
+                if item is None:
+                    if not self.reconnect:
+                        break
+                    if self.state == STREAMING:
+                        self.last_error = "stream stalled or closed"
+                    if not self._reopen():
+                        break
+                    continue
+                if self.state != STREAMING:
+                    self.state = STREAMING
+                    self.last_error = None
+                    self._backoff = RECONNECT_MIN_S  # Delivering again: the next outage starts with a short wait
+                    # The real size (streams often report none, and may come back with another one)
+                    self.height, self.width = item[3].shape[:2]
+                    self._ready.set()
+                self.last_frame_at = time.monotonic()
+                self._put(item)
+        except Exception as e:
+            print(f"[Decoder] {self.source}: {e}")
+        finally:
+            self.state = ENDED
+            self._put(_END)
+            with self._release_lock:
+                self._finished = True
+                if self._orphaned:
+                    self.cap.release()
+
+    def read(self, timeout: float = None):
+        """(True, frame), or (False, None) at the end of the source or if nothing arrived within `timeout`."""
+        if self.ended:
+            return False, None
+        if self._queue is None:
+            item = self._decode() if self.cap.isOpened() else None
+            if item is None:
+                self.ended = True
+                return False, None
+            self.position, self.pts, self.decoded_at, frame = item
+            return True, frame
+        start = time.perf_counter()
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return False, None
+            if item is _END:
+                self.ended = True
+                return False, None
+            if item[1] >= self._skip_until:
+                break
+            self.dropped_late += 1  # Decoded before a skip_to() that it is now behind
+        ms = (time.perf_counter() - start) * 1000
+        self.wait_ms = 0.9 * self.wait_ms + 0.1 * ms
+        self.position, self.pts, self.decoded_at, frame = item
+        return True, frame
+
+    def release(self):
+        """Stops the decoder thread and releases the capture."""
+        self._stop.set()
+        if self._thread is not None:
+            deadline = time.perf_counter() + RELEASE_TIMEOUT_S
+            # Unblock a decoder waiting on a full queue
+            while self._thread.is_alive() and time.perf_counter() < deadline:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(_PUT_POLL_S)
+            with self._release_lock:
+                if not self._finished:
+                    print(f"[Decoder] {self.source}: decoder still busy, releasing it in the background")
+                    self._orphaned = True
+                    return
+        self.cap.release()
+
+    def stats(self) -> dict:
+        return {
+            'policy': self.policy,
+            'state': self.state,
+            'decoder': self.decoder,
+            'size': [self.width, self.height],
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'decoded': self.decoded,
+            'dropped': self.dropped,
+            'rewinds': self.rewinds,
+            'skipped': self.skipped,
+            'dropped_late': self.dropped_late,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error,
+            'last_frame_age_s': round(time.monotonic() - self.last_frame_at, 1) if self.last_frame_at else None,
+            'decode_ms': round(self.decode_ms, 2),
+            'wait_ms': round(self.wait_ms, 2),
+        }
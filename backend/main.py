@@ -1,9 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import camera_router
+from app.core.config import PRODUCER_MODE, WARMUP
+from app.routers import camera_router, system_router
+from app.services.resources import RESOURCES
+from app.services.source_watchdog import WATCHDOG
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy resources load in the background; the API serves requests right away.
+    # In process mode the model and encoder are only used by the workers, which warm up their own.
+    if WARMUP and PRODUCER_MODE != "process":
+        RESOURCES.warm_up()
+    # Reports (and logs) watched sources that stopped delivering frames
+    WATCHDOG.start()
+    yield
+
 
 # Initialize App
-app = FastAPI(title="CV-UI Backend", version="1.0.0")
+app = FastAPI(title="CV-UI Backend", version="1.0.0", lifespan=lifespan)
 
 # Input/Output Config (Optional: Check folders)
 # BASE_DIR... UPLOAD_DIR... (Handled in router currently, ideally in config)
@@ -19,6 +36,7 @@ app.add_middleware(
 
 # --- Include Routers ---
 app.include_router(camera_router.router)
+app.include_router(system_router.router)
 
 if __name__ == "__main__":
     import uvicorn
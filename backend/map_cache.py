@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import FisheyeToPlanar
+
+# --- Persistent dewarp map cache ---
+# Remap maps depend only on lens/view geometry, so they are content-addressed by their
+# parameters and stored as .npy files. Loads use mmap_mode='r': pages come from the OS
+# page cache and are shared by every producer (and process) using the same geometry.
+
+# Bump when the map math in FisheyeToPlanar changes, so stale files are not reused
+MAP_VERSION = 2
+
+CACHE_DIR = os.environ.get(
+    "CV_MAP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cv-project", "dewarp_maps"),
+)
+# Set CV_MAP_CACHE=0 to always recompute (in-process reuse still applies)
+CACHE_ENABLED = os.environ.get("CV_MAP_CACHE", "1") != "0"
+
+# In-process LRU: key -> (map_x, map_y), shared across producers in this process.
+# Bounded so interactive PTZ cannot grow it forever; recently used views (presets) stay hot.
+# MEMORY_MB caps the maps held in process memory (PTZ maps are not persisted, ~7.4 MB per
+# 1280x720 view); memory-mapped maps live in the shared page cache and only count as entries.
+MEMORY_ENTRIES = int(os.environ.get("CV_MAP_CACHE_ENTRIES", "64"))
+MEMORY_MB = float(os.environ.get("CV_MAP_CACHE_MB", "256"))
+_MAPS = OrderedDict()
+_BYTES = 0  # Process memory held by _MAPS
+_LOCK = threading.Lock()
+# One lock per key being generated, so concurrent producers with the same geometry compute
+# it once while unrelated geometry (another camera, a PTZ move) is generated in parallel.
+# key -> [lock, number of callers holding or waiting for it]; removed when unused.
+_KEY_LOCKS = {}
+
+
+def map_key(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw_deg, pitch_deg, roll_deg, rotate_180=False) -> str:
+    """Content address of one remap map."""
+    params = {
+        'v': MAP_VERSION,
+        'fisheye_shape': [int(x) for x in fisheye_shape[:2]],
+        'output_shape': [int(x) for x in output_shape[:2]],
+        'i_fov': float(i_fov_deg),
+        'o_fov': float(o_fov_deg),
+        'yaw': float(yaw_deg),
+        'pitch': float(pitch_deg),
+        'roll': float(roll_deg),
+        'rotate_180': bool(rotate_180),
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"remap_{key}.npy")
+
+
+def _load(path: str):
+    maps = np.load(path, mmap_mode='r')
+    if maps.ndim != 3 or maps.shape[0] != 2 or maps.dtype != np.float32:
+        raise ValueError(f"unexpected map layout {maps.shape} {maps.dtype}")
+    return maps[0], maps[1]
+
+
+def _save(path: str, map_x, map_y):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temp file and rename, so readers never see a partial map
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.stack([map_x, map_y]).astype(np.float32, copy=False))
+    os.replace(tmp_path, path)
+
+
+def get_remap_maps(fisheye_shape, i_fov_deg, views, rotate_180=False, persist=True):
+    """
+    Batched lookup. `views` is a list of (output_shape, yaw_deg, pitch_deg, roll_deg, o_fov_deg).
+    Returns one read-only float32 (map_x, map_y) pair per view, memory-mapped from the disk cache
+    when possible. Misses are generated together by FisheyeToPlanar.create_remap_maps_batch
+    (one pass per output size).
+    With rotate_180 the maps yield the view already rotated by 180 degrees (no cv2.rotate pass).
+    persist=False keeps newly generated maps in memory only (used for ad-hoc PTZ positions,
+    so the disk cache is not filled with every intermediate pan/zoom step).
+    """
+    keys = [map_key(fisheye_shape, output_shape, i_fov_deg, o_fov_deg, yaw, pitch, roll, rotate_180)
+            for output_shape, yaw, pitch, roll, o_fov_deg in views]
+    with _LOCK:
+        results = [_lru_get(key) for key in keys]
+    # Disk hits need no generation lock: loading is a cheap mmap
+    for n, key in enumerate(keys):
+        if results[n] is None:
+            results[n] = _load_cached(key)
+    pending = [n for n, maps in enumerate(results) if maps is None]
+
+    if pending:
+        pending_keys = sorted({keys[n] for n in pending})
+        locks = _acquire_key_locks(pending_keys)
+        try:
+            missing = {}  # output_shape -> [(key, view params)]
+            done = {}  # key -> maps
+            seen = set()
+            for n in pending:
+                key = keys[n]
+                if key in seen:
+                    continue  # Same view requested twice in this batch
+                seen.add(key)
+                # Another producer may have finished it while we waited for the lock
+                with _LOCK:
+                    maps = _lru_get(key)
+                if maps is None:
+                    maps = _load_cached(key)
+                if maps is not None:
+                    done[key] = maps
+                    continue
+                output_shape, yaw, pitch, roll, o_fov_deg = views[n]
+                missing.setdefault(tuple(output_shape[:2]), []).append((key, (yaw, pitch, roll, o_fov_deg)))
+
+            for output_shape, entries in missing.items():
+                t0 = time.time()
+                generated = FisheyeToPlanar.create_remap_maps_batch(
+                    fisheye_shape, output_shape, i_fov_deg, [params for _, params in entries], rotate_180=rotate_180
+                )
+                print(f"[MapCache] Computed {len(entries)} map(s) at {output_shape[1]}x{output_shape[0]} "
+                      f"in {(time.time() - t0) * 1000:.0f}ms")
+                for (key, _), (map_x, map_y) in zip(entries, generated):
+                    done[key] = (map_x, map_y)
+                    if CACHE_ENABLED and persist:
+                        try:
+                            _save(_path(key), map_x, map_y)
+                            done[key] = _load(_path(key))
+                        except Exception as e:
+                            print(f"[MapCache] Could not persist {_path(key)}: {e}")
+                # Publish before releasing the key locks, so waiters find them in the LRU
+                with _LOCK:
+                    for key, _ in entries:
+                        _lru_put(key, done[key])
+            for n in pending:
+                results[n] = done[keys[n]]
+        finally:
+            _release_key_locks(pending_keys, locks)
+
+    with _LOCK:
+        for key, maps in zip(keys, results):
+            _lru_put(key, maps)
+        # Never evict the maps just requested (the caller is about to use them)
+        while len(_MAPS) > len(keys) and (len(_MAPS) > MEMORY_ENTRIES or _BYTES > MEMORY_MB * 1024 * 1024):
+            _lru_evict()
+    return results
+
+
+def _load_cached(key: str):
+    """Maps of `key` from the disk cache, or None."""
+    path = _path(key)
+    if not CACHE_ENABLED or not os.path.exists(path):
+        return None
+    try:
+        return _load(path)
+    except Exception as e:
+        print(f"[MapCache] Ignoring unreadable {path}: {e}")
+        return None
+
+
+def _acquire_key_locks(keys):
+    """Locks every key in `keys` (sorted, so overlapping batches cannot deadlock)."""
+    with _LOCK:
+        entries = [_KEY_LOCKS.setdefault(key, [threading.Lock(), 0]) for key in keys]
+        for entry in entries:
+            entry[1] += 1
+    locks = [entry[0] for entry in entries]
+    for lock in locks:
+        lock.acquire()
+    return locks
+
+
+def _release_key_locks(keys, locks):
+    for lock in locks:
+        lock.release()
+    with _LOCK:
+        for key in keys:
+            entry = _KEY_LOCKS[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _KEY_LOCKS[key]
+
+
+def _memory_bytes(maps) -> int:
+    """Process memory of a map pair (0 for memory-mapped files)."""
+    return sum(m.nbytes for m in maps if not isinstance(m, np.memmap))
+
+
+def _lru_put(key: str, maps):
+    """Caller holds _LOCK."""
+    global _BYTES
+    previous = _MAPS.pop(key, None)
+    if previous is not None:
+        _BYTES -= _memory_bytes(previous)
+    _MAPS[key] = maps
+    _BYTES += _memory_bytes(maps)
+
+
+def _lru_evict():
+    """Drops the least recently used entry. Caller holds _LOCK."""
+    global _BYTES
+    _, maps = _MAPS.popitem(last=False)
+    _BYTES -= _memory_bytes(maps)
+
+
+def _lru_get(key: str):
+    """Caller holds _LOCK."""
+    maps = _MAPS.get(key)
+    if maps is not None:
+        _MAPS.move_to_end(key)
+    return maps
+
+
+def memory_stats() -> dict:
+    with _LOCK:
+        return {'entries': len(_MAPS), 'memory_mb': round(_BYTES / (1024 * 1024), 1), 'limit_mb': MEMORY_MB}
@@ -1,3 +1,9 @@
+import cv2
 
-def add_motion_alert_border(frame):
+
+def add_motion_alert_border(frame, color=(0, 0, 255), thickness=6):
+    """Draws a coloured border around the view (in place) to flag motion. Returns the frame."""
+    h, w = frame.shape[:2]
+    cv2.rectangle(frame, (0, 0), (w - 1, h - 1), color, thickness)
     return frame
+
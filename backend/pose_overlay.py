@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+
+# COCO-17 keypoint skeleton (0 nose, 1-4 eyes/ears, 5-10 arms, 11-16 hips/legs)
+SKELETON = np.array([
+    (15, 13), (13, 11), (16, 14), (14, 12), (11, 12),        # legs + hips
+    (5, 11), (6, 12), (5, 6),                                # torso
+    (5, 7), (6, 8), (7, 9), (8, 10),                         # arms
+    (1, 2), (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6),  # head
+], dtype=np.intp)
+
+# BGR colour per body part; limbs and keypoints of one part are drawn with a single call
+PART_COLORS = {
+    'legs': (255, 128, 0),
+    'torso': (255, 51, 255),
+    'arms': (51, 153, 255),
+    'head': (0, 255, 0),
+}
+_EDGE_PARTS = ['legs'] * 5 + ['torso'] * 3 + ['arms'] * 4 + ['head'] * 7
+_KEYPOINT_PARTS = ['head'] * 5 + ['arms'] * 6 + ['legs'] * 6
+
+# Precomputed index arrays: edges / keypoints of each part
+EDGE_GROUPS = [(PART_COLORS[p], SKELETON[[i for i, e in enumerate(_EDGE_PARTS) if e == p]]) for p in PART_COLORS]
+KEYPOINT_GROUPS = [(PART_COLORS[p], np.array([i for i, k in enumerate(_KEYPOINT_PARTS) if k == p], np.intp))
+                   for p in PART_COLORS if p in _KEYPOINT_PARTS]
+
+BOX_COLOR = (0, 255, 0)
+KEYPOINT_RADIUS = 3
+LIMB_THICKNESS = 2
+
+
+def _stack_keypoints(tracks):
+    """Nx17x3 keypoints of the tracks that have them (None if none do)."""
+    keypoints = [t.keypoints for t in tracks if t.keypoints is not None and len(t.keypoints) == len(_KEYPOINT_PARTS)]
+    return np.stack(keypoints) if keypoints else None
+
+
+def draw_tracks(img, tracks, color=BOX_COLOR, keypoint_conf=0.5, labels=True):
+    """
+    Draws track boxes, ids and pose skeletons in place and returns the image.
+
+    Unlike Results.plot() nothing is copied and the per-frame Python work does not grow with
+    the number of limbs: all boxes go into one polylines call, each body part's limbs into
+    one more, and keypoints are drawn as zero-length thick lines (round caps) per part.
+    """
+    if not tracks:
+        return img
+    boxes = np.array([t.box for t in tracks], np.float32).round().astype(np.int32)
+    corners = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+    cv2.polylines(img, list(corners), True, color, 2)
+    if labels:
+        for track, (x1, y1, _, _) in zip(tracks, boxes):
+            cv2.putText(img, f"#{track.id}", (int(x1), max(12, int(y1) - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1,
+                        cv2.LINE_AA)
+
+    keypoints = _stack_keypoints(tracks)
+    if keypoints is None:
+        return img
+    points = keypoints[..., :2].round().astype(np.int32)
+    visible = keypoints[..., 2] >= keypoint_conf
+
+    for part_color, edges in EDGE_GROUPS:
+        # Person x edge pairs where both ends are visible
+        ok = visible[:, edges[:, 0]] & visible[:, edges[:, 1]]
+        if ok.any():
+            segments = np.stack((points[:, edges[:, 0]], points[:, edges[:, 1]]), axis=2)[ok]
+            cv2.polylines(img, list(segments), False, part_color, LIMB_THICKNESS)
+    for part_color, indices in KEYPOINT_GROUPS:
+        dots = points[:, indices][visible[:, indices]]
+        if len(dots):
+            cv2.polylines(img, list(np.repeat(dots[:, None], 2, axis=1)), False, part_color, 2 * KEYPOINT_RADIUS)
+    return img
+
+
+def tracks_to_meta(tracks, shape, keypoint_conf=0.5) -> dict:
+    """
+    Compact, JSON-serializable detections of one view for clients that draw them themselves.
+
+    Coordinates are integer pixels of a `w` x `h` frame (the view as detected, which can be
+    larger than the streamed JPEG; clients scale by their own size). Keypoints are flattened
+    to [x, y, visible, ...] in COCO order, visible = confidence >= keypoint_conf.
+    """
+    people = []
+    for track in tracks:
+        person = {
+            'id': track.id,
+            'box': [int(round(float(v))) for v in track.box],
+            'score': round(track.score, 2),
+        }
+        if track.keypoints is not None:
+            kp = track.keypoints
+            person['kp'] = np.column_stack((kp[:, :2].round(), kp[:, 2] >= keypoint_conf)).astype(int).ravel().tolist()
+        people.append(person)
+    return {'w': int(shape[1]), 'h': int(shape[0]), 'people': people}
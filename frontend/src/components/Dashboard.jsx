@@ -11,6 +11,9 @@ const RECENT_DETECTIONS = [
     { id: 3, type: 'Person', time: '10:39 AM', camera: 'Corridor B', image: '/hallway.png', person: 'Visitor' },
 ];
 
+// Show a "behind real time" badge from this producer lag on
+const LAG_WARNING_MS = 200;
+
 const CameraFeedCard = ({ camera }) => {
     const [stats, setStats] = useState({ fps: 0 });
     const wsUrl = getWSUrl(`/ws/${camera.id}`);
@@ -18,7 +21,7 @@ const CameraFeedCard = ({ camera }) => {
     return (
         <div className="relative group overflow-hidden bg-black rounded-sm border border-border/50 h-full w-full flex items-center justify-center">
             {/* Live Feed or Image */}
-            {camera.type.includes("File") || camera.type.includes("Fisheye") ? (
+            {camera.type.includes("File") || camera.type.includes("Fisheye") || camera.type.includes("Live") ? (
                 <StreamPlayer
                     wsUrl={wsUrl}
                     className="w-full h-full"
@@ -46,6 +49,12 @@ const CameraFeedCard = ({ camera }) => {
                             <Users className="w-3 h-3" />
                             {stats.fps > 0 ? stats.fps : camera.fps} FPS
                         </div>
+                        {/* Producer behind real time (frames are being skipped to catch up) */}
+                        {stats.lagMs >= LAG_WARNING_MS && (
+                            <div className="bg-amber-500/80 text-white text-xs px-2 py-1 rounded backdrop-blur-sm">
+                                {(stats.lagMs / 1000).toFixed(1)}s behind
+                            </div>
+                        )}
                     </div>
                 </div>
             </div>
@@ -1,9 +1,12 @@
 import React, { useEffect, useRef, useState } from 'react';
+import { withProtocol, parseBinaryFrame } from '../lib/frameProtocol';
 
 const StreamPlayer = ({ wsUrl, className, alt, onStats }) => {
     // Explicitly using named imports, but keeping React in scope just in case
     const imgRef = useRef(null);
     const wsRef = useRef(null);
+    // Blob URL of the frame currently shown (binary protocol), revoked when replaced
+    const frameUrlRef = useRef(null);
     const [status, setStatus] = useState('connecting');
 
     useEffect(() => {
@@ -14,22 +17,44 @@ const StreamPlayer = ({ wsUrl, className, alt, onStats }) => {
             wsRef.current.close();
         }
 
-        const ws = new WebSocket(wsUrl);
+        // Binary protocol: raw JPEG + small header, no base64/JSON overhead
+        const ws = new WebSocket(withProtocol(wsUrl, 'binary'));
+        ws.binaryType = 'arraybuffer';
         wsRef.current = ws;
 
+        const showJpeg = (jpeg) => {
+            if (!imgRef.current) return;
+            const url = URL.createObjectURL(new Blob([jpeg], { type: 'image/jpeg' }));
+            imgRef.current.src = url;
+            if (frameUrlRef.current) {
+                URL.revokeObjectURL(frameUrlRef.current);
+            }
+            frameUrlRef.current = url;
+        };
+
         ws.onopen = () => {
             console.log(`Connected to ${wsUrl}`);
             setStatus('connected');
         };
 
         ws.onmessage = (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                const frame = parseBinaryFrame(event.data);
+                if (!frame) return;
+                showJpeg(frame.jpeg);
+                if (onStats) {
+                    onStats({ fps: frame.fps, lagMs: frame.lagMs, dropped: frame.dropped });
+                }
+                return;
+            }
+            // JSON fallback (legacy protocol)
             try {
                 const data = JSON.parse(event.data);
                 if (data.image && imgRef.current) {
                     imgRef.current.src = `data:image/jpeg;base64,${data.image}`;
                 }
                 if (data.fps !== undefined && onStats) {
-                    onStats({ fps: data.fps });
+                    onStats({ fps: data.fps, lagMs: data.lag_ms ?? 0, dropped: data.dropped ?? 0 });
                 }
             } catch (e) {
                 console.error("Error parsing WS message", e);
@@ -50,6 +75,10 @@ const StreamPlayer = ({ wsUrl, className, alt, onStats }) => {
             if (wsRef.current) {
                 wsRef.current.close();
             }
+            if (frameUrlRef.current) {
+                URL.revokeObjectURL(frameUrlRef.current);
+                frameUrlRef.current = null;
+            }
         };
     }, [wsUrl]); // Removed onStats from deps to avoid re-renders if parent passes new fn
 
@@ -139,7 +139,30 @@ const SystemConfiguration = () => {
             return;
         }
 
-        // Standard Add/Edit
+        if (isAddMode) {
+            // Live source: the backend pulls the stream (reconnecting if it drops)
+            if (!formData.rtspUrl) return alert("Please enter a RTSP URL.");
+            try {
+                const apiUrl = getApiBaseUrl();
+                const res = await fetch(`${apiUrl}/api/cameras/live`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        url: formData.rtspUrl,
+                        name: formData.name || 'Live Camera',
+                        location: formData.location || 'Live Stream',
+                    })
+                });
+                if (!res.ok) throw new Error((await res.json()).detail || "Request failed");
+                await fetchCameras();
+                resetForm();
+            } catch (err) {
+                alert("Failed to add camera: " + err.message);
+            }
+            return;
+        }
+
+        // Edit
         const payload = {
             id: selectedCamera ? selectedCamera.id : Date.now().toString(),
             name: formData.name,
@@ -155,23 +178,14 @@ const SystemConfiguration = () => {
         };
 
         try {
-            if (isEditMode) {
-                // For MVP: Delete old and add new as 'update' logic is simple on backend
-                const apiUrl = getApiBaseUrl();
-                await fetch(`${apiUrl}/api/cameras/${selectedCamera.id}`, { method: 'DELETE' });
-                await fetch(`${apiUrl}/api/cameras`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(payload)
-                });
-            } else {
-                const apiUrl = getApiBaseUrl();
-                await fetch(`${apiUrl}/api/cameras`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(payload)
-                });
-            }
+            // Edit in place: deleting would release the camera's stream
+            const apiUrl = getApiBaseUrl();
+            const res = await fetch(`${apiUrl}/api/cameras/${selectedCamera.id}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            if (!res.ok) throw new Error("Update failed");
             await fetchCameras();
             resetForm();
         } catch (error) {
@@ -237,7 +251,7 @@ const SystemConfiguration = () => {
                             {cameras.map((cam) => (
                                 <Card key={cam.id} className={cn("relative group overflow-hidden hover:border-primary/50 transition-all cursor-pointer border-muted", !cam.enabled && "opacity-60")}>
                                     <div className="aspect-video bg-muted relative flex items-center justify-center bg-black">
-                                        {cam.type.includes('File') || cam.type.includes('Fisheye') ? (
+                                        {cam.type.includes('File') || cam.type.includes('Fisheye') || cam.type.includes('Live') ? (
                                             <StreamPlayer
                                                 wsUrl={getWSUrl(`/ws/${cam.id}`)}
                                                 className="w-full h-full"
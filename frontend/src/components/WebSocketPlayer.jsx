@@ -1,4 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
+import { withProtocol, parseBinaryFrame } from '../lib/frameProtocol';
+import { drawDetections } from '../lib/poseOverlay';
 // normally useState and useEffect are used together
 // useState store variable (example -> store the download data)
 // useEffect process side effects (example -> execute the download action and call useState to update/store the data in the variable)
@@ -7,12 +9,21 @@ import { useEffect, useRef, useState } from 'react';
 // countRef.current += 1;   // 2. 页面不会变。但值真的加了 1。 ----> countRef.current 变成 1，页面不会刷新。
 // normalVar += 1;          // 3. 页面不会变。 ----> 页面刷新 normalVar 被重新声明，变回了 0
 
-const WebSocketPlayer = ({ wsUrl, className, alt, onStats }) => {
+// showDetections: draw boxes/skeletons on a canvas over the video (server sends them as metadata)
+// onDetections: called with each frame's detections ({ w, h, people } or null), e.g. for counting
+const WebSocketPlayer = ({ wsUrl, className, alt, onStats, showDetections = false, onDetections }) => {
     //useRef is a hook that process reference (variable that does not change over time) -> opposite of useState
     //1.grab a DOM element
     //2. store a value that does not change over time
     const imgRef = useRef(null);
     const wsRef = useRef(null);
+    // Blob URL of the frame currently shown (binary protocol), revoked when replaced
+    const frameUrlRef = useRef(null);
+    const canvasRef = useRef(null);
+    // Latest callback without reconnecting when the parent passes a new function
+    const onDetectionsRef = useRef(onDetections);
+    onDetectionsRef.current = onDetections;
+    const wantsDetections = showDetections || Boolean(onDetections);
     // useState is a hook that process state (variable that changes over time)
     //status is the variable
     // setStatus is the only function to update the variable
@@ -36,22 +47,59 @@ const WebSocketPlayer = ({ wsUrl, className, alt, onStats }) => {
             wsRef.current.close();
         }
 
-        const ws = new WebSocket(wsUrl);
+        // Binary protocol: raw JPEG + small header, no base64/JSON overhead
+        const ws = new WebSocket(withProtocol(wsUrl, 'binary', wantsDetections));
+        ws.binaryType = 'arraybuffer';
         wsRef.current = ws;
 
+        const showJpeg = (jpeg) => {
+            if (!imgRef.current) return;
+            const url = URL.createObjectURL(new Blob([jpeg], { type: 'image/jpeg' }));
+            imgRef.current.src = url;
+            if (frameUrlRef.current) {
+                URL.revokeObjectURL(frameUrlRef.current);
+            }
+            frameUrlRef.current = url;
+        };
+
+        const showDetectionsFor = (detections) => {
+            if (showDetections) {
+                drawDetections(canvasRef.current, detections);
+            }
+            if (onDetectionsRef.current) {
+                onDetectionsRef.current(detections);
+            }
+        };
+
         ws.onopen = () => {
             console.log(`Connected to ${wsUrl}`);
             setStatus('connected');
         };
 
         ws.onmessage = (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                const frame = parseBinaryFrame(event.data);
+                if (!frame) return;
+                showJpeg(frame.jpeg);
+                if (wantsDetections) {
+                    showDetectionsFor(frame.detections);
+                }
+                if (onStats) {
+                    onStats({ fps: frame.fps, lagMs: frame.lagMs, dropped: frame.dropped });
+                }
+                return;
+            }
+            // JSON fallback (legacy protocol)
             try {
                 const data = JSON.parse(event.data);
                 if (data.image && imgRef.current) {
                     imgRef.current.src = `data:image/jpeg;base64,${data.image}`;
                 }
+                if (wantsDetections) {
+                    showDetectionsFor(data.detections ?? null);
+                }
                 if (data.fps !== undefined && onStats) {
-                    onStats({ fps: data.fps });
+                    onStats({ fps: data.fps, lagMs: data.lag_ms ?? 0, dropped: data.dropped ?? 0 });
                 }
             } catch (e) {
                 console.error("Error parsing WS message", e);
@@ -72,9 +120,13 @@ const WebSocketPlayer = ({ wsUrl, className, alt, onStats }) => {
             if (wsRef.current) {
                 wsRef.current.close();
             }
+            if (frameUrlRef.current) {
+                URL.revokeObjectURL(frameUrlRef.current);
+                frameUrlRef.current = null;
+            }
         };
         // parameter 2 dependency array
-    }, [wsUrl]);
+    }, [wsUrl, showDetections, wantsDetections]);
 
     return (
         <div className={`relative bg-black flex items-center justify-center overflow-hidden ${className}`}>
@@ -83,6 +135,12 @@ const WebSocketPlayer = ({ wsUrl, className, alt, onStats }) => {
                 className="w-full h-full object-contain"
                 alt={alt}
             />
+            {showDetections && (
+                <canvas
+                    ref={canvasRef}
+                    className="absolute inset-0 w-full h-full object-contain pointer-events-none"
+                />
+            )}
             {status !== 'connected' && (
                 <div className="absolute inset-0 flex items-center justify-center bg-black/50 text-white text-xs">
                     {status === 'connecting' && "Connecting..."}
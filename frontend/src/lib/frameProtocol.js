@@ -0,0 +1,59 @@
+// Binary WebSocket frame protocol (see backend/app/services/frame_protocol.py)
+// Header (big-endian, 20 bytes):
+//   uint8 version | uint8 keyLen | uint16 flags | uint32 seq | float64 ts | float32 fps
+// followed by the view key (utf-8) and the raw JPEG bytes.
+// With FLAG_METADATA the key is followed by uint32 length + that many bytes of JSON
+// (e.g. {"lag_ms": 12.5, "dropped": 3, "detections": {...}}) before the JPEG.
+export const FRAME_PROTOCOL_VERSION = 1;
+const HEADER_SIZE = 20;
+const FLAG_METADATA = 0x1;
+
+const textDecoder = new TextDecoder();
+
+// Adds ?protocol=... (and &detections=true) to a stream URL (keeps any existing query string)
+export const withProtocol = (wsUrl, protocol = 'binary', detections = false) => {
+    if (!wsUrl) return wsUrl;
+    const separator = wsUrl.includes('?') ? '&' : '?';
+    return `${wsUrl}${separator}protocol=${protocol}${detections ? '&detections=true' : ''}`;
+};
+
+// Returns { viewKey, seq, ts, fps, lagMs, dropped, jpeg, detections } or null if the message is not a valid frame.
+// lagMs: how far the producer is behind real time; dropped: frames it skipped to keep up.
+// detections: { w, h, people: [{ id, box: [x1, y1, x2, y2], score, kp: [x, y, visible, ...] }] } or null
+export const parseBinaryFrame = (buffer) => {
+    if (!(buffer instanceof ArrayBuffer) || buffer.byteLength < HEADER_SIZE) return null;
+
+    const view = new DataView(buffer);
+    const version = view.getUint8(0);
+    if (version !== FRAME_PROTOCOL_VERSION) return null;
+
+    const keyLen = view.getUint8(1);
+    const flags = view.getUint16(2);
+    const seq = view.getUint32(4);
+    const ts = view.getFloat64(8);
+    const fps = view.getFloat32(16);
+    let jpegStart = HEADER_SIZE + keyLen;
+
+    let metadata = null;
+    if (flags & FLAG_METADATA) {
+        const metaLen = view.getUint32(jpegStart);
+        const metaStart = jpegStart + 4;
+        try {
+            metadata = JSON.parse(textDecoder.decode(new Uint8Array(buffer, metaStart, metaLen)));
+        } catch (e) {
+            return null;
+        }
+        jpegStart = metaStart + metaLen;
+    }
+
+    return {
+        viewKey: textDecoder.decode(new Uint8Array(buffer, HEADER_SIZE, keyLen)),
+        seq,
+        ts,
+        fps: Math.round(fps * 10) / 10,
+        lagMs: metadata?.lag_ms ?? 0,
+        dropped: metadata?.dropped ?? 0,
+        jpeg: new Uint8Array(buffer, jpegStart),
+        detections: metadata?.detections ?? null,
+    };
+};
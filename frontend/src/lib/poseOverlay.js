@@ -0,0 +1,77 @@
+// Draws the detections sent with ?detections=true (see backend/pose_overlay.py) on a canvas.
+// Same COCO-17 skeleton and part colours as the server-side renderer.
+const SKELETON = [
+    [15, 13], [13, 11], [16, 14], [14, 12], [11, 12], // legs + hips
+    [5, 11], [6, 12], [5, 6],                         // torso
+    [5, 7], [6, 8], [7, 9], [8, 10],                  // arms
+    [1, 2], [0, 1], [0, 2], [1, 3], [2, 4], [3, 5], [4, 6], // head
+];
+const PART_COLORS = { legs: '#0080ff', torso: '#ff33ff', arms: '#ff9933', head: '#00ff00' };
+const EDGE_PARTS = [...Array(5).fill('legs'), ...Array(3).fill('torso'), ...Array(4).fill('arms'), ...Array(7).fill('head')];
+const KEYPOINT_PARTS = [...Array(5).fill('head'), ...Array(6).fill('arms'), ...Array(6).fill('legs')];
+const BOX_COLOR = '#00ff00';
+
+// Edges / keypoints grouped by colour once, so each part is a single path per frame
+const EDGE_GROUPS = Object.entries(PART_COLORS).map(([part, color]) => [color, SKELETON.filter((_, i) => EDGE_PARTS[i] === part)]);
+const KEYPOINT_GROUPS = Object.entries(PART_COLORS).map(([part, color]) => [
+    color, KEYPOINT_PARTS.flatMap((p, i) => (p === part ? [i] : [])),
+]);
+
+// detections: { w, h, people: [{ id, box, score, kp }] } or null (clears the canvas)
+export const drawDetections = (canvas, detections) => {
+    if (!canvas) return;
+    const ctx = canvas.getContext('2d');
+    if (!detections) {
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        return;
+    }
+    // Canvas in the detection frame's pixels; CSS (object-contain) scales it like the <img>
+    if (canvas.width !== detections.w || canvas.height !== detections.h) {
+        canvas.width = detections.w;
+        canvas.height = detections.h;
+    }
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    const scale = Math.max(1, detections.w / 640);
+    const people = detections.people || [];
+
+    ctx.lineWidth = 2 * scale;
+    ctx.strokeStyle = BOX_COLOR;
+    ctx.fillStyle = BOX_COLOR;
+    ctx.font = `${Math.round(12 * scale)}px sans-serif`;
+    ctx.beginPath();
+    for (const { id, box: [x1, y1, x2, y2] } of people) {
+        ctx.rect(x1, y1, x2 - x1, y2 - y1);
+        ctx.fillText(`#${id}`, x1, Math.max(12 * scale, y1 - 4));
+    }
+    ctx.stroke();
+
+    const visible = (kp, i) => kp[i * 3 + 2];
+    for (const [color, edges] of EDGE_GROUPS) {
+        ctx.strokeStyle = color;
+        ctx.beginPath();
+        for (const { kp } of people) {
+            if (!kp) continue;
+            for (const [a, b] of edges) {
+                if (!visible(kp, a) || !visible(kp, b)) continue;
+                ctx.moveTo(kp[a * 3], kp[a * 3 + 1]);
+                ctx.lineTo(kp[b * 3], kp[b * 3 + 1]);
+            }
+        }
+        ctx.stroke();
+    }
+    const radius = 3 * scale;
+    for (const [color, indices] of KEYPOINT_GROUPS) {
+        if (!indices.length) continue;
+        ctx.fillStyle = color;
+        ctx.beginPath();
+        for (const { kp } of people) {
+            if (!kp) continue;
+            for (const i of indices) {
+                if (!visible(kp, i)) continue;
+                ctx.moveTo(kp[i * 3] + radius, kp[i * 3 + 1]);
+                ctx.arc(kp[i * 3], kp[i * 3 + 1], radius, 0, 2 * Math.PI);
+            }
+        }
+        ctx.fill();
+    }
+};
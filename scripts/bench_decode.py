@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+# Fix path to import backend modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+sys.path.append(backend_path)
+
+from frame_reader import ALL, DECODERS, LATEST, FrameReader
+
+
+def run(video_path, policy, queue_size, work_ms, max_frames, **options):
+    """Frames/s of read + simulated processing, and the reader's stats."""
+    reader = FrameReader(video_path, policy, queue_size, **options)
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while frames < max_frames:
+            ret, frame = reader.read(timeout=5)
+            if not ret:
+                break
+            frames += 1
+            # Stand-in for dewarp/inference/encode (OpenCV releases the GIL the same way)
+            if work_ms:
+                time.sleep(work_ms / 1000)
+        elapsed = time.perf_counter() - start
+    finally:
+        reader.release()
+    return frames / elapsed if elapsed else 0.0, frames, reader.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Producer throughput with inline decode vs a decode-ahead thread")
+    parser.add_argument("video", help="Video to decode (ideally the real camera resolution/codec)")
+    parser.add_argument("--work-ms", type=float, nargs="+", default=[0, 10, 20, 40],
+                        help="Simulated per-frame processing time(s)")
+    parser.add_argument("--queue", type=int, default=4, help="Decode-ahead queue size")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per run (at most)")
+    parser.add_argument("--policy", default=ALL, choices=[ALL, LATEST])
+    parser.add_argument("--stride", type=int, default=1, help="Deliver every Nth frame (the rest are only grabbed)")
+    parser.add_argument("--max-width", type=int, default=0, help="Decode at most this wide (0 = full size)")
+    parser.add_argument("--decoder", default="auto", choices=DECODERS)
+    args = parser.parse_args()
+    options = {'stride': args.stride, 'max_width': args.max_width, 'decoder': args.decoder}
+
+    print(f"{'work ms':>8}{'inline fps':>12}{'ahead fps':>12}{'speedup':>10}{'decode ms':>11}{'dropped':>9}")
+    for work_ms in args.work_ms:
+        inline_fps, _, _ = run(args.video, args.policy, 0, work_ms, args.frames, **options)
+        ahead_fps, _, stats = run(args.video, args.policy, args.queue, work_ms, args.frames, **options)
+        print(f"{work_ms:>8.0f}{inline_fps:>12.1f}{ahead_fps:>12.1f}{ahead_fps / max(inline_fps, 1e-9):>10.2f}"
+              f"{stats['decode_ms']:>11.1f}{stats['dropped']:>9}")
+    print(f"\ncpus={os.cpu_count()}, queue={args.queue}, policy={args.policy}, decoder={stats['decoder']}"
+          f" {stats['size'][0]}x{stats['size'][1]}, stride={args.stride}, opencv {cv2.__version__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Fix path to import backend modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+sys.path.append(backend_path)
+
+from detector_backends import (DEFAULT_IMGSZ, DEFAULT_WEIGHTS, exported_path, list_calibration_images,
+                               load_predict, select_device)
+
+# Detections of a backend match the reference when their boxes overlap at least this much
+MATCH_IOU = 0.5
+
+# Backends compared by default; '-int8' rows are skipped when that export does not exist
+VARIANTS = ("torch", "onnx", "onnx-int8", "openvino", "openvino-int8")
+
+
+def load_images(image_dir, video_path, count):
+    if image_dir:
+        return [img for img in (cv2.imread(p) for p in list_calibration_images(image_dir, count)) if img is not None]
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    step = max(1, total // count)
+    images = []
+    for index in range(0, total, step):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        images.append(frame)
+        if len(images) >= count:
+            break
+    cap.release()
+    return images
+
+
+def to_arrays(result):
+    """(boxes Nx4 xyxy, keypoints Nx17x2) of one ultralytics result."""
+    boxes = result.boxes.xyxy.cpu().numpy() if result.boxes is not None else np.empty((0, 4))
+    keypoints = result.keypoints.xy.cpu().numpy() if result.keypoints is not None else np.empty((0, 17, 2))
+    return boxes, keypoints
+
+
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def compare(reference, candidate):
+    """
+    Agreement of `candidate` with the reference detections over all images:
+    recall/precision of matched boxes, their mean IoU and mean keypoint error
+    (in % of the reference box diagonal).
+    """
+    matched = ref_total = cand_total = 0
+    ious, kp_errors = [], []
+    for (ref_boxes, ref_kps), (boxes, kps) in zip(reference, candidate):
+        ref_total += len(ref_boxes)
+        cand_total += len(boxes)
+        if not len(ref_boxes) or not len(boxes):
+            continue
+        iou = iou_matrix(ref_boxes, boxes)
+        # Greedy one-to-one matching, best overlaps first
+        used_ref, used_cand = set(), set()
+        for r, c in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[r, c] < MATCH_IOU:
+                break
+            if r in used_ref or c in used_cand:
+                continue
+            used_ref.add(r)
+            used_cand.add(c)
+            matched += 1
+            ious.append(iou[r, c])
+            diag = np.hypot(*(ref_boxes[r, 2:] - ref_boxes[r, :2]))
+            kp_errors.append(float(np.mean(np.linalg.norm(kps[c] - ref_kps[r], axis=1))) / max(diag, 1e-9))
+    return {
+        'recall': matched / ref_total if ref_total else 1.0,
+        'precision': matched / cand_total if cand_total else 1.0,
+        'iou': float(np.mean(ious)) if ious else float('nan'),
+        'kp_err': 100 * float(np.mean(kp_errors)) if kp_errors else float('nan'),
+    }
+
+
+def detect_all(predict, images, batch):
+    return [to_arrays(r) for i in range(0, len(images), batch) for r in predict(images[i:i + batch])]
+
+
+def time_predict(predict, images, batch, iterations):
+    """Median ms per image of predict() on batches of `batch` images."""
+    batches = [images[i:i + batch] for i in range(0, len(images), batch)]
+    predict(batches[0])  # warm-up
+    timings = []
+    for _ in range(iterations):
+        for chunk in batches:
+            t0 = time.perf_counter()
+            predict(chunk)
+            timings.append((time.perf_counter() - t0) * 1000 / len(chunk))
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and accuracy of the detector backends against PyTorch")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--images", help="Folder of views (e.g. prepare_training_data.py --calib-dir output)")
+    source.add_argument("--video", help="Sample frames evenly from this video")
+    parser.add_argument("--count", type=int, default=50, help="Images to evaluate")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ)
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--device", default="auto", help="Device of the torch rows ('auto', 'cpu', '0')")
+    parser.add_argument("--batch", type=int, default=8, help="Batch size of the batched latency column")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.video, args.count)
+    if not images:
+        print("Error: no images to evaluate")
+        sys.exit(1)
+    device = select_device(args.device)
+
+    # Reference: the original PyTorch model
+    reference_predict, _ = load_predict("torch", args.weights, device, args.imgsz)
+    reference = detect_all(reference_predict, images, args.batch)
+
+    print(f"\n{len(images)} images, imgsz {args.imgsz}, torch device {device}, cpus={os.cpu_count()}")
+    print(f"{'backend':<16}{'ms/img':>10}{f'ms/img b{args.batch}':>12}{'speedup':>10}"
+          f"{'recall':>10}{'precision':>11}{'box IoU':>10}{'kp err %':>10}")
+
+    torch_ms = None
+    for variant in args.variants:
+        backend, _, suffix = variant.partition("-")
+        int8 = suffix == "int8"
+        if int8 and not os.path.exists(exported_path(args.weights, backend, int8=True)):
+            print(f"{variant:<16}  skipped (run scripts/export_detector.py --int8 first)")
+            continue
+        try:
+            predict, _ = load_predict(backend, args.weights, device if backend == "torch" else "cpu", args.imgsz, int8)
+        except Exception as e:
+            print(f"{variant:<16}  skipped ({e})")
+            continue
+
+        ms = time_predict(predict, images, 1, args.iterations)
+        batch_ms = time_predict(predict, images, args.batch, args.iterations)
+        torch_ms = torch_ms or ms
+        scores = compare(reference, detect_all(predict, images, args.batch))
+        print(f"{variant:<16}{ms:>10.1f}{batch_ms:>12.1f}{torch_ms / ms:>10.2f}"
+              f"{scores['recall']:>10.1%}{scores['precision']:>11.1%}{scores['iou']:>10.3f}{scores['kp_err']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
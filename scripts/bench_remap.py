@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Fix path to import backend modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+sys.path.append(backend_path)
+
+from DefishVideoCV import FisheyeMultiView, REMAP_PRECISIONS
+
+# Same 8 views the live producer uses
+VIEW_CONFIGS = [{'angle_z': a, 'angle_up': 35, 'zoom': 80} for a in range(0, 360, 45)]
+
+
+def load_frame(video_path, width, height):
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        ret, frame = cap.read()
+        cap.release()
+        if not ret:
+            print(f"Error: Cannot read a frame from {video_path}")
+            sys.exit(1)
+        return frame
+    # Synthetic textured frame (smooth noise, so interpolation error is representative)
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def map_bytes(processor):
+    return sum(m.nbytes for maps in processor.dewarp_maps if maps is not None for m in maps[:2])
+
+
+def roi_fraction(processor):
+    """Average share of the cropped frame each view reads."""
+    h, w = processor.cropped_frame_shape
+    areas = [(x1 - x0) * (y1 - y0) / (w * h) for _, _, (x0, y0, x1, y1) in filter(None, processor.dewarp_maps)]
+    return float(np.mean(areas))
+
+
+def time_remap(processor, cropped_frame, iterations):
+    """Median ms per view of cv2.remap alone (no rotate/resize/encode)."""
+    timings = []
+    for _ in range(iterations):
+        for maps in processor.dewarp_maps:
+            if maps is None:
+                continue
+            map_x, map_y, (x0, y0, x1, y1) = maps
+            t0 = time.perf_counter()
+            cv2.remap(cropped_frame[y0:y1, x0:x1], map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+            timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float vs fixed-point and full-frame vs ROI remap maps")
+    parser.add_argument("--video", default=None, help="Take the first frame of this video instead of a synthetic frame")
+    parser.add_argument("--width", type=int, default=3840, help="Synthetic frame width")
+    parser.add_argument("--height", type=int, default=2160, help="Synthetic frame height")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    frame = load_frame(args.video, args.width, args.height)
+    h, w = frame.shape[:2]
+
+    processors = {
+        f"{precision}{'+roi' if roi else ''}": FisheyeMultiView(
+            (h, w), VIEW_CONFIGS, show_original=False, use_cuda=False, remap_precision=precision, crop_to_roi=roi
+        )
+        for roi in (False, True)
+        for precision in REMAP_PRECISIONS
+    }
+    cropped_frame = processors['float'].crop(frame)
+
+    # Reference output per view from the full-frame float maps
+    reference = [processors['float'].render_view(i, cropped_frame)[0] for i in range(len(VIEW_CONFIGS))]
+
+    print(f"\nFrame {w}x{h}, {len(VIEW_CONFIGS)} views, cv2 threads={cv2.getNumThreads()}, cpus={os.cpu_count()}")
+    print(f"{'mode':<12}{'ms/view':>10}{'speedup':>10}{'maps MB':>10}{'src area':>10}{'rms err':>10}{'max err':>10}{'PSNR dB':>10}")
+
+    float_ms = None
+    for precision, processor in processors.items():
+        time_remap(processor, cropped_frame, 1)  # warm-up
+        ms = time_remap(processor, cropped_frame, args.iterations)
+        float_ms = float_ms or ms
+
+        errors = []
+        max_err = 0
+        for i, ref in enumerate(reference):
+            out = processor.render_view(i, cropped_frame)[0]
+            diff = np.abs(out.astype(np.int16) - ref.astype(np.int16))
+            errors.append(float(np.mean(diff.astype(np.float32) ** 2)))
+            max_err = max(max_err, int(diff.max()))
+        mse = float(np.mean(errors))
+        rms = float(np.sqrt(mse))
+        psnr = float('inf') if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+        print(f"{precision:<12}{ms:>10.2f}{float_ms / ms:>10.2f}{map_bytes(processor) / 1e6:>10.1f}"
+              f"{roi_fraction(processor):>10.0%}{rms:>10.3f}{max_err:>10d}{psnr:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+# Backend directory (uvicorn runs main:app from there)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+
+
+def fetch(url):
+    """(status code, parsed JSON body) or (None, None) while the server is not accepting connections."""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None, None
+
+
+def time_import(env):
+    """Seconds for a fresh interpreter to import the app (what every --reload pays)."""
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend_path, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr)
+        sys.exit(1)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_server(port, env, timeout):
+    """Seconds from process start until /api/cameras answers, and until /api/ready returns 200."""
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    api_s = ready_s = None
+    status = {}
+    try:
+        while time.perf_counter() - start < timeout:
+            if api_s is None:
+                code, _ = fetch(f"{base}/api/cameras")
+                if code == 200:
+                    api_s = time.perf_counter() - start
+            if api_s is not None:
+                code, status = fetch(f"{base}/api/ready")
+                if code == 200:
+                    ready_s = time.perf_counter() - start
+                    break
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(10)
+    return api_s, ready_s, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API startup: import time, first answer and readiness")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8013)
+    parser.add_argument("--timeout", type=float, default=120, help="Give up on readiness after this many seconds")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    imports, apis, readies = [], [], []
+    status = {}
+    for run in range(args.runs):
+        imports.append(time_import(env))
+        api_s, ready_s, status = time_server(args.port, env, args.timeout)
+        apis.append(api_s if api_s is not None else float('nan'))
+        readies.append(ready_s if ready_s is not None else float('nan'))
+        print(f"run {run + 1}: import {imports[-1] * 1000:.0f}ms | /api/cameras {apis[-1] * 1000:.0f}ms"
+              f" | /api/ready {readies[-1] * 1000:.0f}ms")
+
+    print(f"\nMedian over {args.runs} runs (warm-up {'on' if os.environ.get('CV_WARMUP', '1') != '0' else 'off'}):")
+    print(f"{'import main':<16}{np.median(imports) * 1000:>10.0f} ms")
+    print(f"{'/api/cameras':<16}{np.median(apis) * 1000:>10.0f} ms")
+    print(f"{'/api/ready':<16}{np.median(readies) * 1000:>10.0f} ms")
+    for name, resource in status.get('resources', {}).items():
+        detail = f" ({resource['error']})" if resource.get('error') else ""
+        print(f"  {name:<14}{resource['state']:>8} {resource['load_ms'] or 0:>8.0f} ms{detail}")
+
+
+if __name__ == "__main__":
+    main()
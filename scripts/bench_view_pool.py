@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Fix path to import backend modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+sys.path.append(backend_path)
+
+from DefishVideoCV import FisheyeMultiView
+
+try:
+    from turbojpeg import TurboJPEG
+    jpeg = TurboJPEG()
+except Exception:
+    jpeg = None
+
+# Same 8 views the live producer uses
+VIEW_CONFIGS = [{'angle_z': a, 'angle_up': 35, 'zoom': 80} for a in range(0, 360, 45)]
+
+
+def load_frame(video_path, width, height):
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        ret, frame = cap.read()
+        cap.release()
+        if not ret:
+            print(f"Error: Cannot read a frame from {video_path}")
+            sys.exit(1)
+        return frame
+    # Synthetic textured frame (noise compresses/remaps like real content, unlike flat colour)
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def encode(img):
+    if jpeg:
+        return jpeg.encode(img, quality=40)
+    _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 40])
+    return buffer.tobytes()
+
+
+def view_task(processor, index, cropped_frame):
+    # Mirrors video_producer: remap (at delivery size, rotation folded in) -> encode
+    planar_view, _, _ = processor.render_view(index, cropped_frame)
+    return encode(planar_view)
+
+
+def run(processor, frame, pool, iterations):
+    indices = [i for i, m in enumerate(processor.dewarp_maps) if m is not None]
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        cropped_frame = processor.crop(frame)
+        if pool is None:
+            for i in indices:
+                view_task(processor, i, cropped_frame)
+        else:
+            list(pool.map(lambda i: view_task(processor, i, cropped_frame), indices))
+        timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs pooled per-view dewarp+encode")
+    parser.add_argument("--video", default=None, help="Take the first frame of this video instead of a synthetic frame")
+    parser.add_argument("--width", type=int, default=3840, help="Synthetic frame width")
+    parser.add_argument("--height", type=int, default=2160, help="Synthetic frame height")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--workers", default="2,4,8", help="Comma separated pool sizes to test")
+    args = parser.parse_args()
+
+    frame = load_frame(args.video, args.width, args.height)
+    h, w = frame.shape[:2]
+    processor = FisheyeMultiView((h, w), VIEW_CONFIGS, show_original=False, use_cuda=False, output_size=(640, 360))
+
+    print(f"\nFrame {w}x{h}, {len(VIEW_CONFIGS)} views, encoder={'TurboJPEG' if jpeg else 'OpenCV'}, "
+          f"cv2 threads={cv2.getNumThreads()}, cpus={os.cpu_count()}")
+
+    run(processor, frame, None, 2)  # warm-up
+    serial_ms = run(processor, frame, None, args.iterations)
+    print(f"{'mode':<10}{'ms/frame':>10}{'speedup':>10}")
+    print(f"{'serial':<10}{serial_ms:>10.1f}{1.0:>10.2f}")
+
+    for n in [int(x) for x in args.workers.split(",") if x.strip()]:
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            run(processor, frame, pool, 2)
+            pool_ms = run(processor, frame, pool, args.iterations)
+        print(f"{'pool x' + str(n):<10}{pool_ms:>10.1f}{serial_ms / pool_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+
+# Fix path to import backend modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(os.path.dirname(current_dir), 'backend')
+sys.path.append(backend_path)
+
+from detector_backends import BACKENDS, DEFAULT_IMGSZ, DEFAULT_WEIGHTS, export_model
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the pose model for ONNX Runtime / OpenVINO, optionally INT8-quantized"
+    )
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="PyTorch .pt weights to export")
+    parser.add_argument("--backend", nargs="+", default=["onnx", "openvino"],
+                        choices=[b for b in BACKENDS if b != "torch"])
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ, help="Detector input size")
+    parser.add_argument("--int8", action="store_true", help="Also write an INT8 (static quantization) variant")
+    parser.add_argument(
+        "--calib-dir",
+        default=None,
+        help="Calibration views for --int8 (prepare_training_data.py --calib-dir)"
+    )
+    args = parser.parse_args()
+
+    if args.int8 and not args.calib_dir:
+        parser.error("--int8 needs --calib-dir")
+
+    for backend in args.backend:
+        path = export_model(args.weights, backend, args.imgsz)
+        print(f"{backend}: {path}")
+        if args.int8:
+            path = export_model(args.weights, backend, args.imgsz, int8=True, calib_dir=args.calib_dir)
+            print(f"{backend} INT8: {path}")
+
+    print("\nCompare them with scripts/bench_detector.py, then select one with CV_DETECTOR_BACKEND / CV_DETECTOR_INT8.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import cv2
 import sys
 import os
 import numpy as np
-from ultralytics import YOLO
 import argparse
 
 # Fix path to import backend modules
@@ -13,8 +12,18 @@ sys.path.append(backend_path)
 
 try:
     from DefishVideoCV import FisheyeMultiView
+    from detector_backends import select_device
+    from frame_reader import ALL, FrameReader
+except ImportError as e:
+    print(f"Error: Could not import the backend modules ({e}). Make sure the script is in CV-UI\\scripts "
+          "and backend is in CV-UI\\backend, and that backend/requirements.txt is installed.")
+    sys.exit(1)
+
+try:
+    # Pose model for auto-labelling (pulls in torch, which select_device uses to pick the GPU)
+    from ultralytics import YOLO
 except ImportError:
-    print("Error: Could not import DefishVideoCV. Make sure the script is in d:\\CV-UI\\scripts and backend is in d:\\CV-UI\\backend")
+    print("Error: ultralytics is not installed. Install it with: pip install ultralytics")
     sys.exit(1)
 
 def ensure_dir(path):
@@ -60,7 +69,8 @@ def crop_with_padding(image, bbox, padding_percent=0.1):
     
     return image[ny1:ny2, nx1:nx2], (nx1, ny1, nx2, ny2)
 
-def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", defish=True):
+def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", defish=True, calib_dir=None,
+                  calib_every=30, decode_ahead=8, decode_max_width=0, decoder="auto", keyframes_only=False):
     # Sampling / tracking controls
     frame_stride = 3          # process every Nth frame to cut volume (~25fps -> ~8fps)
     track_save_gap = 10       # save once every N processed frames per track
@@ -78,21 +88,30 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
     }
     for d in dirs.values():
         ensure_dir(d)
+    # Detector input views for INT8 calibration (scripts/export_detector.py --calib-dir)
+    if calib_dir:
+        ensure_dir(calib_dir)
+    calib_count = 0
 
     # Load Model (YOLO-Pose for keypoints)
     print("Loading yolo26n-Pose model...")
     model = YOLO("yolo26m-pose.pt")  # Load an official Pose model
+    device = select_device()  # GPU '0' if available, else CPU
 
 
-    # Open Video
-    cap = cv2.VideoCapture(video_path)
+    # Open Video (decoded ahead on a separate thread). Frames between strides are only
+    # grabbed, never converted to pixels; optionally decoded straight at a smaller size.
+    cap = FrameReader(video_path, ALL, queue_size=decode_ahead, stride=1 if keyframes_only else frame_stride,
+                      max_width=decode_max_width,
+                      decoder=decoder, keyframes_only=keyframes_only)
     if not cap.isOpened():
         print(f"Error: Cannot open video {video_path}")
+        cap.release()
         return
 
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = cap.width
+    height = cap.height
+    total_frames = cap.frame_count
 
     # Detect CUDA availability
     cuda_available = hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
@@ -117,10 +136,11 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
             view_configs,
             show_original=False,
             use_cuda=cuda_available,
-            downscale_size=None  # Keep full resolution for training data
+            downscale_size=None,  # Keep full resolution for training data
+            output_size=(1280, 960)  # Rendered directly at training resolution
         )
 
-    frame_idx = 0          # raw frame index from video
+    frame_idx = 0          # raw frame index from video (1-based)
     proc_idx = 0           # processed frame index after stride
     saved_count = 0
     print(f"Starting processing for {total_frames} frames...")
@@ -135,10 +155,8 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
         if not ret:
             break
 
-        frame_idx += 1
-        # Frame skipping to reduce volume
-        if frame_idx % frame_stride != 0:
-            continue
+        # The reader already skipped to every frame_stride'th frame
+        frame_idx = cap.position + 1
         proc_idx += 1
 
         if frame_idx % 10 == 0:
@@ -166,6 +184,10 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
             # Use raw frame without fisheye remap
             target_view = frame
 
+        if calib_dir and proc_idx % calib_every == 0:
+            cv2.imwrite(os.path.join(calib_dir, f"calib_{frame_idx:07d}.jpg"), target_view)
+            calib_count += 1
+
         # 2. Run Ultralytics tracking (ByteTrack/BOT-SORT via tracker YAML)
         # Uses track mode so boxes carry stable IDs across frames.
         results = model.track(
@@ -177,7 +199,7 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
             conf=track_conf,
             iou=track_iou,
             imgsz=1280,
-            device='0'  # use GPU if available, else CPU
+            device=device
         )
 
         if not results:
@@ -281,6 +303,8 @@ def process_video(video_path, output_base_dir, tracker_cfg="bytetrack.yaml", def
     cap.release()
     print(f"\nDone! Processed {frame_idx} frames. Saved {saved_count} person instances.")
     print(f"Results saved in {output_base_dir}")
+    if calib_dir:
+        print(f"Saved {calib_count} calibration frames in {calib_dir}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process Fisheye Video for MobileNet Training Data")
@@ -296,7 +320,29 @@ if __name__ == "__main__":
         action="store_true",
         help="Disable fisheye remapping (use raw frames)"
     )
+    parser.add_argument(
+        "--calib-dir",
+        default=None,
+        help="Also save every --calib-every'th processed view here, for INT8 calibration of the detector"
+    )
+    parser.add_argument("--calib-every", type=int, default=30, help="Processed frames between calibration frames")
+    parser.add_argument("--decode-ahead", type=int, default=8, help="Frames decoded ahead on a separate thread (0 = inline)")
+    parser.add_argument(
+        "--decode-max-width",
+        type=int,
+        default=0,
+        help="Decode frames no wider than this (0 = full resolution); PyAV scales during YUV conversion"
+    )
+    parser.add_argument("--decoder", default="auto", choices=["auto", "opencv", "pyav"],
+                        help="pyav needs the optional PyAV package (pip install av); auto falls back to OpenCV")
+    parser.add_argument(
+        "--keyframes-only",
+        action="store_true",
+        help="Only decode key frames (PyAV); for quick passes over hours of footage"
+    )
     
     args = parser.parse_args()
     
-    process_video(args.video_path, args.output, args.tracker, defish=not args.no_defish)
+    process_video(args.video_path, args.output, args.tracker, defish=not args.no_defish,
+                  calib_dir=args.calib_dir, calib_every=max(1, args.calib_every), decode_ahead=max(0, args.decode_ahead),
+                  decode_max_width=max(0, args.decode_max_width), decoder=args.decoder, keyframes_only=args.keyframes_only)
@@ -0,0 +1,200 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# Stand-in for a network camera: serves a video file in a loop, in real time, so live sources
+# (POST /api/cameras/live) can be tested without hardware. Outages can be simulated to watch
+# the reader reconnect and the watchdog (/api/streams/health) report the stall.
+#
+#   mjpeg: built-in HTTP MJPEG server (multipart/x-mixed-replace, like most IP cameras'
+#          /video endpoint); needs only OpenCV.   -> http://127.0.0.1:8090/cam
+#   rtsp:  publishes the file with ffmpeg to an RTSP server (mediamtx, started here if it is
+#          on PATH and not already running).       -> rtsp://127.0.0.1:8554/cam
+#
+# Outages: every --up seconds the camera goes away for --down seconds. 'stall' keeps the
+# connection open and sends nothing, 'drop' closes it and refuses new ones (rtsp: always drop).
+
+BOUNDARY = "frame"
+
+
+class Broadcaster:
+    """Reads the file at its frame rate and keeps the newest JPEG for all connected clients."""
+
+    def __init__(self, path, quality, max_width, up_s, down_s):
+        self.path = path
+        self.quality = quality
+        self.max_width = max_width
+        self.up_s = up_s
+        self.down_s = down_s
+        self.seq = 0
+        self.jpeg = None
+        self.started = time.monotonic()
+        self._cond = threading.Condition()
+
+    def outage(self) -> bool:
+        if not self.up_s or not self.down_s:
+            return False
+        return (time.monotonic() - self.started) % (self.up_s + self.down_s) >= self.up_s
+
+    def run(self):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            sys.exit(f"[Stream] Could not open {self.path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25
+        interval = 1.0 / fps if 0 < fps <= 120 else 1.0 / 25
+        next_due = time.monotonic()
+        was_down = False
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop
+                continue
+            if self.max_width and frame.shape[1] > self.max_width:
+                scale = self.max_width / frame.shape[1]
+                frame = cv2.resize(frame, (self.max_width, int(frame.shape[0] * scale) // 2 * 2), interpolation=cv2.INTER_AREA)
+            down = self.outage()
+            if down != was_down:
+                print(f"[Stream] {'Outage' if down else 'Back up'}")
+                was_down = down
+            if not down:
+                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                with self._cond:
+                    self.seq += 1
+                    self.jpeg = buffer.tobytes()
+                    self._cond.notify_all()
+            next_due += interval
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_due = time.monotonic()  # Encoding slower than real time: do not build a backlog
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.jpeg
+
+
+def make_handler(broadcaster, outage_mode, path):
+    class MJPEGHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, fmt, *args):
+            print(f"[Stream] {self.client_address[0]} {fmt % args}")
+
+        def do_GET(self):
+            if self.path.split("?")[0] != path:
+                self.send_error(404)
+                return
+            if broadcaster.outage() and outage_mode == "drop":
+                self.send_error(503, "Camera offline")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            seq = 0
+            try:
+                while True:
+                    if broadcaster.outage():
+                        if outage_mode == "drop":
+                            return  # Connection closed mid-stream
+                        time.sleep(0.1)  # Stalled: connection stays open, nothing is sent
+                        continue
+                    new_seq, jpeg = broadcaster.wait_frame(seq)
+                    if new_seq == seq or jpeg is None:
+                        continue
+                    seq = new_seq
+                    self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                     f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return MJPEGHandler
+
+
+def serve_mjpeg(args):
+    broadcaster = Broadcaster(args.video, args.quality, args.max_width, args.up, args.down)
+    threading.Thread(target=broadcaster.run, name="broadcaster", daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(broadcaster, args.outage, args.path))
+    server.daemon_threads = True
+    print(f"[Stream] Serving {args.video} at http://{args.host}:{args.port}{args.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_rtsp(args):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        sys.exit("[Stream] ffmpeg not found on PATH (use --mode mjpeg for the built-in server)")
+    mediamtx = None
+    if args.mediamtx:
+        binary = shutil.which(args.mediamtx)
+        if binary is None:
+            sys.exit(f"[Stream] {args.mediamtx} not found (start an RTSP server yourself and pass --mediamtx '')")
+        mediamtx = subprocess.Popen([binary])
+        time.sleep(1.0)  # Let it bind :8554
+    url = f"rtsp://{args.host}:{args.rtsp_port}{args.path}"
+    # -re: real time; -c copy: no re-encode (the file's codec must be RTSP-compatible, e.g. H.264)
+    command = [ffmpeg, "-hide_banner", "-loglevel", "warning", "-re", "-stream_loop", "-1", "-i", args.video,
+               "-c", "copy", "-f", "rtsp", "-rtsp_transport", "tcp", url]
+    print(f"[Stream] Publishing {args.video} to {url}")
+    try:
+        while True:
+            publisher = subprocess.Popen(command)
+            try:
+                publisher.wait(timeout=args.up if args.up and args.down else None)
+            except subprocess.TimeoutExpired:
+                print(f"[Stream] Outage ({args.down:.0f}s)")
+                publisher.terminate()
+                publisher.wait()
+                time.sleep(args.down)
+                print("[Stream] Back up")
+                continue
+            print(f"[Stream] ffmpeg exited with {publisher.returncode}, restarting")
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if mediamtx is not None:
+            mediamtx.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a video file as a live camera stream (test stand-in)")
+    parser.add_argument("video", help="Video file to loop")
+    parser.add_argument("--mode", default="mjpeg", choices=["mjpeg", "rtsp"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090, help="HTTP port (mjpeg)")
+    parser.add_argument("--rtsp-port", type=int, default=8554, help="RTSP server port (rtsp)")
+    parser.add_argument("--path", default="/cam", help="Stream path")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality (mjpeg)")
+    parser.add_argument("--max-width", type=int, default=1280, help="Downscale wider frames (mjpeg, 0 = keep)")
+    parser.add_argument("--mediamtx", default="mediamtx", help="RTSP server binary to start ('' = already running)")
+    parser.add_argument("--up", type=float, default=0, help="Seconds online between simulated outages (0 = never)")
+    parser.add_argument("--down", type=float, default=0, help="Length of each simulated outage in seconds")
+    parser.add_argument("--outage", default="stall", choices=["stall", "drop"],
+                        help="stall: connection open, no frames; drop: disconnect and refuse (mjpeg)")
+    args = parser.parse_args()
+    if not os.path.exists(args.video):
+        sys.exit(f"[Stream] {args.video} not found")
+
+    if args.mode == "rtsp":
+        serve_rtsp(args)
+    else:
+        serve_mjpeg(args)
+
+
+if __name__ == "__main__":
+    main()